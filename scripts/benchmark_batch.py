@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.search_engine import SearchEngine
+from src.core.splade_index import SpladeIndex
+
+# 쿼리별 검색 루프와 search_batch의 처리량 비교 (SPLADE 모델 인코딩 시간은 제외)
+NUM_DOCS = 100_000
+VOCAB_SIZE = 20_000
+AVG_DOC_LEN = 120
+SPLADE_VOCAB = 30522
+SPLADE_TERMS_PER_DOC = 120
+SPLADE_TERMS_PER_QUERY = 30
+NUM_QUERIES = 500
+TOP_K = 1000
+SEED = 42
+
+
+def _synthetic_engine(rng) -> SearchEngine:
+    # Zipf 분포 단어로 만든 BM25 인덱스 + 가중치가 무작위인 SPLADE 인덱스
+    words = [f"w{i}" for i in range(VOCAB_SIZE)]
+    ranks = np.minimum(rng.zipf(1.2, size=NUM_DOCS * AVG_DOC_LEN), VOCAB_SIZE) - 1
+    documents = [
+        (f"doc{i}", " ".join(words[r] for r in ranks[i * AVG_DOC_LEN:(i + 1) * AVG_DOC_LEN].tolist()))
+        for i in range(NUM_DOCS)
+    ]
+    engine = SearchEngine()
+    engine.build_index_from_data(documents)
+
+    # SPLADE term도 앞쪽 id가 더 자주 나오도록 Zipf 분포로 뽑음
+    engine.splade_index = SpladeIndex(vocab_size=SPLADE_VOCAB)
+    indices_list = [
+        np.unique(np.minimum(rng.zipf(1.3, size=SPLADE_TERMS_PER_DOC), SPLADE_VOCAB) - 1) for _ in range(NUM_DOCS)
+    ]
+    values_list = [rng.random(len(indices)).astype(np.float32) * 2 for indices in indices_list]
+    engine.splade_index.add_batch([doc_id for doc_id, _ in documents], indices_list, values_list)
+    engine.splade_index.build()
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 검색 처리량 벤치마크")
+    parser.add_argument("--queries", type=int, default=NUM_QUERIES)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(SEED)
+    print("=== 배치 검색 벤치마크 ===")
+    engine = _synthetic_engine(rng)
+    queries = [" ".join(f"w{r}" for r in rng.integers(0, 2000, rng.integers(2, 6))) for _ in range(args.queries)]
+    query_vecs = [
+        {int(t): float(w) for t, w in zip(
+            np.unique(np.minimum(rng.zipf(1.3, size=SPLADE_TERMS_PER_QUERY), SPLADE_VOCAB) - 1), rng.random(30) * 2
+        )}
+        for _ in range(args.queries)
+    ]
+    print(f"문서 수: {NUM_DOCS}, 쿼리 수: {args.queries}, top_k: {args.top_k}")
+    print(f"{'검색':>8} | {'쿼리별 루프':>11} | {'search_batch':>12} | {'배율':>6}")
+
+    start = time.perf_counter()
+    single = [engine.search_bm25(query, top_k=args.top_k) for query in queries]
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = engine.search_batch(queries, top_k=args.top_k, method="bm25")
+    batch_time = time.perf_counter() - start
+    # 배치 결과는 문서, 점수, 순서까지 쿼리별 검색과 같아야 함
+    assert single == batch
+    print(f"{'BM25':>8} | {args.queries / loop_time:>7.0f}q/s | {args.queries / batch_time:>8.0f}q/s | "
+          f"{loop_time / batch_time:>5.1f}x")
+
+    start = time.perf_counter()
+    single = [engine.splade_index.search_topk(query_vec, args.top_k) for query_vec in query_vecs]
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = engine.splade_index.search_batch(query_vecs, args.top_k)
+    batch_time = time.perf_counter() - start
+    assert all(np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]) for a, b in zip(single, batch))
+    print(f"{'SPLADE':>8} | {args.queries / loop_time:>7.0f}q/s | {args.queries / batch_time:>8.0f}q/s | "
+          f"{loop_time / batch_time:>5.1f}x")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.inverted_index import InvertedIndex, BLOCK_SIZE
+from src.core.codecs import CODECS, CompressedPostings
+from src.core.phrase import phrase_matches
+
+NUM_DOCS = 50_000
+VOCAB_SIZE = 20_000
+AVG_DOC_LEN = 120
+REPEAT = 5
+SEED = 42
+# posting 디코딩 시간을 잴 때 사용할 (가장 긴 posting을 가진) term 수
+NUM_FREQUENT_TERMS = 20
+
+
+def _timeit(fn) -> float:
+    # REPEAT번 실행해서 가장 빠른 시간을 ms 단위로 반환
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _synthetic_index() -> InvertedIndex:
+    # Zipf 분포 단어로 만든 문서
+    rng = np.random.default_rng(SEED)
+    words = [f"w{i}" for i in range(VOCAB_SIZE)]
+    ranks = np.minimum(rng.zipf(1.2, size=NUM_DOCS * AVG_DOC_LEN), VOCAB_SIZE) - 1
+    lengths = rng.poisson(AVG_DOC_LEN, size=NUM_DOCS)
+    documents = []
+    start = 0
+    for i, length in enumerate(lengths.tolist()):
+        documents.append((f"doc{i}", " ".join(words[r] for r in ranks[start:start + length].tolist())))
+        start += length
+    index = InvertedIndex()
+    index.add_documents(documents)
+    index.finalize()
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="posting 압축 codec별 크기 / 디코딩 속도 벤치마크")
+    parser.add_argument("--index", help="실제 인덱스 디렉토리 (없으면 합성 코퍼스 사용)")
+    args = parser.parse_args()
+
+    print("=== Posting 압축 벤치마크 ===")
+    if args.index:
+        index = InvertedIndex()
+        if not index.load(args.index):
+            print(f"인덱스를 찾을 수 없습니다: {args.index}")
+            return
+        index.compress("raw")
+    else:
+        index = _synthetic_index()
+
+    num_postings = index.num_postings
+    num_positions = len(index.positions) if index.has_positions else 0
+    terms = sorted(index.lexicon, key=lambda t: -int(np.diff(index.offsets)[index.lexicon[t]]))
+    frequent = terms[:NUM_FREQUENT_TERMS]
+    phrase = terms[:2]
+    print(f"문서 수: {len(index.doc_ids)}, posting 수: {num_postings}, 포지션 수: {num_positions}")
+
+    postings_doc_ids, postings_tfs, positions = index.postings_doc_ids, index.postings_tfs, index.positions
+    print(f"{'codec':>8} | {'doc id':>9} | {'tf':>9} | {'포지션':>9} | {'비트/posting':>11} | {'비트/포지션':>10} | "
+          f"{'인코딩':>9} | {'전체 디코딩':>13} | {'posting 조회':>11} | {'구문 검색':>9}")
+
+    for codec in CODECS:
+        def encode():
+            return CompressedPostings.encode(
+                codec, index.offsets, index.block_offsets, index.block_last_doc,
+                postings_doc_ids, postings_tfs, positions, BLOCK_SIZE
+            )
+
+        encode_ms = _timeit(encode)
+        compressed = encode()
+        decode_ms = _timeit(compressed.decode_all)
+        throughput = (2 * num_postings + num_positions) / (decode_ms / 1000) / 1e6
+
+        index.compress(codec)
+        lookup_ms = _timeit(lambda: [index.get_postings(term) for term in frequent]) / len(frequent)
+        phrase_ms = _timeit(lambda: phrase_matches(index, phrase)) if index.has_positions else 0.0
+        index.compress("raw")
+
+        doc_bytes = compressed.doc_ids.nbytes
+        tf_bytes = compressed.tfs.nbytes
+        position_bytes = compressed.positions.nbytes if compressed.positions is not None else 0
+        bits_per_posting = (doc_bytes + tf_bytes) * 8 / max(num_postings, 1)
+        bits_per_position = position_bytes * 8 / max(num_positions, 1)
+        print(f"{codec:>8} | {doc_bytes / 2 ** 20:>7.2f}MB | {tf_bytes / 2 ** 20:>7.2f}MB | "
+              f"{position_bytes / 2 ** 20:>7.2f}MB | {bits_per_posting:>11.2f} | {bits_per_position:>10.2f} | "
+              f"{encode_ms:>7.0f}ms | {decode_ms:>5.0f}ms ({throughput:>4.0f}M/s) | {lookup_ms:>9.2f}ms | {phrase_ms:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
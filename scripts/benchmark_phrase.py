@@ -0,0 +1,104 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.inverted_index import InvertedIndex
+from src.core.phrase import phrase_matches
+
+NUM_DOCS = 50_000
+VOCAB_SIZE = 20_000
+AVG_DOC_LEN = 120
+REPEAT = 5
+SEED = 42
+# 실제 인덱스(--index)를 쓸 때 측정할 흔한 단어 구문 (stem 된 토큰)
+COMMON_PHRASES = [
+    ["unit", "state"], ["new", "york"], ["world", "war"], ["also", "known"], ["first", "time"],
+]
+
+
+def _timeit(fn) -> float:
+    # REPEAT번 실행해서 가장 빠른 시간을 ms 단위로 반환
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _synthetic_index() -> InvertedIndex:
+    # Zipf 분포 단어로 만든 문서 (흔한 단어 구문이 많은 문서에 나타나도록)
+    rng = np.random.default_rng(SEED)
+    words = [f"w{i}" for i in range(VOCAB_SIZE)]
+    ranks = np.minimum(rng.zipf(1.2, size=NUM_DOCS * AVG_DOC_LEN), VOCAB_SIZE) - 1
+    lengths = rng.poisson(AVG_DOC_LEN, size=NUM_DOCS)
+    index = InvertedIndex()
+    start = 0
+    documents = []
+    for i, length in enumerate(lengths.tolist()):
+        documents.append((f"doc{i}", " ".join(words[r] for r in ranks[start:start + length].tolist())))
+        start += length
+    index.add_documents(documents)
+    index.finalize()
+    return index
+
+
+def _naive_phrase(index: InvertedIndex, terms):
+    # 비교용: 첫 term의 posting을 모두 돌면서 문서마다 포지션 리스트를 읽어 set으로 확인
+    first = index.lexicon[terms[0]]
+    others = [index.lexicon.get(term) for term in terms[1:]]
+    if any(term_id is None for term_id in others):
+        return 0
+    postings = []
+    for term_id in others:
+        start, end = index.offsets[term_id], index.offsets[term_id + 1]
+        docs = index.postings_doc_ids[start:end].tolist()
+        postings.append({doc: start + i for i, doc in enumerate(docs)})
+
+    matched = 0
+    for i in range(index.offsets[first], index.offsets[first + 1]):
+        doc = int(index.postings_doc_ids[i])
+        starts = set(index.get_positions(i))
+        for k, posting in enumerate(postings, 1):
+            j = posting.get(doc)
+            starts = set() if j is None else starts & {pos - k for pos in index.get_positions(j)}
+            if not starts:
+                break
+        matched += bool(starts)
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="구문 검색 latency 벤치마크")
+    parser.add_argument("--index", help="실제 인덱스 디렉토리 (없으면 합성 코퍼스 사용)")
+    args = parser.parse_args()
+
+    print("=== 구문 검색 벤치마크 ===")
+    if args.index:
+        index = InvertedIndex()
+        if not index.load(args.index):
+            print(f"인덱스를 찾을 수 없습니다: {args.index}")
+            return
+        phrases = [terms for terms in COMMON_PHRASES if all(term in index.lexicon for term in terms)]
+    else:
+        index = _synthetic_index()
+        phrases = [["w0", "w1"], ["w1", "w0"], ["w0", "w2", "w0"], ["w3", "w4"], ["w10", "w20"]]
+
+    print(f"문서 수: {len(index.doc_ids)}, Term 개수: {len(index.lexicon)}")
+    print(f"{'구문':>16} | {'후보 문서':>9} | {'일치 문서':>9} | {'읽은 포지션':>11} | {'벡터화':>9} | {'단순 루프':>9}")
+
+    for terms in phrases:
+        stats = {}
+        docs, _ = phrase_matches(index, terms, stats)
+        fast = _timeit(lambda: phrase_matches(index, terms))
+        naive = _timeit(lambda: _naive_phrase(index, terms))
+        assert _naive_phrase(index, terms) == len(docs)
+        print(f"{' '.join(terms):>16} | {stats['candidate_docs']:>9} | {len(docs):>9} | "
+              f"{stats['positions_decoded']:>11} | {fast:>7.2f}ms | {naive:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
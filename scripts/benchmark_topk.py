@@ -0,0 +1,47 @@
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.topk import top_k_indices, top_k_items
+
+NUM_DOCS = 370_000
+REPEAT = 5
+TOP_KS = [10, 100, 1000]
+SEED = 42
+
+
+def _timeit(fn) -> float:
+    # REPEAT번 실행해서 가장 빠른 시간을 ms 단위로 반환
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print("=== Top-k 선택 마이크로벤치마크 ===")
+    rng = np.random.default_rng(SEED)
+
+    # BM25처럼 일부 문서만 점수를 가지는 dense 배열과, 같은 내용의 dict
+    scores = rng.random(NUM_DOCS) * 20
+    scores[rng.random(NUM_DOCS) < 0.5] = 0.0
+    matched = np.flatnonzero(scores)
+    score_dict = {f"doc{i}": float(scores[i]) for i in matched}
+
+    print(f"문서 수: {NUM_DOCS}, 점수가 있는 문서 수: {len(matched)}")
+    print(f"{'k':>6} | {'배열 sort':>10} | {'argpartition':>12} | {'dict sorted':>11} | {'heap':>8}")
+
+    for k in TOP_KS:
+        full_sort = _timeit(lambda: matched[np.argsort(-scores[matched], kind="stable")][:k])
+        partial = _timeit(lambda: matched[top_k_indices(scores[matched], k)])
+        dict_sort = _timeit(lambda: sorted(score_dict.items(), key=lambda item: item[1], reverse=True)[:k])
+        heap = _timeit(lambda: top_k_items(score_dict.items(), k))
+        print(f"{k:>6} | {full_sort:>8.2f}ms | {partial:>10.2f}ms | {dict_sort:>9.2f}ms | {heap:>6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
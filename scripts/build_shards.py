@@ -0,0 +1,61 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.search_engine import SearchEngine
+from src.core.sharding import ShardedSearchEngine, build_shards
+
+# data/index, data/splade_index를 문서 순서대로 N개의 shard로 나눠서 data/shards에 저장
+# --verify를 주면 로컬 워커를 띄워서 shard 없이 검색한 결과와 같은지, BM25 검색 시간이 어떤지 비교
+SHARDS_PATH = "data/shards"
+VERIFY_QUERIES = [
+    "united states history", "new york city", "world war", "football club", "music album released",
+    "river", "population census", "university research", "\"new york\" pizza", "film directed by",
+]
+
+def verify(engine: SearchEngine, shards_path: str, top_k: int):
+    print(f"=== shard 검색 결과 비교 (top_k={top_k}) ===")
+    sharded = ShardedSearchEngine.spawn(shards_path)
+    try:
+        single_times, sharded_times = [], []
+        for query in VERIFY_QUERIES:
+            start = time.perf_counter()
+            expected = engine.search_bm25(query, top_k=top_k)
+            single_times.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            actual = sharded.search_bm25(query, top_k=top_k)
+            sharded_times.append((time.perf_counter() - start) * 1000)
+
+            status = "일치" if actual == expected else "불일치"
+            print(f"{query:>24} | {status} | 단일 {single_times[-1]:>7.2f}ms | shard {sharded_times[-1]:>7.2f}ms")
+        print(f"평균 검색 시간: 단일 {np.mean(single_times):.2f}ms, shard {np.mean(sharded_times):.2f}ms")
+    finally:
+        sharded.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="인덱스를 문서 구간별 shard로 나눠서 저장")
+    parser.add_argument("--num-shards", type=int, default=os.cpu_count() or 1, help="shard(워커 프로세스) 수")
+    parser.add_argument("--output", default=SHARDS_PATH, help="shard 저장 디렉토리")
+    parser.add_argument("--verify", action="store_true", help="로컬 워커로 결과 / 검색 시간 비교")
+    parser.add_argument("--top-k", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = SearchEngine(index_path="data/index", splade_index_path="data/splade_index")
+    if not engine.load():
+        print("인덱스가 없습니다. 먼저 run_indexing.py를 실행해주세요.")
+        return
+
+    print(f"=== shard 생성 시작: {args.num_shards}개 -> {args.output} ===")
+    start_time = time.time()
+    shard_paths = build_shards(engine.inverted_index, engine.splade_index, args.output, args.num_shards)
+    print(f"shard {len(shard_paths)}개 저장 완료: {time.time() - start_time:.2f}초")
+
+    if args.verify:
+        verify(engine, args.output, args.top_k)
+    engine.close()
+
+if __name__ == "__main__":
+    main()
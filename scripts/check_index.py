@@ -9,7 +9,7 @@ def main():
     index = InvertedIndex()
     
     # 인덱스 로드 시도
-    success = index.load("data/index.pkl")
+    success = index.load("data/index")
     if not success:
         print("에러: 인덱스 파일을 로드하는데 실패했습니다.")
         return
@@ -33,13 +33,18 @@ def main():
     print(f"검색어 변환: '{sample_term}' -> '{target_term}'")
 
     if target_term in index.index:
-        postings = index.index[target_term]
-        print(f"'{target_term}' 단어가 {len(postings)}개의 문서에서 발견되었습니다.")
-        
-        # 첫 번째 문서의 위치 정보 출력 예시
-        first_doc = list(postings.keys())[0]
+        doc_idx, tfs = index.get_postings(target_term)
+        print(f"'{target_term}' 단어가 {len(doc_idx)}개의 문서에서 발견되었습니다.")
 
-        print(f"문서 {first_doc} -> 위치 정보 {postings[first_doc]}")
+        first_doc = index.doc_ids[int(doc_idx[0])]
+        if index.has_positions:
+            # 첫 번째 문서의 위치 정보 출력 예시
+            postings = index.index[target_term]
+            print(f"문서 {first_doc} -> 위치 정보 {postings[first_doc]}")
+        else:
+            # --no-positions로 만든 인덱스는 포지션이 없으므로 등장 횟수(tf)만 출력
+            print("포지션 없이 만든 인덱스입니다. (점수 계산 전용)")
+            print(f"문서 {first_doc} -> 등장 횟수 {int(tfs[0])}")
     else:
         print(f"경고: '{sample_term}' 단어를 찾을 수 없습니다.")
 
@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import pickle
+import scipy.sparse as sp
+import ir_datasets
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.inverted_index import InvertedIndex
+from src.core.splade_index import SpladeIndex
+from src.core.doc_store import build_doc_store
+
+# 예전 pickle 인덱스(data/index.pkl)를 mmap 디렉토리 포맷(data/index)으로 변환
+# SPLADE 인덱스(data/splade_index.npz + _ids.pkl)가 있으면 함께 변환
+# 문서 저장소(data/docstore)가 없으면 원본 데이터셋에서 만듦 (서버는 문서 저장소가 없으면 시작하지 않음)
+SOURCE_PATH = "data/index.pkl"
+TARGET_PATH = "data/index"
+SPLADE_PATH = "data/splade_index"
+DOC_STORE_PATH = "data/docstore"
+TITLES_PATH = "data/titles.pkl"
+DATASET_ID = "wikir/en1k/training"
+
+def convert_bm25(source: str, target: str):
+    if not os.path.exists(source):
+        print(f"BM25 인덱스 {source} 파일이 없어 건너뜁니다.")
+        return
+
+    print(f"=== 인덱스 변환 시작: {source} -> {target} ===")
+    start_time = time.time()
+
+    index = InvertedIndex()
+    index.load(source)
+    print(f"pickle 로드 완료: {time.time() - start_time:.2f}초")
+
+    index.save(target)
+    print(f"디렉토리 포맷 저장 완료: {time.time() - start_time:.2f}초")
+
+    # 변환된 인덱스를 다시 열어서 로드 시간 확인
+    load_start = time.time()
+    converted = InvertedIndex()
+    converted.load(target)
+    print(f"mmap 로드 시간: {time.time() - load_start:.4f}초")
+    print(f"문서 수: {converted.doc_count}, Term 개수: {len(converted.lexicon)}")
+
+def convert_splade(path_prefix: str):
+    if not os.path.exists(f"{path_prefix}.npz"):
+        print(f"SPLADE 인덱스 {path_prefix}.npz 파일이 없어 건너뜁니다.")
+        return
+
+    print(f"=== SPLADE 인덱스 변환 시작: {path_prefix}.npz -> {path_prefix}/ ===")
+    start_time = time.time()
+
+    # 디렉토리가 이미 있으면 load()가 디렉토리를 먼저 읽으므로 npz를 직접 읽음
+    index = SpladeIndex()
+    index.matrix = sp.load_npz(f"{path_prefix}.npz")
+    with open(f"{path_prefix}_ids.pkl", 'rb') as f:
+        index.doc_ids = pickle.load(f)
+    print(f"npz 로드 완료: {time.time() - start_time:.2f}초")
+
+    index.save(path_prefix)
+    print(f"디렉토리 포맷 저장 완료: {time.time() - start_time:.2f}초")
+
+    load_start = time.time()
+    SpladeIndex().load(path_prefix)
+    print(f"mmap 로드 시간: {time.time() - load_start:.4f}초")
+
+def convert_doc_store(path: str):
+    if os.path.isdir(path):
+        print(f"문서 저장소 {path}가 이미 있어 건너뜁니다.")
+        return
+
+    print(f"=== 문서 저장소 생성 시작: {DATASET_ID} -> {path} ===")
+    start_time = time.time()
+    titles = {}
+    if os.path.exists(TITLES_PATH):
+        with open(TITLES_PATH, 'rb') as f:
+            titles = pickle.load(f)
+
+    dataset = ir_datasets.load(DATASET_ID)
+    count = build_doc_store(
+        ((doc.doc_id, doc.text, titles.get(doc.doc_id, "")) for doc in dataset.docs_iter()), path
+    )
+    print(f"문서 {count}개 저장 완료: {time.time() - start_time:.2f}초")
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_PATH
+    target = sys.argv[2] if len(sys.argv) > 2 else TARGET_PATH
+
+    convert_bm25(source, target)
+    convert_splade(SPLADE_PATH)
+    convert_doc_store(DOC_STORE_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,12 @@ from tqdm import tqdm
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.core.search_engine import SearchEngine
 
+# 한 번에 배치 검색할 쿼리 수 (tqdm 진행률 단위)
+BATCH_SIZE = 256
+
 def main():
     # 엔진 및 데이터셋 로드
-    engine = SearchEngine(index_path="data/index.pkl")
+    engine = SearchEngine(index_path="data/index")
     if not engine.load():
         return
     dataset_id = "wikir/en1k/training"
@@ -29,15 +32,16 @@ def main():
     # 실제 평가 실행
     run = {}
     target_query_ids = set(qrels.keys())
-    for q_id, q_text in tqdm(queries.items(), desc="검색 중"):
-        if q_id not in target_query_ids:
-            continue
-
-        results = engine.search_bm25(q_text, top_k=5000)
-        
-        run[q_id] = {}
-        for doc_id, score in results:
-            run[q_id][doc_id] = score
+    # 쿼리를 BATCH_SIZE개씩 모아서 배치 검색 (같은 term의 점수 기여도를 쿼리끼리 공유)
+    target_queries = [(q_id, q_text) for q_id, q_text in queries.items() if q_id in target_query_ids]
+    for start in tqdm(range(0, len(target_queries), BATCH_SIZE), desc="검색 중"):
+        batch = target_queries[start:start + BATCH_SIZE]
+        texts = [q_text for _, q_text in batch]
+        batch_results = engine.search_batch(texts, top_k=5000, method="bm25")
+        for (q_id, _), results in zip(batch, batch_results):
+            run[q_id] = {}
+            for doc_id, score in results:
+                run[q_id][doc_id] = score
 
     # 평가 지표
     evaluator = pytrec_eval.RelevanceEvaluator(
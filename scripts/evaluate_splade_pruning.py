@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+import pytrec_eval
+import ir_datasets
+from tqdm import tqdm
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.search_engine import SearchEngine
+
+# SPLADE 가지치기 설정별 latency / Recall@1000 비교
+# (이름, search_topk에 넘길 옵션)
+CONFIGS = [
+    ("exact", {"mode": "exact"}),
+    ("maxscore", {"mode": "maxscore"}),
+    ("maxscore + term<=32", {"mode": "maxscore", "max_query_terms": 32}),
+    ("maxscore + term<=16", {"mode": "maxscore", "max_query_terms": 16}),
+    ("maxscore + weight>=0.3", {"mode": "maxscore", "min_query_weight": 0.3}),
+]
+TOP_K = 1000
+
+def main():
+    engine = SearchEngine(index_path="data/index", splade_index_path="data/splade_index")
+    print("인덱스 로딩 중...")
+    if not engine.load():
+        print("인덱스 로드 실패")
+        return
+    engine.load_splade_model()
+
+    dataset = ir_datasets.load("wikir/en1k/training")
+
+    qrels = {}
+    for qrel in dataset.qrels_iter():
+        if qrel.query_id not in qrels:
+            qrels[qrel.query_id] = {}
+        qrels[qrel.query_id][qrel.doc_id] = qrel.relevance
+
+    # 쿼리 인코딩은 설정과 무관하므로 한 번만 해둠 (검색 시간만 측정하기 위함)
+    query_vecs = {}
+    for query in tqdm(dataset.queries_iter(), desc="쿼리 인코딩"):
+        if query.query_id in qrels:
+            query_vecs[query.query_id] = engine.splade_model.encode(query.text)
+
+    doc_ids = engine.splade_index.doc_ids
+    exact_runs = None
+
+    print("\n" + "=" * 78)
+    print(f"{'설정':<26} {'평균(ms)':>9} {'p99(ms)':>9} {'Recall@1000':>12} {'exact 대비 겹침':>16}")
+    print("=" * 78)
+
+    for name, options in CONFIGS:
+        run = {}
+        latencies = []
+        for q_id, query_vec in query_vecs.items():
+            start = time.perf_counter()
+            doc_idx, scores = engine.splade_index.search_topk(query_vec, TOP_K, **options)
+            latencies.append((time.perf_counter() - start) * 1000)
+            run[q_id] = {doc_ids[idx]: float(score) for idx, score in zip(doc_idx.tolist(), scores.tolist())}
+
+        evaluator = pytrec_eval.RelevanceEvaluator(qrels, {'recall_1000'})
+        metrics = evaluator.evaluate(run)
+        recall = sum(scores.get('recall_1000', 0.0) for scores in metrics.values()) / max(len(metrics), 1)
+
+        # exact 결과와 top-1000이 얼마나 겹치는지 (근사 설정의 품질 손실 확인용)
+        if exact_runs is None:
+            exact_runs = run
+        overlap = sum(
+            len(set(run[q_id]) & set(exact_runs[q_id])) / max(len(exact_runs[q_id]), 1)
+            for q_id in run
+        ) / max(len(run), 1)
+
+        latencies.sort()
+        mean = sum(latencies) / max(len(latencies), 1)
+        p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+        print(f"{name:<26} {mean:>9.2f} {p99:>9.2f} {recall:>12.4f} {overlap:>16.4f}")
+
+    print("=" * 78)
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,101 @@
 import sys
 import os
-import json
 import time
+import pickle
+import argparse
+import ijson
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import ir_datasets
 from src.core.search_engine import SearchEngine
+from src.core.spimi import build_index_spimi
+from src.core.doc_store import DocStoreWriter
+from src.core.codecs import CODECS
+
+EXPANDED_DOCS_PATH = "data/expanded_docs.json"
+DATASET_ID = "wikir/en1k/training"
+DOC_STORE_PATH = "data/docstore"
+
+def iter_documents(titles_map, doc_store):
+    # (doc_id, 인덱싱할 텍스트)를 하나씩 내줌. 전체 문서를 한 번에 메모리에 올리지 않음
+    # 화면에 보여줄 원문과 제목은 인덱스와 같은 순서로 문서 저장소에 기록
+    # 확장된 문서(JSON)가 있는지 먼저 확인
+    if os.path.exists(EXPANDED_DOCS_PATH):
+        with open(EXPANDED_DOCS_PATH, 'rb') as f:
+            for item in ijson.items(f, "item"):
+                doc_id = item['doc_id']
+                text = item.get('text', item.get('original_text', ''))
+                title = item.get('title', '')
+                doc_store.add(doc_id, item.get('original_text', text), title)
+
+                indexed_text = text
+                if title:
+                    # title을 두 번 넣음
+                    # 키워드가 title에서 매칭되면 원하는 문서일 가능성이 큼
+                    indexed_text = f"{title} {title} {text}"
+                    titles_map[doc_id] = title
+
+                yield doc_id, indexed_text
+
+    # Doc2Query에서 생성된 JSON문서가 없으면 원본 ir_datasets 사용
+    else:
+        print("원본 데이터셋 사용")
+        dataset = ir_datasets.load(DATASET_ID)
+
+        for count, doc in enumerate(dataset.docs_iter(), 1):
+            doc_store.add(doc.doc_id, doc.text)
+            yield doc.doc_id, doc.text
+            if count % 10000 == 0:
+                print(f"{count}개의 문서를 읽었습니다.")
 
 def main():
+    parser = argparse.ArgumentParser(description="BM25 인덱스 생성")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="인덱스를 나눠서 만들 프로세스 수 (1이면 직렬 빌드)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="문서를 읽으면서 디스크로 flush 하는 SPIMI 방식으로 빌드 (메모리 사용량 제한)")
+    parser.add_argument("--memory-mb", type=float, default=512,
+                        help="--streaming 사용 시 메모리 블록 크기 (MB)")
+    parser.add_argument("--codec", choices=CODECS, default="raw",
+                        help="posting / 포지션 압축 방식 (raw: 압축 안 함)")
+    parser.add_argument("--no-positions", action="store_true",
+                        help="포지션 없이 tf만 저장하는 점수 계산 전용 인덱스 (구문/근접 검색 불가)")
+    args = parser.parse_args()
+
     print("=== 인덱싱 프로세스 시작 ===")
     start_time = time.time()
-    
+
     # 서치 엔진 초기화
-    engine = SearchEngine(index_path="data/index.pkl")
-    
-    EXPANDED_DOCS_PATH = "data/expanded_docs.json"
-    dataset_id = "wikir/en1k/training"
-    documents = []
+    engine = SearchEngine(index_path="data/index")
     titles_map = {}
 
-    # 확장된 문서(JSON)가 있는지 먼저 확인
-    if os.path.exists(EXPANDED_DOCS_PATH):
-        with open(EXPANDED_DOCS_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for item in data:
-            doc_id = item['doc_id']
-            text = item.get('text', item.get('original_text', ''))
-            title = item.get('title', '')
-
-            indexed_text = text
-            if title:
-                # title을 두 번 넣음
-                # 키워드가 title에서 매칭되면 원하는 문서일 가능성이 큼
-                indexed_text = f"{title} {title} {text}"
-            
-            documents.append((doc_id, indexed_text))
-            if title:
-                titles_map[doc_id] = title
-    
-    # Doc2Query에서 생성된 JSON문서가 없으면 원본 ir_datasets 사용
+    if args.streaming:
+        print(f"스트리밍 인덱스 구축 중... (memory={args.memory_mb}MB)")
+        with DocStoreWriter(DOC_STORE_PATH) as doc_store:
+            meta = build_index_spimi(
+                iter_documents(titles_map, doc_store), engine.index_path, memory_budget_mb=args.memory_mb,
+                store_positions=not args.no_positions
+            )
+        print(f"문서 수: {meta['doc_count']}, Term 개수: {meta['num_terms']}")
+
+        if args.codec != "raw":
+            # SPIMI 결과는 raw 포맷이므로 다시 읽어서 압축 포맷으로 저장
+            print(f"posting 압축 중... (codec={args.codec})")
+            engine.inverted_index.load(engine.index_path)
+            engine.inverted_index.save(engine.index_path, codec=args.codec)
+
+        with open(engine.titles_path, 'wb') as f:
+            pickle.dump(titles_map, f)
     else:
-        print("원본 데이터셋 사용")
-        dataset = ir_datasets.load(dataset_id)
-        
-        for doc in dataset.docs_iter():
-            documents.append((doc.doc_id, doc.text))
-            if len(documents) % 10000 == 0:
-                print(f"{len(documents)}개의 문서를 읽었습니다.")
-    
-    print("인덱스 구축 중...")
-    engine.build_index_from_data(documents)
-    engine.titles = titles_map
-    
-    engine.save()
-    
+        with DocStoreWriter(DOC_STORE_PATH) as doc_store:
+            documents = list(iter_documents(titles_map, doc_store))
+
+        print(f"인덱스 구축 중... (workers={args.workers})")
+        engine.build_index_from_data(documents, workers=args.workers, store_positions=not args.no_positions)
+        engine.titles = titles_map
+        engine.inverted_index.compress(args.codec)
+
+        engine.save()
+
     elapsed = time.time() - start_time
     print(f"=== 인덱싱 완료. 소요 시간: {elapsed:.2f}초 ===")
 
@@ -0,0 +1,29 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.sharding import serve_shard
+
+# shard 하나를 로드해서 coordinator(ShardedSearchEngine)의 연결을 기다리는 워커
+# 다른 노드에서 실행한 뒤 coordinator에서 ShardedSearchEngine([(host, port), ...], authkey=...)로 연결
+# 인증 키는 SHARD_AUTHKEY 환경 변수로 반드시 지정해야 함 (coordinator와 같아야 함)
+# 메시지를 pickle로 주고받으므로 키를 아는 쪽은 워커에서 코드를 실행할 수 있음 -> 충분히 긴 임의의 키를 사용
+
+
+def main():
+    parser = argparse.ArgumentParser(description="shard 검색 워커")
+    parser.add_argument("--shard", required=True, help="shard 디렉토리 (예: data/shards/shard_0)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7100)
+    args = parser.parse_args()
+
+    authkey = os.environ.get("SHARD_AUTHKEY", "").encode()
+    # 기본 키는 없음. 키 없이는 (loopback 주소라도) 워커를 시작하지 않음
+    if not authkey:
+        parser.error("SHARD_AUTHKEY 환경 변수로 인증 키를 지정해야 합니다.")
+
+    print(f"shard 워커 시작: {args.shard} ({args.host}:{args.port})")
+    serve_shard(args.shard, (args.host, args.port), authkey)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,33 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from src.core.search_engine import SearchEngine
+from src.core.doc_store import DocStore
+from src.application.worker_pool import SearchWorkerPool, PoolFullError
+from src.application.startup import StagedStartup
 import contextlib
-import ir_datasets
 import time
 import os
 import re
 
 # 전역 인스턴스
 engine: SearchEngine = None
-DOC_STORE = {} # {doc_id: text}
+search_pool: SearchWorkerPool = None
+startup: StagedStartup = None
+DOC_STORE: DocStore = None # 검색 결과에 보여줄 원문/제목 (mmap)
+DOC_STORE_PATH = "data/docstore"
+
+# 검색 워커 풀 설정 (환경 변수로 조정 가능)
+# 동시에 실행되는 검색 수와, 그 이상으로 기다릴 수 있는 요청 수
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", os.cpu_count() or 4))
+SEARCH_QUEUE_SIZE = int(os.environ.get("SEARCH_QUEUE_SIZE", SEARCH_WORKERS * 2))
+# SPLADE 쿼리 인코딩 micro-batching 설정 (배치 크기 1이면 사용하지 않음)
+SPLADE_BATCH_SIZE = int(os.environ.get("SPLADE_BATCH_SIZE", 16))
+SPLADE_BATCH_WAIT_MS = float(os.environ.get("SPLADE_BATCH_WAIT_MS", 2.0))
+# SPLADE 모델이 로딩되는 동안 BM25만으로 먼저 응답할지 여부
+DEGRADED_READY = os.environ.get("DEGRADED_READY", "0") == "1"
+DEGRADED_READY_STAGES = ("bm25_index", "titles", "doc_store")
 
 # 현재 파일의 디렉토리 절대 경로
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -53,38 +69,74 @@ def highlight_text(text: str, query: str) -> str:
         
     return text
 
+def load_bm25_index():
+    if not engine.load_bm25():
+        raise RuntimeError("인덱스 로드 실패. 'scripts/run_indexing.py'를 먼저 실행해주세요.")
+
+def load_doc_store():
+    # 문서 원문은 mmap으로 열기만 하고, 실제로 읽은 블록만 page cache에 올라감
+    global DOC_STORE
+    # 서버 시작 중에 원본 데이터셋 전체를 읽지 않도록, 문서 저장소가 없으면 이 단계를 실패시킴
+    doc_store = DocStore()
+    if not doc_store.load(DOC_STORE_PATH):
+        raise RuntimeError(
+            f"문서 저장소({DOC_STORE_PATH})가 없습니다. 'scripts/run_indexing.py'로 인덱스를 다시 만들거나, "
+            "예전 인덱스라면 'scripts/convert_index.py'로 문서 저장소를 만들어주세요."
+        )
+    DOC_STORE = doc_store
+
+def readiness():
+    # "full": hybrid 검색 가능, "degraded": SPLADE 모델 로딩 중이라 BM25만 사용, None: 아직 준비 안 됨
+    if startup is None:
+        return None
+    if startup.is_done():
+        return "full"
+    if DEGRADED_READY and startup.is_done(*DEGRADED_READY_STAGES):
+        return "degraded"
+    return None
+
+def bm25_page(query: str, top_k: int = 10, offset: int = 0):
+    # hybrid_search와 같은 (doc_id, score) 형태로 BM25 결과의 한 페이지를 반환
+    return engine.search_bm25(query, top_k=offset + top_k)[offset:]
+
 # 수명 주기 관리를 위한 함수
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
     # init(초기화)
-    global engine
+    global engine, search_pool, startup, DOC_STORE
     
     print("엔진 초기화중...")
-    engine = SearchEngine(index_path="data/index.pkl")
-    
-    if not engine.load():
-        print("인덱스 로드 실패. 'scripts/run_indexing.py'를 먼저 실행해주세요.")
-    else:
-        print("인덱스 로드 성공.")
-
-    print("문서를 메모리에 로드중...")
-    start_time = time.time()
-    dataset = ir_datasets.load("wikir/en1k/training")
-
-    for doc in dataset.docs_iter():
-        DOC_STORE[doc.doc_id] = doc.text
-    print(f"문서 로드 완료: {len(DOC_STORE)}, {time.time() - start_time:.2f}초")
-    
-    print("SPLADE 모델 로딩 중...")
-    engine.load_splade_model()
-    engine.hybrid_search("warm up!!", top_k=100)
-    print("모델 로딩 완료.")
+    # hybrid_search의 SPLADE 브랜치도 검색 워커 수만큼 동시에 돌 수 있도록 맞춤
+    engine = SearchEngine(
+        index_path="data/index",
+        hybrid_workers=SEARCH_WORKERS,
+        splade_max_batch_size=SPLADE_BATCH_SIZE,
+        splade_max_wait_ms=SPLADE_BATCH_WAIT_MS
+    )
+    search_pool = SearchWorkerPool(max_workers=SEARCH_WORKERS, max_queue=SEARCH_QUEUE_SIZE)
+
+    # 서로 독립적인 로딩 단계는 동시에 실행하고, 끝나기를 기다리지 않고 바로 요청을 받기 시작함
+    # 준비 상태는 /readyz로 확인 (준비 전 /search는 503)
+    startup = StagedStartup()
+    startup.add("bm25_index", load_bm25_index)
+    startup.add("splade_index", engine.load_splade_index)
+    startup.add("titles", engine.load_titles)
+    startup.add("doc_store", load_doc_store)
+    startup.add("splade_model", engine.load_splade_model)
+    startup.add("warm_up", lambda: engine.hybrid_search("warm up!!", top_k=100),
+                requires=("bm25_index", "splade_index", "splade_model"))
+    startup.start()
 
     yield
 
-    # 종료
+    # 종료 (아직 로딩 중인 단계가 있으면 끝날 때까지 기다림)
+    startup.shutdown()
+    startup = None
+    search_pool.shutdown()
+    search_pool = None
+    engine.close()
     engine = None
-    DOC_STORE.clear()
+    DOC_STORE = None
 
 app = FastAPI(lifespan=lifespan)
 
@@ -109,15 +161,35 @@ async def search(request: Request, q: str = "", page: int = 1):
     search_time = 0.0
     limit = 10
     
+    mode = readiness()
+    if q and mode is None:
+        return HTMLResponse(
+            "서버를 준비 중입니다. 잠시 후 다시 시도해주세요.",
+            status_code=503,
+            headers={"Retry-After": "5"}
+        )
+
     if q and engine:
         start_time = time.time()
         offset = (page - 1) * limit
-
-        results_with_scores = engine.hybrid_search(q, top_k=limit, offset=offset)
+        search_fn = engine.hybrid_search if mode == "full" else bm25_page
+
+        # 검색은 워커 풀에서 실행해서 이벤트 루프를 막지 않음
+        # 대기열이 가득 차면 기다리지 않고 바로 503을 반환
+        try:
+            results_with_scores = await search_pool.run(search_fn, q, top_k=limit, offset=offset)
+        except PoolFullError:
+            return HTMLResponse(
+                "요청이 많아 잠시 후 다시 시도해주세요.",
+                status_code=503,
+                headers={"Retry-After": "1"}
+            )
         
-        for rank, (doc_id, score) in enumerate(results_with_scores, offset + 1):
-            text = DOC_STORE.get(doc_id, "Content not found.")
-            title = engine.titles.get(doc_id, "제목 없음")
+        # 결과 문서를 한 번에 읽어서 같은 블록은 한 번만 압축 해제
+        docs = DOC_STORE.get_many([doc_id for doc_id, _ in results_with_scores])
+        for rank, ((doc_id, score), doc) in enumerate(zip(results_with_scores, docs), offset + 1):
+            text = doc["text"] if doc else "Content not found."
+            title = (doc["title"] if doc else "") or engine.titles.get(doc_id, "제목 없음")
             snippet = text[:300] + "..." if len(text) > 300 else text
             snippet = highlight_text(snippet, q)
             
@@ -142,4 +214,31 @@ async def search(request: Request, q: str = "", page: int = 1):
             "page": page,
             "has_next": len(results) == limit
         }
-    )
\ No newline at end of file
+    )
+
+@app.get("/healthz")
+async def healthz():
+    # liveness: 프로세스가 요청을 처리할 수 있으면 항상 200
+    return JSONResponse({"status": "ok"})
+
+@app.get("/readyz")
+async def readyz():
+    # readiness: 검색을 받을 수 있으면 200 (mode=full/degraded), 로딩 중이면 503
+    mode = readiness()
+    return JSONResponse(
+        {
+            "ready": mode is not None,
+            "mode": mode,
+            "stages": startup.status() if startup is not None else {},
+        },
+        status_code=200 if mode is not None else 503
+    )
+
+@app.get("/stats")
+async def stats():
+    # 검색 워커 풀의 대기열 길이와 실행 중인 요청 수, 쿼리/결과 캐시 적중률
+    return JSONResponse({
+        "search_pool": search_pool.stats() if search_pool is not None else None,
+        "query_cache": engine.query_cache.stats() if engine is not None else None,
+        "result_cache": engine.result_cache.stats() if engine is not None else None,
+    })
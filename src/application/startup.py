@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+class StartupStage:
+    def __init__(self, name: str, fn: Callable, requires: Tuple[str, ...] = ()):
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+        self.status = "pending"  # pending -> running -> done / failed
+        self.elapsed_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+
+
+# 서버 시작 시 필요한 로딩 단계들을 동시에 실행
+# - 서로 의존하지 않는 단계(BM25 인덱스, SPLADE 인덱스, 모델 등)는 각자 스레드에서 바로 시작
+# - requires에 적은 단계가 모두 끝난 뒤에 시작해야 하는 단계(warm-up 등)는 그때까지 기다림
+# - 단계별 상태와 소요 시간을 기록해서 readiness 판단과 로그에 사용
+# 전체 시작 시간은 (의존 관계가 없다면) 가장 오래 걸리는 단계 하나의 시간이 됨
+class StagedStartup:
+    def __init__(self):
+        self.stages: Dict[str, StartupStage] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._start_time: Optional[float] = None
+
+    def add(self, name: str, fn: Callable, requires: Iterable[str] = ()):
+        if name in self.stages:
+            raise ValueError(f"이미 등록된 시작 단계입니다: {name}")
+        for required in requires:
+            if required not in self.stages:
+                raise ValueError(f"등록되지 않은 시작 단계에 의존합니다: {required}")
+        self.stages[name] = StartupStage(name, fn, tuple(requires))
+
+    def start(self):
+        # 단계마다 스레드를 하나씩 배정하므로 의존 단계를 기다리는 동안 다른 단계가 막히지 않음
+        self._start_time = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.stages), 1), thread_name_prefix="startup")
+        for stage in self.stages.values():
+            stage.future = self._executor.submit(self._run, stage)
+
+    def _run(self, stage: StartupStage):
+        for required in stage.requires:
+            dependency = self.stages[required]
+            dependency.future.exception()
+            if dependency.status != "done":
+                with self._lock:
+                    stage.status = "failed"
+                    stage.error = f"선행 단계 실패: {required}"
+                print(f"[시작] {stage.name} 건너뜀 (선행 단계 {required} 실패)")
+                return
+
+        with self._lock:
+            stage.status = "running"
+        stage_start = time.perf_counter()
+        try:
+            stage.fn()
+        except Exception as e:
+            with self._lock:
+                stage.status = "failed"
+                stage.error = repr(e)
+                stage.elapsed_ms = (time.perf_counter() - stage_start) * 1000
+            print(f"[시작] {stage.name} 실패: {e!r} ({stage.elapsed_ms:.0f}ms)")
+            return
+
+        with self._lock:
+            stage.status = "done"
+            stage.elapsed_ms = (time.perf_counter() - stage_start) * 1000
+        since_start = (time.perf_counter() - self._start_time) * 1000
+        print(f"[시작] {stage.name} 완료: {stage.elapsed_ms:.0f}ms (시작 후 {since_start:.0f}ms)")
+
+    def is_done(self, *names: str) -> bool:
+        # names를 주지 않으면 모든 단계
+        names = names or tuple(self.stages)
+        with self._lock:
+            return all(self.stages[name].status == "done" for name in names)
+
+    def failed(self) -> Dict[str, str]:
+        with self._lock:
+            return {stage.name: stage.error for stage in self.stages.values() if stage.status == "failed"}
+
+    def wait(self, *names: str, timeout: Optional[float] = None) -> bool:
+        # 단계가 끝날 때까지 기다린 뒤 모두 성공했는지 반환
+        names = names or tuple(self.stages)
+        wait([self.stages[name].future for name in names], timeout=timeout)
+        return self.is_done(*names)
+
+    def status(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                stage.name: {
+                    "status": stage.status,
+                    "elapsed_ms": None if stage.elapsed_ms is None else round(stage.elapsed_ms, 1),
+                    "error": stage.error,
+                }
+                for stage in self.stages.values()
+            }
+
+    def shutdown(self):
+        # 아직 실행 중인 단계가 있으면 끝날 때까지 기다림
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+class PoolFullError(Exception):
+    # 대기열이 가득 차서 요청을 받을 수 없을 때 발생
+    pass
+
+
+# /search 요청을 이벤트 루프 밖에서 처리하기 위한 크기 제한 워커 풀
+# - 동시에 실행되는 작업은 max_workers개, 대기열은 max_queue개까지만 허용
+# - 대기열이 가득 차면 바로 PoolFullError를 발생시켜서 요청이 무한정 쌓이지 않도록 함
+class SearchWorkerPool:
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search-worker")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._rejected = 0
+        self._completed = 0
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if self._queued + self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PoolFullError("검색 대기열이 가득 찼습니다.")
+            self._queued += 1
+
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+
+        try:
+            future = self._executor.submit(task)
+        except RuntimeError:
+            # 종료 중인 풀에 제출한 경우
+            with self._lock:
+                self._queued -= 1
+            raise
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "completed": self._completed,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,38 @@
+import math
+import numpy as np
+
+# BM25 점수 계산 커널
+# 단일 인덱스(SearchEngine), 세그먼트(SegmentedBM25), shard 워커(ShardWorker)가 모두 이 함수들을 사용함
+# float 연산 순서가 같아야 세그먼트/shard로 나눠서 계산한 점수가 처음부터 다시 빌드한 인덱스의 점수와 정확히 같으므로
+# 수식을 바꿀 때는 여기만 고쳐야 함
+
+
+def bm25_idf(N: int, n_q: int) -> float:
+    # N: 전체 문서 수, n_q: 해당 term을 포함하고 있는 문서의 개수
+    return math.log((N - n_q + 0.5) / (n_q + 0.5) + 1)
+
+
+def bm25_length_norm(doc_lens: np.ndarray, k1: float, b: float, avgdl: float) -> np.ndarray:
+    # 문서별 길이 정규화 값 k1 * (1 - b + b * dl / avgdl)
+    # 쿼리마다 posting 단위로 다시 계산하지 않도록 미리 계산해두고 사용
+    doc_lens = np.asarray(doc_lens, dtype=np.float64)
+    if avgdl > 0:
+        return k1 * (1 - b + b * (doc_lens / avgdl))
+    return np.zeros(len(doc_lens), dtype=np.float64)
+
+
+def bm25_term_scores(doc_idx: np.ndarray, tfs: np.ndarray, idf: float, length_norm: np.ndarray,
+                     k1: float) -> np.ndarray:
+    # term 하나의 posting별 BM25 점수
+    # 분자: TF * (k1 + 1), 분모: TF + k1 * (1 - b + b * (doc_len / avgdl))
+    tf = tfs.astype(np.float64)
+    numerator = tf * (k1 + 1)
+    denominator = tf + length_norm[doc_idx]
+    return idf * (numerator / denominator)
+
+
+def accumulate_bm25(scores: np.ndarray, doc_idx: np.ndarray, tfs: np.ndarray, idf: float,
+                    length_norm: np.ndarray, k1: float):
+    # term 하나의 posting에 대한 BM25 점수를 scores에 더함
+    # 한 term의 posting 안에서 문서 id는 중복되지 않으므로 바로 누적 가능
+    scores[doc_idx] += bm25_term_scores(doc_idx, tfs, idf, length_norm, k1)
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def normalize_query(text: str) -> str:
+    # 캐시 키용 쿼리 정규화: 소문자 + 연속 공백 하나로
+    # BM25 토크나이저와 SPLADE(uncased BERT) 모두 대소문자/공백 차이에 영향을 받지 않음
+    return " ".join(text.lower().split())
+
+
+# 크기 / TTL 제한이 있는 thread-safe LRU 캐시
+# - maxsize를 넘으면 가장 오래 사용하지 않은 항목부터 제거
+# - ttl(초)이 지난 항목은 조회 시점에 만료 처리
+# - weigher가 있으면 항목별 무게(예: 결과 개수)의 합이 max_weight를 넘지 않도록 제거
+# - maxsize=0 이면 아무것도 저장하지 않음
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 max_weight: Optional[int] = None, weigher: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.weight = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value, _ = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        weight = self.weigher(value) if self.weigher is not None else 0
+        if self.max_weight is not None and weight > self.max_weight:
+            # 혼자서 한도를 넘는 항목은 저장하지 않음
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, value, weight)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (self.max_weight is not None and self.weight > self.max_weight):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.weight -= evicted
+
+    def _remove(self, key: Hashable):
+        _, _, weight = self._data.pop(key)
+        self.weight -= weight
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        # 계산은 lock 밖에서 수행 (같은 키를 동시에 계산하는 경우는 드물고, 결과도 같으므로 허용)
+        sentinel = _MISSING
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "weight": self.weight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_MISSING = object()
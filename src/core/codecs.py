@@ -0,0 +1,356 @@
+import numpy as np
+from typing import Optional, Tuple
+from .storage import save_array, load_array
+
+# posting 압축 방식
+# - raw: 값마다 4바이트 (압축 안 함, 비교용)
+# - vbyte: 값마다 7비트씩 나눠서 1~5바이트 (작은 값이 많을수록 유리)
+# - bitpack: 블록마다 가장 큰 값의 비트 수(width)로 모든 값을 고정 길이로 이어 붙임
+CODECS = ("raw", "vbyte", "bitpack")
+
+# bitpack 디코딩에서 값 하나를 8바이트 단위로 읽기 때문에 데이터 끝에 붙이는 여유 바이트
+PAD_BYTES = 8
+
+
+def gather_ranges(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # 여러 [start, end) 구간의 인덱스를 하나로 이어 붙임 -> (인덱스, 각 인덱스가 속한 구간 번호)
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(ends, dtype=np.int64) - starts
+    group = np.repeat(np.arange(len(starts)), lengths)
+    within = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + within, group
+
+
+def delta_encode(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # 구간(lengths)마다 앞 값과의 차이로 바꿈. 구간의 첫 값은 그대로 둠
+    values = np.asarray(values, dtype=np.int64)
+    gaps = np.diff(values, prepend=0)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    starts = (np.cumsum(lengths) - lengths)[lengths > 0]
+    gaps[starts] = values[starts]
+    return gaps
+
+
+def delta_decode(gaps: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # delta_encode의 역변환: 구간마다 누적합을 새로 시작
+    gaps = np.asarray(gaps, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = np.cumsum(gaps)
+    starts = np.cumsum(lengths) - lengths
+    before = np.zeros(len(lengths), dtype=np.int64)
+    nonempty = lengths > 0
+    before[nonempty] = total[starts[nonempty]] - gaps[starts[nonempty]]
+    return total - np.repeat(before, lengths)
+
+
+def vbyte_encode(values: np.ndarray) -> np.ndarray:
+    # 하위 7비트부터 한 바이트씩 저장하고, 마지막 바이트가 아니면 최상위 비트(0x80)를 켬
+    values = np.asarray(values, dtype=np.uint64)
+    num_bytes = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        num_bytes += values >= (1 << shift)
+    starts = np.cumsum(num_bytes) - num_bytes
+
+    out = np.empty(int(num_bytes.sum()), dtype=np.uint8)
+    for k in range(int(num_bytes.max()) if len(values) else 0):
+        mask = num_bytes > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (num_bytes[mask] - 1 > k).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + k] = byte | more
+    return out
+
+
+def vbyte_decode(data: np.ndarray) -> np.ndarray:
+    # 최상위 비트가 꺼진 바이트에서 값 하나가 끝남. 값마다 7비트씩 밀어서 한 번에 더함
+    data = np.asarray(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    last = data < 0x80
+    starts = np.concatenate(([0], np.flatnonzero(last)[:-1] + 1))
+    value_of_byte = np.cumsum(last) - last
+    shift = (np.arange(len(data)) - starts[value_of_byte]) * 7
+    parts = (data & 0x7F).astype(np.int64) << shift
+    return np.add.reduceat(parts, starts)
+
+
+def _block_widths(values: np.ndarray, value_offsets: np.ndarray) -> np.ndarray:
+    # 블록별 최대값의 비트 수 (블록의 값이 모두 0이면 0비트)
+    lengths = np.diff(value_offsets)
+    maxes = np.zeros(len(lengths), dtype=np.float64)
+    nonempty = lengths > 0
+    if nonempty.any():
+        maxes[nonempty] = np.maximum.reduceat(values, value_offsets[:-1][nonempty])
+    return np.frexp(maxes)[1].astype(np.uint8)
+
+
+def bitpack_encode(values: np.ndarray, value_offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (데이터, 블록별 바이트 위치, 블록별 비트 수)
+    # 각 값을 64비트 word에 OR로 넣음. 값의 비트 구간은 겹치지 않고 순서대로이므로 reduceat으로 모을 수 있음
+    values = np.asarray(values, dtype=np.uint64)
+    value_offsets = np.asarray(value_offsets, dtype=np.int64)
+    lengths = np.diff(value_offsets)
+    widths = _block_widths(values, value_offsets)
+
+    byte_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum((lengths * widths + 7) // 8, out=byte_offsets[1:])
+    words = np.zeros(int(byte_offsets[-1]) // 8 + 2, dtype=np.uint64)
+
+    value_block = np.repeat(np.arange(len(lengths)), lengths)
+    width = widths[value_block].astype(np.int64)
+    bit_pos = byte_offsets[value_block] * 8 + (np.arange(len(values)) - value_offsets[value_block]) * width
+    word_idx = bit_pos >> 6
+    shift = (bit_pos & 63).astype(np.uint64)
+
+    def scatter(idx, parts):
+        if len(idx) == 0:
+            return
+        first = np.concatenate(([0], np.flatnonzero(np.diff(idx)) + 1))
+        words[idx[first]] |= np.bitwise_or.reduceat(parts, first)
+
+    scatter(word_idx, values << shift)
+    # word 경계를 넘는 값은 남은 상위 비트를 다음 word에 넣음
+    spill = (shift.astype(np.int64) + width) > 64
+    scatter(word_idx[spill] + 1, values[spill] >> (np.uint64(64) - shift[spill]))
+
+    data = np.zeros(int(byte_offsets[-1]) + PAD_BYTES, dtype=np.uint8)
+    data[:byte_offsets[-1]] = words.astype('<u8').view(np.uint8)[:byte_offsets[-1]]
+    return data, byte_offsets, widths
+
+
+def _byte_windows(data: np.ndarray) -> np.ndarray:
+    # data[i:i + 8]을 little-endian uint64로 보는 뷰 (복사 없이 한 번의 인덱싱으로 값 하나를 읽기 위함)
+    return np.ndarray(shape=(max(len(data) - 7, 0),), dtype='<u8', buffer=data, strides=(1,))
+
+
+def bitpack_decode(windows: np.ndarray, byte_offsets: np.ndarray, widths: np.ndarray,
+                   value_offsets: np.ndarray, blocks: np.ndarray) -> np.ndarray:
+    lengths = value_offsets[blocks + 1] - value_offsets[blocks]
+    value_block = np.repeat(blocks, lengths)
+    within = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    width = widths[value_block].astype(np.uint64)
+    bit_pos = byte_offsets[value_block] * 8 + within * width.astype(np.int64)
+
+    word = windows[bit_pos >> 3]
+    mask = (np.uint64(1) << width) - np.uint64(1)
+    return ((word >> (bit_pos & 7).astype(np.uint64)) & mask).astype(np.int64)
+
+
+# 0 이상의 정수 배열을 블록 단위로 압축한 것
+# value_offsets[b] ~ value_offsets[b + 1]: 블록 b에 들어 있는 값, byte_offsets[b]: 블록 b의 시작 바이트 (skip 테이블)
+# 블록마다 따로 풀 수 있으므로 필요한 블록만 골라서 디코딩 가능
+class EncodedStream:
+    def __init__(self, codec: str, data: np.ndarray, byte_offsets: np.ndarray, value_offsets: np.ndarray,
+                 widths: Optional[np.ndarray] = None):
+        if codec not in CODECS:
+            raise ValueError(f"지원하지 않는 codec입니다: {codec}")
+        self.codec = codec
+        self.data = data
+        self.byte_offsets = byte_offsets
+        self.value_offsets = value_offsets
+        self.widths = widths
+        self._windows = _byte_windows(data) if codec == "bitpack" else None
+
+    @classmethod
+    def encode(cls, values: np.ndarray, value_offsets: np.ndarray, codec: str) -> "EncodedStream":
+        values = np.asarray(values)
+        value_offsets = np.asarray(value_offsets, dtype=np.int64)
+        if codec == "raw":
+            return cls(codec, values.astype('<u4').view(np.uint8), value_offsets * 4, value_offsets)
+        if codec == "vbyte":
+            data = vbyte_encode(values)
+            # 블록별 바이트 위치 = 블록 첫 값의 시작 바이트 (값은 최상위 비트가 꺼진 바이트에서 끝남)
+            ends = np.flatnonzero(data < 0x80) + 1
+            byte_offsets = np.concatenate(([0], ends))[value_offsets]
+            return cls(codec, data, byte_offsets, value_offsets)
+        if codec == "bitpack":
+            data, byte_offsets, widths = bitpack_encode(values, value_offsets)
+            return cls(codec, data, byte_offsets, value_offsets, widths)
+        raise ValueError(f"지원하지 않는 codec입니다: {codec}")
+
+    @property
+    def num_blocks(self) -> int:
+        return len(self.value_offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        # 데이터 + skip 테이블 크기
+        size = self.data.nbytes + self.byte_offsets.nbytes + self.value_offsets.nbytes
+        return size + (self.widths.nbytes if self.widths is not None else 0)
+
+    def decode_range(self, first: int, last: int) -> np.ndarray:
+        # 연속된 블록 [first, last)의 값
+        if self.codec == "bitpack":
+            return self.decode_blocks(np.arange(first, last))
+        start, end = int(self.byte_offsets[first]), int(self.byte_offsets[last])
+        if self.codec == "raw":
+            return np.asarray(self.data[start:end]).view('<u4').astype(np.int64)
+        return vbyte_decode(self.data[start:end])
+
+    def decode_blocks(self, blocks: np.ndarray) -> np.ndarray:
+        # 블록 번호 순서대로 값을 이어 붙여서 반환
+        blocks = np.asarray(blocks, dtype=np.int64)
+        if self.codec == "bitpack":
+            return bitpack_decode(self._windows, self.byte_offsets, self.widths, self.value_offsets, blocks)
+        byte_idx, _ = gather_ranges(self.byte_offsets[blocks], self.byte_offsets[blocks + 1])
+        data = np.asarray(self.data)[byte_idx]
+        if self.codec == "raw":
+            return data.view('<u4').astype(np.int64)
+        return vbyte_decode(data)
+
+    def save(self, directory: str, name: str):
+        save_array(directory, f"{name}.data", self.data)
+        save_array(directory, f"{name}.byte_offsets", self.byte_offsets)
+        save_array(directory, f"{name}.value_offsets", self.value_offsets)
+        if self.widths is not None:
+            save_array(directory, f"{name}.widths", self.widths)
+
+    @classmethod
+    def load(cls, directory: str, name: str, codec: str) -> "EncodedStream":
+        widths = load_array(directory, f"{name}.widths") if codec == "bitpack" else None
+        return cls(
+            codec,
+            load_array(directory, f"{name}.data"),
+            load_array(directory, f"{name}.byte_offsets"),
+            load_array(directory, f"{name}.value_offsets"),
+            widths,
+        )
+
+
+def block_posting_starts(offsets: np.ndarray, block_offsets: np.ndarray, block_size: int) -> np.ndarray:
+    # 블록별 첫 posting 위치 (마지막 원소는 전체 posting 수). compute_block_metadata와 같은 블록 구분
+    num_blocks = np.diff(block_offsets)
+    block_term = np.repeat(np.arange(len(num_blocks)), num_blocks)
+    local_block = np.arange(int(block_offsets[-1])) - block_offsets[block_term]
+    starts = offsets[block_term] + local_block * block_size
+    return np.append(starts, offsets[-1]).astype(np.int64)
+
+
+# InvertedIndex의 posting을 압축해서 보관
+# - 문서 id: term마다 delta(gap)로 바꾼 뒤 블록 단위 압축. 블록 b는 block_last_doc[b - 1]에서부터 풀 수 있음
+# - tf: tf - 1을 압축 (tf가 모두 1인 블록은 bitpack에서 0비트)
+# - 포지션: posting마다 delta로 바꾼 뒤 posting 블록과 같은 단위로 압축
+# 블록 구분은 Block-Max WAND 블록과 같으므로 block_last_doc이 그대로 skip 테이블이 됨
+class CompressedPostings:
+    STREAMS = ("postings_doc_ids", "postings_tfs", "positions")
+
+    def __init__(self, codec: str, offsets: np.ndarray, block_offsets: np.ndarray, block_last_doc: np.ndarray,
+                 block_size: int, doc_ids: EncodedStream, tfs: EncodedStream, positions: Optional[EncodedStream]):
+        self.codec = codec
+        self.offsets = offsets
+        self.block_offsets = block_offsets
+        self.block_last_doc = block_last_doc
+        self.block_size = block_size
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.positions = positions
+        self.block_starts = doc_ids.value_offsets
+
+        # 블록을 따로 풀 때 더해줄 문서 id (term의 첫 블록이면 0, 아니면 앞 블록의 마지막 문서 id)
+        num_blocks = len(block_last_doc)
+        self.block_bases = np.zeros(num_blocks, dtype=np.int64)
+        if num_blocks:
+            self.block_bases[1:] = block_last_doc[:-1]
+            has_blocks = np.diff(block_offsets) > 0
+            self.block_bases[block_offsets[:-1][has_blocks]] = 0
+
+    @classmethod
+    def encode(cls, codec: str, offsets: np.ndarray, block_offsets: np.ndarray, block_last_doc: np.ndarray,
+               postings_doc_ids: np.ndarray, postings_tfs: np.ndarray, positions: Optional[np.ndarray],
+               block_size: int) -> "CompressedPostings":
+        block_starts = block_posting_starts(offsets, block_offsets, block_size)
+        tfs = np.asarray(postings_tfs, dtype=np.int64)
+        doc_stream = EncodedStream.encode(delta_encode(postings_doc_ids, np.diff(offsets)), block_starts, codec)
+        tf_stream = EncodedStream.encode(tfs - 1, block_starts, codec)
+
+        position_stream = None
+        if positions is not None:
+            position_offsets = np.concatenate(([0], np.cumsum(tfs)))
+            position_stream = EncodedStream.encode(
+                delta_encode(positions, tfs), position_offsets[block_starts], codec
+            )
+        return cls(codec, offsets, block_offsets, block_last_doc, block_size, doc_stream, tf_stream, position_stream)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(stream.nbytes for stream in (self.doc_ids, self.tfs, self.positions) if stream is not None)
+
+    def postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        # term의 모든 블록을 한 번에 풀어서 (내부 문서 id, tf)를 반환
+        first, last = int(self.block_offsets[term_id]), int(self.block_offsets[term_id + 1])
+        docs = np.cumsum(self.doc_ids.decode_range(first, last))
+        tfs = self.tfs.decode_range(first, last) + 1
+        return docs.astype(np.int32), tfs.astype(np.int32)
+
+    def find_postings(self, term_id: int, docs: np.ndarray) -> np.ndarray:
+        # 정렬된 내부 문서 id마다 term의 posting 위치를 찾음 (없으면 -1)
+        # block_last_doc(skip 테이블)으로 문서가 들어 있을 수 있는 블록만 골라서 풀어봄
+        docs = np.asarray(docs, dtype=np.int64)
+        found = np.full(len(docs), -1, dtype=np.int64)
+        first, last = int(self.block_offsets[term_id]), int(self.block_offsets[term_id + 1])
+        block = first + np.searchsorted(self.block_last_doc[first:last], docs)
+        inside = np.flatnonzero(block < last)
+        if len(inside) == 0:
+            return found
+
+        unique_blocks = np.unique(block[inside])
+        lengths = self.block_starts[unique_blocks + 1] - self.block_starts[unique_blocks]
+        block_docs = delta_decode(self.doc_ids.decode_blocks(unique_blocks), lengths)
+        block_docs += np.repeat(self.block_bases[unique_blocks], lengths)
+        posting_of, _ = gather_ranges(self.block_starts[unique_blocks], self.block_starts[unique_blocks + 1])
+
+        # 같은 term의 블록은 문서 id 순이므로 이어 붙인 결과도 정렬되어 있음
+        pos = np.searchsorted(block_docs, docs[inside])
+        hit = pos < len(block_docs)
+        hit[hit] = block_docs[pos[hit]] == docs[inside][hit]
+        found[inside[hit]] = posting_of[pos[hit]]
+        return found
+
+    def posting_blocks(self, posting_idx: np.ndarray) -> np.ndarray:
+        # posting 위치 -> 블록 번호
+        term = np.searchsorted(self.offsets, posting_idx, side="right") - 1
+        return self.block_offsets[term] + (posting_idx - self.offsets[term]) // self.block_size
+
+    def positions_for(self, posting_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # 여러 posting의 포지션을 (이어 붙인 포지션, 각 포지션이 속한 posting 순번)으로 반환
+        # posting이 들어 있는 블록만 풀어서 읽음
+        posting_idx = np.asarray(posting_idx, dtype=np.int64)
+        if len(posting_idx) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        blocks = self.posting_blocks(posting_idx)
+        unique_blocks, inverse = np.unique(blocks, return_inverse=True)
+        tfs = self.tfs.decode_blocks(unique_blocks) + 1
+        positions = delta_decode(self.positions.decode_blocks(unique_blocks), tfs)
+
+        # 풀어낸 블록들 안에서 요청한 posting의 순번과 포지션 구간
+        block_lengths = self.block_starts[unique_blocks + 1] - self.block_starts[unique_blocks]
+        block_first = np.cumsum(block_lengths) - block_lengths
+        local = block_first[inverse] + (posting_idx - self.block_starts[blocks])
+        position_starts = np.cumsum(tfs) - tfs
+        idx, group = gather_ranges(position_starts[local], position_starts[local] + tfs[local])
+        return positions[idx], group
+
+    def decode_all(self) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        # 전체를 풀어서 (posting 문서 id, tf, 포지션) 배열로 반환
+        num_blocks = self.doc_ids.num_blocks
+        doc_ids = delta_decode(self.doc_ids.decode_range(0, num_blocks), np.diff(self.offsets))
+        tfs = self.tfs.decode_range(0, num_blocks) + 1
+        positions = None
+        if self.positions is not None:
+            positions = delta_decode(self.positions.decode_range(0, num_blocks), tfs).astype(np.int32)
+        return doc_ids.astype(np.int32), tfs.astype(np.int32), positions
+
+    def save(self, directory: str):
+        for name, stream in zip(self.STREAMS, (self.doc_ids, self.tfs, self.positions)):
+            if stream is not None:
+                stream.save(directory, name)
+
+    @classmethod
+    def load(cls, directory: str, codec: str, offsets: np.ndarray, block_offsets: np.ndarray,
+             block_last_doc: np.ndarray, block_size: int, has_positions: bool) -> "CompressedPostings":
+        doc_ids, tfs, positions = (
+            EncodedStream.load(directory, name, codec) if name != "positions" or has_positions else None
+            for name in cls.STREAMS
+        )
+        return cls(codec, offsets, block_offsets, block_last_doc, block_size, doc_ids, tfs, positions)
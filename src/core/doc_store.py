@@ -0,0 +1,169 @@
+import bisect
+import json
+import logging
+import os
+import zlib
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from .cache import LRUCache
+from .storage import (
+    atomic_directory, write_meta, read_meta, save_array, load_array, StringTable, StringTableWriter
+)
+
+logger = logging.getLogger(__name__)
+
+# 디렉토리 포맷 이름과 버전
+DOC_STORE_FORMAT_NAME = "doc-store"
+DOC_STORE_FORMAT_VERSION = 1
+
+# 압축 블록 하나에 들어가는 문서 수
+DOCS_PER_BLOCK = 32
+
+# 문서 저장소 (검색 결과 화면에 보여줄 원문 + 제목)
+# - docs.bin: DOCS_PER_BLOCK개씩 묶어서 zlib으로 압축한 블록들을 이어 붙인 파일
+# - block_offsets.npy: 블록별 시작 위치 (마지막 원소는 파일 크기)
+# - doc_ids: 문서 id 문자열 테이블. 저장 순서 = 인덱스의 내부 문서 id 순서
+# - sorted_ids.npy: 문서 id를 정렬한 순서 (문자열 id로 찾을 때 이진 탐색용)
+# 읽을 때는 docs.bin을 mmap으로 열어서 필요한 블록만 풀기 때문에 원문은 page cache에만 올라감
+class DocStoreWriter:
+    def __init__(self, path: str, docs_per_block: int = DOCS_PER_BLOCK):
+        self.path = path
+        self.docs_per_block = docs_per_block
+        self._atomic = None
+        self._dir = None
+
+    def __enter__(self) -> "DocStoreWriter":
+        self._atomic = atomic_directory(self.path)
+        self._dir = self._atomic.__enter__()
+        self._file = open(os.path.join(self._dir, "docs.bin"), 'wb')
+        self._doc_ids = StringTableWriter(self._dir, "doc_ids")
+        self._all_ids: List[str] = []
+        self._block: List[Tuple[str, str]] = []
+        self._block_offsets = [0]
+        return self
+
+    def add(self, doc_id: str, text: str, title: str = ""):
+        self._doc_ids.append(doc_id)
+        self._all_ids.append(doc_id)
+        self._block.append((text, title))
+        if len(self._block) >= self.docs_per_block:
+            self._write_block()
+
+    def _write_block(self):
+        if not self._block:
+            return
+        payload = json.dumps(self._block, ensure_ascii=False).encode('utf-8')
+        self._file.write(zlib.compress(payload))
+        self._block_offsets.append(self._file.tell())
+        self._block = []
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._finish()
+        except BaseException as e:
+            # 마무리(offset / 메타 저장) 중에 실패하면 반쯤 쓴 저장소로 교체하지 않고 임시 디렉토리를 지움
+            logger.exception("문서 저장소를 저장하지 못했습니다: %s", self.path)
+            exc_type, exc, tb = type(e), e, e.__traceback__
+            raise
+        finally:
+            # 성공/실패와 관계없이 파일 핸들을 모두 닫은 뒤 임시 디렉토리를 교체하거나 지움
+            self._file.close()
+            self._doc_ids.abort()
+            self._atomic.__exit__(exc_type, exc, tb)
+        return False
+
+    def _finish(self):
+        self._write_block()
+        self._file.close()
+        self._doc_ids.close()
+        save_array(self._dir, "block_offsets", np.array(self._block_offsets, dtype=np.int64))
+        order = sorted(range(len(self._all_ids)), key=self._all_ids.__getitem__)
+        save_array(self._dir, "sorted_ids", np.array(order, dtype=np.int64))
+        write_meta(self._dir, {
+            "format": DOC_STORE_FORMAT_NAME,
+            "version": DOC_STORE_FORMAT_VERSION,
+            "num_docs": len(self._all_ids),
+            "docs_per_block": self.docs_per_block,
+        })
+
+
+def build_doc_store(documents: Iterable[Tuple[str, str, str]], path: str, docs_per_block: int = DOCS_PER_BLOCK) -> int:
+    # documents: (doc_id, text, title). 저장한 문서 수를 반환
+    count = 0
+    with DocStoreWriter(path, docs_per_block) as writer:
+        for doc_id, text, title in documents:
+            writer.add(doc_id, text, title)
+            count += 1
+    return count
+
+
+class DocStore:
+    def __init__(self, block_cache_size: int = 256):
+        self.doc_ids: Optional[StringTable] = None
+        self.docs_per_block = DOCS_PER_BLOCK
+        self._data: Optional[np.ndarray] = None
+        self._block_offsets: Optional[np.ndarray] = None
+        self._sorted_ids: Optional[np.ndarray] = None
+        # 최근에 푼 블록 캐시 (같은 블록의 문서를 연달아 읽는 경우가 많음)
+        self._blocks = LRUCache(maxsize=block_cache_size)
+
+    def load(self, path: str) -> bool:
+        if not os.path.isdir(path):
+            return False
+
+        meta = read_meta(path)
+        if meta.get("format") != DOC_STORE_FORMAT_NAME or meta.get("version", 0) > DOC_STORE_FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 문서 저장소 포맷입니다: {meta.get('format')} v{meta.get('version')}")
+
+        self.docs_per_block = meta["docs_per_block"]
+        self.doc_ids = StringTable.load(path, "doc_ids")
+        self._block_offsets = load_array(path, "block_offsets")
+        self._sorted_ids = load_array(path, "sorted_ids")
+        data_path = os.path.join(path, "docs.bin")
+        if os.path.getsize(data_path) > 0:
+            self._data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            self._data = np.zeros(0, dtype=np.uint8)
+        self._blocks.clear()
+        return True
+
+    def __len__(self) -> int:
+        return 0 if self.doc_ids is None else len(self.doc_ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return self.find(doc_id) is not None
+
+    def find(self, doc_id: str) -> Optional[int]:
+        # 문서 id -> 내부 문서 id (정렬 순서 위에서 이진 탐색, 전체 매핑을 메모리에 만들지 않음)
+        if self.doc_ids is None:
+            return None
+        sorted_ids = self._sorted_ids
+        doc_ids = self.doc_ids
+        lo = bisect.bisect_left(range(len(sorted_ids)), doc_id, key=lambda i: doc_ids[int(sorted_ids[i])])
+        if lo < len(sorted_ids) and doc_ids[int(sorted_ids[lo])] == doc_id:
+            return int(sorted_ids[lo])
+        return None
+
+    def _block(self, block_idx: int) -> List[List[str]]:
+        def decompress():
+            start, end = self._block_offsets[block_idx], self._block_offsets[block_idx + 1]
+            return json.loads(zlib.decompress(self._data[start:end].tobytes()).decode('utf-8'))
+        return self._blocks.get_or_compute(block_idx, decompress)
+
+    def get_by_index(self, idx: int) -> Dict[str, str]:
+        text, title = self._block(idx // self.docs_per_block)[idx % self.docs_per_block]
+        return {"doc_id": self.doc_ids[idx], "text": text, "title": title}
+
+    def get(self, doc_id: str) -> Optional[Dict[str, str]]:
+        idx = self.find(doc_id)
+        return None if idx is None else self.get_by_index(idx)
+
+    def get_many(self, doc_ids: List[str]) -> List[Optional[Dict[str, str]]]:
+        # 같은 블록에 있는 문서는 블록을 한 번만 풀도록 블록 순으로 읽음
+        indices = [self.find(doc_id) for doc_id in doc_ids]
+        found = sorted((idx, i) for i, idx in enumerate(indices) if idx is not None)
+        results: List[Optional[Dict[str, str]]] = [None] * len(doc_ids)
+        for idx, i in found:
+            results[i] = self.get_by_index(idx)
+        return results
@@ -0,0 +1,147 @@
+import heapq
+import numpy as np
+from typing import Dict, List, Tuple
+
+# 상한값 계산 시 부동소수점 오차로 실제 점수보다 작아지는 일을 막기 위한 여유분
+UB_EPSILON = 1e-9
+
+# 더 이상 posting이 없을 때의 문서 id
+END_OF_LIST = np.iinfo(np.int64).max
+
+
+# BM25 한 term(쿼리 토큰)에 대한 posting 커서
+# DAAT(document-at-a-time) 방식으로 문서 id 순서대로 posting을 따라감
+class PostingCursor:
+    def __init__(self, order: int, docs: np.ndarray, tfs: np.ndarray, idf: float,
+                 block_last_doc: np.ndarray, block_ub: np.ndarray, block_size: int):
+        self.order = order # 쿼리에서의 토큰 순서 (점수 누적 순서를 맞추기 위함)
+        self.docs = docs
+        self.tfs = tfs
+        self.idf = idf
+        self.block_last_doc = block_last_doc
+        self.block_ub = block_ub
+        self.block_size = block_size
+        self.max_ub = float(block_ub.max()) if len(block_ub) else 0.0
+        self.pos = 0
+        self.doc = int(docs[0]) if len(docs) else END_OF_LIST
+
+    def next_geq(self, target: int) -> int:
+        # target 이상인 첫 번째 문서로 이동
+        # 블록의 마지막 문서 id로 먼저 블록을 건너뛴 뒤, 블록 안에서만 탐색
+        if self.doc >= target:
+            return 0
+        start = self.pos
+        block = self._find_block(target)
+        if block >= len(self.block_last_doc):
+            self.pos = len(self.docs)
+            self.doc = END_OF_LIST
+            return self.pos - start
+
+        lo = max(start, block * self.block_size)
+        hi = min(lo + self.block_size, len(self.docs))
+        self.pos = int(np.searchsorted(self.docs[lo:hi], target)) + lo
+        self.doc = int(self.docs[self.pos])
+        return self.pos - start
+
+    def _find_block(self, target: int) -> int:
+        # 현재 위치 이후에서 target이 들어갈 블록 번호 (대부분 현재 블록이므로 먼저 확인)
+        block = self.pos // self.block_size
+        if block < len(self.block_last_doc) and self.block_last_doc[block] >= target:
+            return block
+        return int(np.searchsorted(self.block_last_doc[block:], target)) + block
+
+    def next(self):
+        self.pos += 1
+        self.doc = int(self.docs[self.pos]) if self.pos < len(self.docs) else END_OF_LIST
+
+    def block_max(self, target: int) -> Tuple[float, int]:
+        # target 문서가 속할 블록의 점수 상한과 그 블록의 마지막 문서 id
+        # (shallow move: 실제 posting 위치는 움직이지 않음)
+        block = self._find_block(target)
+        if block >= len(self.block_last_doc):
+            return 0.0, END_OF_LIST
+        return float(self.block_ub[block]), int(self.block_last_doc[block])
+
+
+def block_max_wand(cursors: List[PostingCursor], top_k: int, score_fn, use_block_max: bool = True) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    # WAND / Block-Max WAND로 상위 k개 문서를 찾음
+    # - score_fn(cursor): 해당 커서가 가리키는 posting의 점수
+    # - 상한이 현재 k번째 점수(threshold) 이하인 문서는 건너뜀
+    # 결과는 (문서 id 배열, 점수 배열, 통계)이며, 전체 계산과 같은 top-k를 반환
+    # (동점이면 문서 id가 작은 쪽이 우선: 문서를 id 순서로 보므로 나중 문서는 동점으로 들어올 수 없음)
+    heap: List[Tuple[float, int]] = [] # (score, -doc) min-heap
+    threshold = -np.inf
+    evaluated = 0
+    total = sum(len(c.docs) for c in cursors)
+    cursors = [c for c in cursors if c.doc != END_OF_LIST] if top_k > 0 else []
+
+    while cursors:
+        cursors.sort(key=lambda c: c.doc)
+
+        # pivot 찾기: 앞에서부터 term 상한을 더해서 threshold를 넘는 첫 번째 term
+        acc = 0.0
+        pivot = -1
+        for i, cursor in enumerate(cursors):
+            acc += cursor.max_ub
+            if acc > threshold:
+                pivot = i
+                break
+        if pivot < 0:
+            break
+
+        pivot_doc = cursors[pivot].doc
+        # pivot 문서와 같은 문서에 있는 term들도 pivot에 포함
+        while pivot + 1 < len(cursors) and cursors[pivot + 1].doc == pivot_doc:
+            pivot += 1
+
+        if use_block_max:
+            # 블록 단위 상한으로 한 번 더 확인
+            block_acc = 0.0
+            next_boundary = END_OF_LIST
+            for cursor in cursors[:pivot + 1]:
+                ub, last_doc = cursor.block_max(pivot_doc)
+                block_acc += ub
+                next_boundary = min(next_boundary, last_doc)
+
+            if block_acc <= threshold:
+                # 현재 블록들 안에서는 threshold를 넘을 수 없으므로 블록 경계 다음으로 이동
+                target = next_boundary + 1
+                if pivot + 1 < len(cursors):
+                    target = min(target, cursors[pivot + 1].doc)
+                target = max(target, pivot_doc + 1)
+                # 상한이 가장 큰 term을 이동시킴
+                mover = max(cursors[:pivot + 1], key=lambda c: c.max_ub)
+                mover.next_geq(target)
+                cursors = [c for c in cursors if c.doc != END_OF_LIST]
+                continue
+
+        if cursors[0].doc == pivot_doc:
+            # pivot 문서를 포함한 모든 term의 점수를 쿼리 토큰 순서대로 누적
+            matched = sorted((c for c in cursors[:pivot + 1]), key=lambda c: c.order)
+            score = 0.0
+            for cursor in matched:
+                score += score_fn(cursor)
+            evaluated += len(matched)
+
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, -pivot_doc))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, -pivot_doc))
+            if len(heap) >= top_k:
+                threshold = heap[0][0]
+
+            for cursor in matched:
+                cursor.next()
+        else:
+            # pivot 앞의 term들을 pivot 문서로 이동
+            for cursor in cursors[:pivot]:
+                if cursor.doc < pivot_doc:
+                    cursor.next_geq(pivot_doc)
+
+        cursors = [c for c in cursors if c.doc != END_OF_LIST]
+
+    results = sorted(heap, key=lambda item: (-item[0], -item[1]))
+    docs = np.array([-doc for _, doc in results], dtype=np.int64)
+    scores = np.array([score for score, _ in results], dtype=np.float64)
+    stats = {"total_postings": total, "evaluated_postings": evaluated, "skipped_postings": total - evaluated}
+    return docs, scores, stats
@@ -1,14 +1,116 @@
 import pickle
 import os
-from collections import defaultdict
-from typing import List, Dict, Set
+import numpy as np
+from collections import Counter, defaultdict
+from collections.abc import Mapping
+from typing import List, Dict, Set, Optional, Tuple
 from .tokenizers import BM25Tokenizer
+from .storage import atomic_directory, write_meta, read_meta, save_array, load_array, save_string_table, StringTable
+from .codecs import CODECS, CompressedPostings, gather_ranges
+
+# 디렉토리 저장 포맷 이름과 버전 (meta.json에 함께 저장)
+INDEX_FORMAT_NAME = "bm25-inverted-index"
+INDEX_FORMAT_VERSION = 2
+
+# 디렉토리 포맷에 .npy로 저장되는 배열들
+ARRAY_FILES = (
+    "doc_len_array", "offsets", "postings_doc_ids", "postings_tfs",
+    "position_offsets", "positions",
+    "block_offsets", "block_last_doc", "block_max_tf", "block_min_len",
+)
+
+# codec을 사용해 압축하면 .npy 대신 압축 스트림으로 저장되는 배열들
+POSTING_ARRAYS = ("postings_doc_ids", "postings_tfs", "position_offsets", "positions")
+
+# Block-Max WAND를 위한 posting 블록 크기 (압축 블록 크기와 같음)
+BLOCK_SIZE = 64
+
+
+def compute_block_metadata(offsets: np.ndarray, postings_doc_ids: np.ndarray, postings_tfs: np.ndarray,
+                           doc_len_array: np.ndarray, block_size: int = BLOCK_SIZE):
+    # term별 posting을 block_size 단위로 나누고, 블록마다 skip/상한 계산용 정보를 만듦
+    # - block_offsets[term_id] ~ block_offsets[term_id + 1]: 해당 term의 블록 구간
+    # - block_last_doc: 블록의 마지막 문서 id (skip 용도)
+    # - block_max_tf / block_min_len: 블록 안의 최대 tf, 최소 문서 길이
+    # BM25 term 점수는 tf에 대해 증가, 문서 길이에 대해 감소하므로
+    # (최대 tf, 최소 길이)로 계산한 점수는 k1, b 값과 상관없이 블록 점수의 상한이 됨
+    lengths = np.diff(offsets)
+    num_blocks = (lengths + block_size - 1) // block_size
+    block_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(num_blocks, out=block_offsets[1:])
+
+    total_blocks = int(block_offsets[-1])
+    if total_blocks == 0:
+        empty = np.zeros(0, dtype=np.int32)
+        return block_offsets, empty, empty.copy(), empty.copy()
+
+    block_term = np.repeat(np.arange(len(lengths)), num_blocks)
+    local_block = np.arange(total_blocks) - block_offsets[block_term]
+    starts = offsets[block_term] + local_block * block_size
+    ends = np.minimum(starts + block_size, offsets[block_term + 1])
+
+    block_last_doc = postings_doc_ids[ends - 1].astype(np.int32)
+    block_max_tf = np.maximum.reduceat(postings_tfs, starts).astype(np.int32)
+    block_min_len = np.minimum.reduceat(doc_len_array[postings_doc_ids], starts).astype(np.int32)
+    return block_offsets, block_last_doc, block_max_tf, block_min_len
+
+
+# compiled 된 인덱스를 기존의 index[term][doc_id] -> [positions] 형태로 보여주는 뷰
+# 기존 코드(check_index.py, 테스트)가 그대로 동작하도록 하기 위함
+class PostingsView(Mapping):
+    def __init__(self, inverted_index: "InvertedIndex"):
+        self._ii = inverted_index
+
+    def __getitem__(self, term: str) -> Dict[str, List[int]]:
+        term_id = self._ii.lexicon[term]
+        start = int(self._ii.offsets[term_id])
+        doc_ids = self._ii.doc_ids
+        postings = {}
+        for i, doc in enumerate(self._ii.get_postings(term)[0].tolist(), start):
+            postings[doc_ids[doc]] = self._ii.get_positions(i)
+        return postings
+
+    def __contains__(self, term) -> bool:
+        return term in self._ii.lexicon
+
+    def __iter__(self):
+        return iter(self._ii.lexicon)
+
+    def __len__(self) -> int:
+        return len(self._ii.lexicon)
+
+
+# doc_lengths를 dict로 만들지 않고 doc_len_array 위에서 보여주는 뷰
+# mmap으로 로드할 때 문서 수만큼 dict를 만드는 비용을 없애기 위함
+class DocLengthsView(Mapping):
+    def __init__(self, inverted_index: "InvertedIndex"):
+        self._ii = inverted_index
+        self._doc_idx: Optional[Dict[str, int]] = None
+
+    def _index(self) -> Dict[str, int]:
+        # 문서 id로 조회할 때만 doc_id -> 내부 id 매핑을 만듦
+        if self._doc_idx is None:
+            self._doc_idx = {doc_id: i for i, doc_id in enumerate(self._ii.doc_ids)}
+        return self._doc_idx
+
+    def __getitem__(self, doc_id: str) -> int:
+        return int(self._ii.doc_len_array[self._index()[doc_id]])
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._index()
+
+    def __iter__(self):
+        return iter(self._ii.doc_ids)
+
+    def __len__(self) -> int:
+        return len(self._ii.doc_ids)
+
 
 # InvertedIndex 객체의 책임
 # 1. 데이터를 저장
 # 2. 데이터를 제공
 class InvertedIndex:
-    def __init__(self):
+    def __init__(self, store_positions: bool = True):
         """
         Inverted Index 구조
         dictionary {
@@ -16,61 +118,532 @@ class InvertedIndex:
                 # 문서 번호에 대한 포지션 정보들이 들어있어야 함
                 # 수업에서 배운 것과 동일한 구조
                 doc_id: [pos1, pos2, ...]
+                # store_positions=False(점수 계산 전용)면 포지션 대신 tf만 저장
+                # doc_id: tf
             }
         }
+
+        finalize() 이후에는 아래의 compiled(CSR) 형태로 변환됨
+        - lexicon: term -> term_id
+        - doc_ids: 내부 정수 문서 id -> 문서 id
+        - offsets[term_id] ~ offsets[term_id + 1]: 해당 term의 posting 구간
+        - postings_doc_ids / postings_tfs: posting별 내부 문서 id, term frequency
+        - position_offsets / positions: posting별 포지션 구간 (선택)
+        - block_*: BLOCK_SIZE 단위 블록별 skip/상한 정보 (Block-Max WAND 용)
         """
         self.index: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
         self.doc_lengths: Dict[str, int] = {}
         self.doc_count: int = 0
         self.avg_doc_len: float = 0.0
         self.tokenizer = BM25Tokenizer()
+        # False면 posting마다 tf만 저장 (구문/근접 검색 불가, 인덱스 크기와 로드 시간이 줄어듦)
+        self.store_positions: bool = store_positions
+
+        self.compiled: bool = False
+        self.lexicon: Dict[str, int] = {}
+        self.doc_ids: List[str] = []
+        self.doc_len_array: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.postings_doc_ids: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.postings_tfs: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.position_offsets: Optional[np.ndarray] = None
+        self.positions: Optional[np.ndarray] = None
+        self._reset_block_metadata()
+
+        # 저장/보관할 때 사용할 posting 압축 방식. 압축된 상태에서는 posting 배열 대신 compressed를 사용
+        self.codec: str = "raw"
+        self.compressed: Optional[CompressedPostings] = None
+
+    def _reset_block_metadata(self):
+        self.block_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.block_last_doc: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.block_max_tf: np.ndarray = np.zeros(0, dtype=np.int32)
+        self.block_min_len: np.ndarray = np.zeros(0, dtype=np.int32)
 
     def add_document(self, doc_id: str, text: str):
+        # compiled 상태라면 다시 빌드 가능한 형태로 되돌림
+        if self.compiled:
+            self._decompile()
+
         # 문서를 토큰화한 후, 인덱스에 추가
-        tokens = self.tokenizer.tokenize(text)
+        self._add_tokens(doc_id, self.tokenizer.tokenize(text))
+
+    def add_documents(self, documents: List[Tuple[str, str]]):
+        # 여러 문서를 한 번에 토큰화해서 추가
+        if self.compiled:
+            self._decompile()
+
+        token_lists = self.tokenizer.tokenize_batch([text for _, text in documents])
+        for (doc_id, _), tokens in zip(documents, token_lists):
+            self._add_tokens(doc_id, tokens)
+
+    def _add_tokens(self, doc_id: str, tokens: List[str]):
         length = len(tokens)
-        
+
         self.doc_lengths[doc_id] = length
         self.doc_count += 1
-        
+
+        if not self.store_positions:
+            # 포지션 없이 term별 tf만 추가
+            for term, tf in Counter(tokens).items():
+                self.index[term][doc_id] = tf
+            return
+
         # 포지션과 term을 인덱스에 추가
         for pos, term in enumerate(tokens):
             self.index[term][doc_id].append(pos)
 
-    def finalize(self):
+    def finalize(self, store_positions: Optional[bool] = None):
+        # compiled 상태에서 다시 호출되면 할 일이 없음
+        if self.compiled:
+            return
+        # 포지션 없이 추가한 문서는 포지션을 만들 수 없으므로 store_positions=True를 줘도 tf만 저장
+        if store_positions is None:
+            store_positions = self.store_positions
+        store_positions = store_positions and self.store_positions
+
         # BM25 공식 계산을 위해 문서의 평균 길이를 계산
         if self.doc_count > 0:
             total_len = sum(self.doc_lengths.values())
             self.avg_doc_len = total_len / self.doc_count
 
+        self._compile(store_positions)
+
+    def _compile(self, store_positions: bool):
+        # 중첩 dict를 연속된 NumPy 배열(CSR)로 변환
+        # 문서 id는 추가된 순서대로 정수 id를 부여
+        self.compressed = None
+        self.store_positions = store_positions
+        self.doc_ids = list(self.doc_lengths.keys())
+        doc_idx = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        self.doc_len_array = np.fromiter(self.doc_lengths.values(), dtype=np.int32, count=len(self.doc_ids))
+
+        terms = sorted(self.index.keys())
+        self.lexicon = {term: term_id for term_id, term in enumerate(terms)}
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        posting_docs: List[int] = []
+        posting_tfs: List[int] = []
+        positions: List[int] = []
+
+        for term_id, term in enumerate(terms):
+            postings = self.index[term]
+            ids = [doc_idx[doc_id] for doc_id in postings]
+            # posting은 내부 문서 id 순으로 정렬되어 있어야 함
+            order = sorted(range(len(ids)), key=ids.__getitem__)
+            pos_lists = list(postings.values())
+            for i in order:
+                posting_docs.append(ids[i])
+                # 포지션 리스트 대신 tf(int)가 들어 있을 수 있음 (store_positions=False로 추가한 문서)
+                if isinstance(pos_lists[i], int):
+                    posting_tfs.append(pos_lists[i])
+                    continue
+                posting_tfs.append(len(pos_lists[i]))
+                if store_positions:
+                    positions.extend(pos_lists[i])
+            offsets[term_id + 1] = len(posting_docs)
+
+        self.offsets = offsets
+        self.postings_doc_ids = np.array(posting_docs, dtype=np.int32)
+        self.postings_tfs = np.array(posting_tfs, dtype=np.int32)
+
+        if store_positions:
+            self.position_offsets = np.zeros(len(posting_tfs) + 1, dtype=np.int64)
+            np.cumsum(self.postings_tfs, out=self.position_offsets[1:])
+            self.positions = np.array(positions, dtype=np.int32)
+        else:
+            self.position_offsets = None
+            self.positions = None
+
+        self._build_block_metadata()
+        self.index = PostingsView(self)
+        self.compiled = True
+
+    def _build_block_metadata(self):
+        (self.block_offsets, self.block_last_doc,
+         self.block_max_tf, self.block_min_len) = compute_block_metadata(
+            self.offsets, self.postings_doc_ids, self.postings_tfs, self.doc_len_array
+        )
 
-    def save(self, path: str):
-        # 폴더가 없으면 폴더를 만든 뒤 저장
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+    def _decompile(self):
+        # compiled 형태를 다시 중첩 dict로 되돌림 (finalize 이후 문서를 추가하는 경우)
+        self._materialize()
+        self.store_positions = self.has_positions
+        self.doc_lengths = dict(zip(self.doc_ids, self.doc_len_array.tolist()))
+        index = defaultdict(lambda: defaultdict(list))
+        for term, term_id in self.lexicon.items():
+            for i in range(self.offsets[term_id], self.offsets[term_id + 1]):
+                doc_id = self.doc_ids[self.postings_doc_ids[i]]
+                index[term][doc_id] = self.get_positions(i) if self.store_positions else int(self.postings_tfs[i])
 
-        with open(path, 'wb') as f:
-            data = {
-                "index": dict(self.index),
-                "doc_lengths": self.doc_lengths,
+        self.index = index
+        self.compiled = False
+        self.lexicon = {}
+        self.doc_ids = []
+        self.doc_len_array = np.zeros(0, dtype=np.int32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.postings_doc_ids = np.zeros(0, dtype=np.int32)
+        self.postings_tfs = np.zeros(0, dtype=np.int32)
+        self.position_offsets = None
+        self.positions = None
+        self._reset_block_metadata()
+
+    @property
+    def has_positions(self) -> bool:
+        if self.compressed is not None:
+            return self.compressed.positions is not None
+        return self.positions is not None
+
+    @property
+    def num_postings(self) -> int:
+        return int(self.offsets[-1])
+
+    def compress(self, codec: str):
+        # posting(문서 id, tf, 포지션)을 블록 단위로 압축해서 보관 (codec="raw"면 압축을 풂)
+        # 압축된 상태에서도 검색/구문 검색은 필요한 블록만 풀어서 그대로 동작함
+        if codec not in CODECS:
+            raise ValueError(f"지원하지 않는 codec입니다: {codec}")
+        self.finalize()
+        self._materialize()
+        if codec != "raw":
+            self.compressed = self._encode_postings(codec)
+            self.postings_doc_ids = self.postings_tfs = self.position_offsets = self.positions = None
+        self.codec = codec
+
+    def _encode_postings(self, codec: str) -> CompressedPostings:
+        postings_doc_ids, postings_tfs, _, positions = self._posting_arrays()
+        return CompressedPostings.encode(
+            codec, self.offsets, self.block_offsets, self.block_last_doc,
+            postings_doc_ids, postings_tfs, positions, BLOCK_SIZE
+        )
+
+    def _posting_arrays(self) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        # 압축 여부와 관계없이 (posting 문서 id, tf, 포지션 구간, 포지션) 배열을 반환
+        if self.compressed is None:
+            return self.postings_doc_ids, self.postings_tfs, self.position_offsets, self.positions
+        postings_doc_ids, postings_tfs, positions = self.compressed.decode_all()
+        position_offsets = None
+        if positions is not None:
+            position_offsets = np.zeros(len(postings_tfs) + 1, dtype=np.int64)
+            np.cumsum(postings_tfs, out=position_offsets[1:])
+        return postings_doc_ids, postings_tfs, position_offsets, positions
+
+    def _materialize(self):
+        # 압축을 풀어서 posting 배열로 되돌림 (compact/merge처럼 전체 배열이 필요한 작업 전에 사용)
+        if self.compressed is None:
+            return
+        (self.postings_doc_ids, self.postings_tfs,
+         self.position_offsets, self.positions) = self._posting_arrays()
+        self.compressed = None
+
+    def get_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        # (내부 문서 id 배열, tf 배열)을 반환. 압축하지 않았으면 복사 없이 slice만 넘겨줌
+        term_id = self.lexicon.get(term)
+        if term_id is None:
+            return None
+        if self.compressed is not None:
+            return self.compressed.postings(term_id)
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.postings_doc_ids[start:end], self.postings_tfs[start:end]
+
+    def find_postings(self, term: str, docs: np.ndarray) -> np.ndarray:
+        # 정렬된 내부 문서 id마다 term의 posting 위치를 반환 (없으면 -1)
+        docs = np.asarray(docs, dtype=np.int64)
+        term_id = self.lexicon.get(term)
+        if term_id is None:
+            return np.full(len(docs), -1, dtype=np.int64)
+        if self.compressed is not None:
+            return self.compressed.find_postings(term_id, docs)
+
+        start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+        postings = self.postings_doc_ids[start:end]
+        pos = np.searchsorted(postings, docs)
+        hit = pos < len(postings)
+        hit[hit] = postings[pos[hit]] == docs[hit]
+        return np.where(hit, start + pos, -1)
+
+    def get_blocks(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        # (블록별 마지막 문서 id, 최대 tf, 최소 문서 길이)를 반환
+        term_id = self.lexicon.get(term)
+        if term_id is None:
+            return None
+        start, end = self.block_offsets[term_id], self.block_offsets[term_id + 1]
+        return self.block_last_doc[start:end], self.block_max_tf[start:end], self.block_min_len[start:end]
+
+    def get_positions(self, posting_idx: int) -> List[int]:
+        return self.get_positions_batch(np.array([posting_idx]))[0].tolist()
+
+    def get_positions_batch(self, posting_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # 여러 posting의 포지션을 (이어 붙인 포지션, 각 포지션이 속한 posting 순번)으로 반환
+        if not self.has_positions:
+            raise ValueError("포지션 정보가 없는 인덱스입니다. (store_positions=False로 만든 점수 계산 전용 인덱스)")
+        posting_idx = np.asarray(posting_idx, dtype=np.int64)
+        if self.compressed is not None:
+            return self.compressed.positions_for(posting_idx)
+        idx, group = gather_ranges(self.position_offsets[posting_idx], self.position_offsets[posting_idx + 1])
+        return np.asarray(self.positions[idx], dtype=np.int64), group
+
+    def save(self, path: str, codec: Optional[str] = None):
+        # 버전이 있는 디렉토리 포맷으로 저장 (배열마다 .npy 파일 하나)
+        # load() 시 np.memmap으로 열기 때문에 역직렬화 없이 바로 사용 가능
+        # codec을 주지 않으면 self.codec 사용. raw가 아니면 posting 배열 대신 압축 스트림을 저장
+        self.finalize()
+        codec = self.codec if codec is None else codec
+        if codec not in CODECS:
+            raise ValueError(f"지원하지 않는 codec입니다: {codec}")
+
+        compressed = None
+        arrays = {}
+        if codec == "raw":
+            arrays = dict(zip(POSTING_ARRAYS, self._posting_arrays()))
+        elif self.compressed is not None and self.compressed.codec == codec:
+            compressed = self.compressed
+        else:
+            compressed = self._encode_postings(codec)
+
+        with atomic_directory(path) as tmp_dir:
+            write_meta(tmp_dir, {
+                "format": INDEX_FORMAT_NAME,
+                "version": INDEX_FORMAT_VERSION,
                 "doc_count": self.doc_count,
-                "avg_doc_len": self.avg_doc_len
-            }
-            pickle.dump(data, f)
+                "avg_doc_len": self.avg_doc_len,
+                "num_docs": len(self.doc_ids),
+                "num_terms": len(self.lexicon),
+                "num_postings": self.num_postings,
+                "has_positions": self.has_positions,
+                "block_size": BLOCK_SIZE,
+                "codec": codec
+            })
+            save_string_table(tmp_dir, "lexicon", self.lexicon.keys())
+            save_string_table(tmp_dir, "doc_ids", self.doc_ids)
+            for name in ARRAY_FILES:
+                array = arrays.get(name) if name in POSTING_ARRAYS else getattr(self, name)
+                if array is not None:
+                    save_array(tmp_dir, name, array)
+            if compressed is not None:
+                compressed.save(tmp_dir)
 
     def load(self, path: str) -> bool:
         if not os.path.exists(path):
             return False
-            
+
+        # 예전 pickle 파일(data/index.pkl)도 읽을 수 있도록 유지
+        if os.path.isfile(path):
+            self._load_pickle(path)
+            return True
+
+        meta = read_meta(path)
+        if meta.get("format") != INDEX_FORMAT_NAME or meta.get("version", 0) > INDEX_FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 인덱스 포맷입니다: {meta.get('format')} v{meta.get('version')}")
+
+        codec = meta.get("codec", "raw")
+        self.lexicon = {term: term_id for term_id, term in enumerate(StringTable.load(path, "lexicon").tolist())}
+        self.doc_ids = StringTable.load(path, "doc_ids")
+        for name in ARRAY_FILES:
+            if name in POSTING_ARRAYS and codec != "raw":
+                setattr(self, name, None)
+            elif name in ("position_offsets", "positions") and not meta["has_positions"]:
+                setattr(self, name, None)
+            else:
+                setattr(self, name, load_array(path, name))
+
+        self.codec = codec
+        self.store_positions = meta["has_positions"]
+        self.compressed = None
+        if codec != "raw":
+            self.compressed = CompressedPostings.load(
+                path, codec, self.offsets, self.block_offsets, self.block_last_doc,
+                meta["block_size"], meta["has_positions"]
+            )
+
+        self.doc_lengths = DocLengthsView(self)
+        self.doc_count = meta["doc_count"]
+        self.avg_doc_len = meta["avg_doc_len"]
+        self.index = PostingsView(self)
+        self.compiled = True
+
+        return True
+
+    def _load_pickle(self, path: str):
         with open(path, 'rb') as f:
             data = pickle.load(f)
-            # Reconstruct defaultdict structure
+
+        # 예전 포맷(중첩 dict)은 읽은 뒤 바로 compile
+        if "format_version" not in data:
             raw_index = data["index"]
             self.index = defaultdict(lambda: defaultdict(list))
             for term, postings in raw_index.items():
                 self.index[term] = postings
-                
+
             self.doc_lengths = data["doc_lengths"]
             self.doc_count = data["doc_count"]
             self.avg_doc_len = data["avg_doc_len"]
+            self.compiled = False
+            self._compile(store_positions=True)
+            return
 
-        return True
+        # compiled 배열을 그대로 pickle 한 포맷
+        self._load_compiled_state(data)
+
+    def _compiled_state(self) -> Dict:
+        # compiled 배열을 dict로 묶음 (병렬 빌드에서 워커 -> 메인 프로세스로 넘길 때 사용)
+        self.finalize()
+        self._materialize()
+        return {
+            "format_version": 1,
+            "terms": list(self.lexicon.keys()),
+            "doc_ids": list(self.doc_ids),
+            "doc_len_array": self.doc_len_array,
+            "offsets": self.offsets,
+            "postings_doc_ids": self.postings_doc_ids,
+            "postings_tfs": self.postings_tfs,
+            "position_offsets": self.position_offsets,
+            "positions": self.positions,
+            "doc_count": self.doc_count,
+            "avg_doc_len": self.avg_doc_len,
+        }
+
+    def _load_compiled_state(self, data: Dict, build_blocks: bool = True):
+        self.compressed = None
+        self.lexicon = {term: term_id for term_id, term in enumerate(data["terms"])}
+        self.doc_ids = data["doc_ids"]
+        self.doc_len_array = data["doc_len_array"]
+        self.offsets = data["offsets"]
+        self.postings_doc_ids = data["postings_doc_ids"]
+        self.postings_tfs = data["postings_tfs"]
+        self.position_offsets = data["position_offsets"]
+        self.positions = data["positions"]
+        self.store_positions = self.positions is not None
+        if build_blocks:
+            self._build_block_metadata()
+        self.doc_lengths = dict(zip(self.doc_ids, self.doc_len_array.tolist()))
+        self.doc_count = data["doc_count"]
+        self.avg_doc_len = data["avg_doc_len"]
+        self.index = PostingsView(self)
+        self.compiled = True
+
+    def compact(self, live: np.ndarray) -> "InvertedIndex":
+        # live가 False인 문서(삭제된 문서)를 뺀 새 인덱스를 만듦 (내부 문서 id를 다시 매김)
+        # 남은 문서만 순서대로 add_document 한 결과와 같음
+        self.finalize()
+        self._materialize()
+        live = np.asarray(live, dtype=bool)
+        new_ids = np.cumsum(live) - 1
+
+        num_terms = len(self.offsets) - 1
+        keep = live[self.postings_doc_ids]
+        term_of_posting = np.repeat(np.arange(num_terms), np.diff(self.offsets))
+        counts = np.bincount(term_of_posting[keep], minlength=num_terms)
+        kept_terms = counts > 0
+
+        terms: List[Optional[str]] = [None] * num_terms
+        for term, term_id in self.lexicon.items():
+            terms[term_id] = term
+        offsets = np.zeros(int(kept_terms.sum()) + 1, dtype=np.int64)
+        np.cumsum(counts[kept_terms], out=offsets[1:])
+
+        postings_tfs = self.postings_tfs[keep]
+        position_offsets = positions = None
+        if self.has_positions:
+            positions = self.positions[np.repeat(keep, self.postings_tfs)]
+            position_offsets = np.zeros(len(postings_tfs) + 1, dtype=np.int64)
+            np.cumsum(postings_tfs, out=position_offsets[1:])
+
+        doc_len_array = np.asarray(self.doc_len_array[live], dtype=np.int32)
+        doc_count = int(live.sum())
+        compacted = InvertedIndex()
+        compacted.codec = self.codec
+        compacted._load_compiled_state({
+            "terms": [term for term, kept in zip(terms, kept_terms.tolist()) if kept],
+            "doc_ids": [doc_id for doc_id, kept in zip(self.doc_ids, live.tolist()) if kept],
+            "doc_len_array": doc_len_array,
+            "offsets": offsets,
+            "postings_doc_ids": new_ids[self.postings_doc_ids[keep]].astype(np.int32),
+            "postings_tfs": np.asarray(postings_tfs, dtype=np.int32),
+            "position_offsets": position_offsets,
+            "positions": positions,
+            "doc_count": doc_count,
+            # finalize()와 같은 방식으로 평균 길이 계산
+            "avg_doc_len": sum(doc_len_array.tolist()) / doc_count if doc_count > 0 else 0.0,
+        })
+        return compacted
+
+    @classmethod
+    def merge(cls, parts: List["InvertedIndex"]) -> "InvertedIndex":
+        # 연속된 문서 구간(shard)별로 만든 인덱스를 하나로 합침
+        # parts는 문서 순서대로 주어져야 하고, 그러면 같은 문서들을 순서대로 add_document 한 결과와 동일함
+        # (shard 순서대로 이어 붙이면 term별 posting이 내부 문서 id 순으로 정렬된 상태가 유지됨)
+        for part in parts:
+            part.finalize()
+            part._materialize()
+
+        merged = cls()
+        merged.codec = parts[0].codec if parts else "raw"
+        doc_ids: List[str] = []
+        for part in parts:
+            doc_ids.extend(part.doc_ids)
+        doc_len_array = np.concatenate(
+            [part.doc_len_array for part in parts] + [np.zeros(0, dtype=np.int32)]
+        ).astype(np.int32, copy=False)
+
+        terms = sorted(set().union(*(part.lexicon.keys() for part in parts)))
+        lexicon = {term: term_id for term_id, term in enumerate(terms)}
+        store_positions = bool(parts) and all(part.has_positions for part in parts)
+
+        # shard의 term id -> 전체 term id
+        global_ids = []
+        for part in parts:
+            ids = np.empty(len(part.lexicon), dtype=np.int64)
+            for term, term_id in part.lexicon.items():
+                ids[term_id] = lexicon[term]
+            global_ids.append(ids)
+
+        counts = np.zeros(len(terms), dtype=np.int64)
+        for part, ids in zip(parts, global_ids):
+            counts[ids] += np.diff(part.offsets)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # shard마다 각 posting이 들어갈 위치를 계산해서 한 번에 복사
+        postings_doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        postings_tfs = np.empty(offsets[-1], dtype=np.int32)
+        cursor = offsets[:-1].copy()
+        destinations = []
+        doc_base = 0
+        for part, ids in zip(parts, global_ids):
+            lengths = np.diff(part.offsets)
+            starts = cursor[ids]
+            cursor[ids] += lengths
+            dest = np.repeat(starts - part.offsets[:-1], lengths) + np.arange(len(part.postings_doc_ids))
+            postings_doc_ids[dest] = part.postings_doc_ids + doc_base
+            postings_tfs[dest] = part.postings_tfs
+            destinations.append(dest)
+            doc_base += len(part.doc_ids)
+
+        position_offsets = positions = None
+        if store_positions:
+            position_offsets = np.zeros(len(postings_tfs) + 1, dtype=np.int64)
+            np.cumsum(postings_tfs, out=position_offsets[1:])
+            positions = np.empty(position_offsets[-1], dtype=np.int32)
+            for part, dest in zip(parts, destinations):
+                pos_dest = np.repeat(position_offsets[dest] - part.position_offsets[:-1], part.postings_tfs)
+                positions[pos_dest + np.arange(len(part.positions))] = part.positions
+
+        merged.lexicon = lexicon
+        merged.doc_ids = doc_ids
+        merged.doc_len_array = doc_len_array
+        merged.offsets = offsets
+        merged.postings_doc_ids = postings_doc_ids
+        merged.postings_tfs = postings_tfs
+        merged.position_offsets = position_offsets
+        merged.positions = positions
+        merged.store_positions = store_positions
+        merged.doc_lengths = dict(zip(doc_ids, doc_len_array.tolist()))
+        merged.doc_count = sum(part.doc_count for part in parts)
+        # finalize()와 같은 방식으로 평균 길이 계산
+        if merged.doc_count > 0:
+            merged.avg_doc_len = sum(merged.doc_lengths.values()) / merged.doc_count
+        merged._build_block_metadata()
+        merged.index = PostingsView(merged)
+        merged.compiled = True
+        return merged
@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .inverted_index import InvertedIndex
+
+
+# 여러 프로세스에서 BM25 인덱스를 나눠서 만든 뒤 합치는 병렬 빌드
+# - 문서를 연속된 구간(shard)으로 나누고, 워커마다 토큰화 + 부분 인덱스 compile
+# - 메인 프로세스에서 InvertedIndex.merge로 합침 (직렬 빌드와 완전히 같은 결과)
+
+def _build_shard(args: Tuple[List[Tuple[str, str]], bool]) -> Dict:
+    documents, store_positions = args
+    index = InvertedIndex(store_positions)
+    index.add_documents(documents)
+    index.finalize()
+    return index._compiled_state()
+
+
+def split_shards(documents: List[Tuple[str, str]], num_shards: int) -> List[List[Tuple[str, str]]]:
+    # 문서 순서를 유지한 채 최대한 같은 크기의 연속 구간으로 나눔
+    num_shards = max(1, min(num_shards, len(documents)))
+    size, extra = divmod(len(documents), num_shards)
+    shards = []
+    start = 0
+    for i in range(num_shards):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(documents[start:end])
+        start = end
+    return shards
+
+
+def build_index_parallel(documents: List[Tuple[str, str]], workers: Optional[int] = None,
+                         store_positions: bool = True) -> InvertedIndex:
+    workers = workers or os.cpu_count() or 1
+    shards = split_shards(documents, workers)
+
+    if len(shards) <= 1:
+        index = InvertedIndex(store_positions)
+        index.add_documents(documents)
+        index.finalize()
+        return index
+
+    with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+        states = list(executor.map(_build_shard, [(shard, store_positions) for shard in shards]))
+
+    parts = []
+    for state in states:
+        part = InvertedIndex()
+        # 블록 정보는 합친 뒤에 한 번만 계산
+        part._load_compiled_state(state, build_blocks=False)
+        parts.append(part)
+    return InvertedIndex.merge(parts)
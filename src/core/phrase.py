@@ -0,0 +1,150 @@
+import re
+import numpy as np
+from typing import Dict, List, Tuple
+
+# 따옴표로 묶인 구문: "new york" pizza
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+# 포지션은 불용어를 뺀 토큰 순서 기준이므로 구문도 같은 토크나이저로 나눈 토큰끼리 연속인지 비교함
+# (예: "bank of america" -> [bank, america]가 인덱스에서 붙어 있으면 일치)
+
+
+def parse_phrase_query(query: str) -> Tuple[str, List[str]]:
+    # '"new york" pizza' -> ('new york pizza', ['new york'])
+    # 구문 안의 단어도 BM25 점수 계산에는 그대로 사용됨. 닫히지 않은 따옴표는 무시
+    phrases = [phrase.strip() for phrase in PHRASE_PATTERN.findall(query) if phrase.strip()]
+    return " ".join(query.replace('"', ' ').split()), phrases
+
+
+def intersect_postings(index, terms: List[str]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    # 모든 term을 포함하는 내부 문서 id와, term별로 그 문서에 해당하는 posting 위치를 반환
+    # posting이 가장 짧은 term의 문서에서 시작해서, 나머지 term에서는 후보 문서만 찾아봄
+    # (압축하지 않은 인덱스는 이진 탐색, 압축한 인덱스는 skip 테이블로 필요한 블록만 풂)
+    # 이 단계에서는 포지션을 전혀 읽지 않음
+    empty = np.zeros(0, dtype=np.int64)
+    lengths = []
+    for term in terms:
+        term_id = index.lexicon.get(term)
+        if term_id is None:
+            return empty, [empty for _ in terms]
+        lengths.append(int(index.offsets[term_id + 1] - index.offsets[term_id]))
+
+    order = sorted(range(len(terms)), key=lengths.__getitem__)
+    first = order[0]
+    start = int(index.offsets[index.lexicon[terms[first]]])
+    docs = np.asarray(index.get_postings(terms[first])[0], dtype=np.int64)
+    posting_idx: Dict[int, np.ndarray] = {first: np.arange(start, start + len(docs), dtype=np.int64)}
+
+    for i in order[1:]:
+        if len(docs) == 0:
+            break
+        found = index.find_postings(terms[i], docs)
+        hit = found >= 0
+        docs = docs[hit]
+        for k in posting_idx:
+            posting_idx[k] = posting_idx[k][hit]
+        posting_idx[i] = found[hit]
+
+    if len(docs) == 0:
+        return empty, [empty for _ in terms]
+    return docs, [posting_idx[i] for i in range(len(terms))]
+
+
+def _require_positions(index):
+    if not index.has_positions:
+        raise ValueError("포지션 정보가 없는 인덱스입니다. 구문/근접 검색을 하려면 포지션을 저장해서 인덱스를 만들어야 합니다.")
+
+
+def phrase_matches(index, terms: List[str], stats: Dict = None) -> Tuple[np.ndarray, np.ndarray]:
+    # 구문(terms가 연속으로 나타남)이 있는 (내부 문서 id, 등장 횟수)를 반환
+    _require_positions(index)
+    if stats is None:
+        stats = {}
+
+    if len(terms) == 1:
+        postings = index.get_postings(terms[0])
+        if postings is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        stats["candidate_docs"] = stats.get("candidate_docs", 0) + len(postings[0])
+        return np.asarray(postings[0], dtype=np.int64), np.asarray(postings[1], dtype=np.int64)
+
+    docs, posting_idx = intersect_postings(index, terms)
+    stats["candidate_docs"] = stats.get("candidate_docs", 0) + len(docs)
+    if len(docs) == 0:
+        return docs, np.zeros(0, dtype=np.int64)
+
+    # (후보 문서 순번, 구문 시작 위치)를 정수 하나로 만들어서 term별 집합의 교집합을 구함
+    # 교집합이 줄어들면 이후 term은 남은 문서의 포지션만 읽음
+    n = len(terms)
+    stride = int(np.max(index.doc_len_array[docs])) + n + 1
+    alive = np.arange(len(docs), dtype=np.int64)
+    matches = None
+    # 문서 수가 적은(드문) term부터 확인해서 후보를 빨리 줄임
+    lengths = [int(index.offsets[index.lexicon[term] + 1] - index.offsets[index.lexicon[term]]) for term in terms]
+    for i in sorted(range(n), key=lengths.__getitem__):
+        positions, group = index.get_positions_batch(posting_idx[i][alive])
+        stats["positions_decoded"] = stats.get("positions_decoded", 0) + len(positions)
+
+        keys = alive[group] * stride + (positions - i + n)
+        if matches is None:
+            matches = keys
+        else:
+            matches = matches[np.isin(matches, keys, assume_unique=True)]
+        alive = np.unique(matches // stride)
+        if len(alive) == 0:
+            break
+
+    ranks, counts = np.unique(matches // stride, return_counts=True)
+    return docs[ranks], counts
+
+
+def phrase_doc_mask(index, phrase_tokens: List[List[str]], stats: Dict = None) -> np.ndarray:
+    # 모든 구문이 나타나는 문서만 True인 (내부 문서 id 순서의) bool 배열
+    mask = np.ones(len(index.doc_ids), dtype=bool)
+    for tokens in phrase_tokens:
+        docs, _ = phrase_matches(index, tokens, stats)
+        phrase_mask = np.zeros(len(mask), dtype=bool)
+        phrase_mask[docs] = True
+        mask &= phrase_mask
+    return mask
+
+
+def minimal_span(index, terms: List[str], doc: int) -> int:
+    # 문서 안에서 서로 다른 쿼리 term을 모두 포함하는 가장 짧은 구간의 길이 (term이 빠져 있으면 0)
+    _require_positions(index)
+    position_lists = []
+    for term in dict.fromkeys(terms):
+        posting = int(index.find_postings(term, np.array([doc]))[0])
+        if posting < 0:
+            return 0
+        position_lists.append(index.get_positions(posting))
+
+    # 모든 포지션을 순서대로 보면서 모든 term을 포함하는 가장 짧은 창을 찾음
+    events = sorted((pos, t) for t, positions in enumerate(position_lists) for pos in positions)
+    counts = [0] * len(position_lists)
+    covered = 0
+    best = 0
+    left = 0
+    for pos, t in events:
+        counts[t] += 1
+        if counts[t] == 1:
+            covered += 1
+        while covered == len(position_lists):
+            left_pos, left_t = events[left]
+            span = pos - left_pos + 1
+            if best == 0 or span < best:
+                best = span
+            counts[left_t] -= 1
+            if counts[left_t] == 0:
+                covered -= 1
+            left += 1
+    return best
+
+
+def proximity_bonus(index, terms: List[str], doc: int, weight: float) -> float:
+    # 쿼리 term들이 가까이 모여 있을수록 큰 보너스 (모두 붙어 있으면 weight)
+    distinct = len(dict.fromkeys(terms))
+    if distinct < 2 or weight <= 0:
+        return 0.0
+    span = minimal_span(index, terms, doc)
+    return weight * distinct / span if span > 0 else 0.0
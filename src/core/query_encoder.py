@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+# 종료 신호
+_STOP = object()
+
+
+# SpladeModel 앞에서 동시에 들어온 쿼리들을 모아 한 번의 forward로 인코딩하는 서비스 (dynamic micro-batching)
+# - 첫 요청이 들어온 뒤 최대 max_wait_ms 동안, 최대 max_batch_size개까지 모아서 encode_batch를 호출
+# - 각 호출자는 자기 쿼리의 sparse vector만 돌려받음
+# 동시 요청이 많을수록 요청당 forward 오버헤드가 줄어듦
+class BatchingQueryEncoder:
+    def __init__(self, model, max_batch_size: int = 16, max_wait_ms: float = 2.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "queue.Queue" = queue.Queue()
+        # close() 이후에는 큐에 넣지 않도록 (종료 신호 뒤에 들어온 요청은 처리되지 않음)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._queries = 0
+        self._thread = threading.Thread(target=self._run, name="splade-query-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, text: str) -> Dict[int, float]:
+        # SpladeModel.encode와 같은 형태({단어 id: 가중치})를 반환
+        future: Future = Future()
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((text, future))
+        if closed:
+            # 종료된 뒤(서버 종료 중 등)에 들어온 요청은 배치 없이 호출한 스레드에서 바로 인코딩
+            return self._encode_one(text)
+        return future.result()
+
+    def _encode_one(self, text: str) -> Dict[int, float]:
+        result = self.model.encode_batch([text], batch_size=1)
+        return dict(zip(result["indices"][0], result["values"][0]))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            stop = self._collect(batch)
+            self._encode_batch(batch)
+            if stop:
+                return
+
+    def _collect(self, batch: List[Tuple[str, Future]]) -> bool:
+        # 첫 요청 이후 max_wait 동안 추가 요청을 모음. 종료 신호를 받으면 True
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if item is _STOP:
+                return True
+            batch.append(item)
+        return False
+
+    def _encode_batch(self, batch: List[Tuple[str, Future]]):
+        texts = [text for text, _ in batch]
+        try:
+            result = self.model.encode_batch(texts, batch_size=len(texts))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), indices, values in zip(batch, result["indices"], result["values"]):
+            future.set_result(dict(zip(indices, values)))
+
+        with self._stats_lock:
+            self._batches += 1
+            self._queries += len(batch)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "queries": self._queries,
+                "avg_batch_size": self._queries / self._batches if self._batches else 0.0,
+            }
+
+    def close(self):
+        # 이미 들어온 요청은 처리한 뒤 종료
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
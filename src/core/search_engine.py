@@ -1,17 +1,46 @@
-from .inverted_index import InvertedIndex
-from .splade_index import SpladeIndex
-from typing import List, Tuple
-from collections import defaultdict
-import math
+from .inverted_index import InvertedIndex, BLOCK_SIZE
+from .parallel_indexing import build_index_parallel
+from .dynamic_pruning import PostingCursor, block_max_wand, UB_EPSILON
+from .splade_index import SpladeIndex, BATCH_QUERY_CHUNK
+from .topk import top_k_indices, top_k_items
+from .query_encoder import BatchingQueryEncoder
+from .segments import SegmentedBM25, SegmentedSplade
+from .cache import LRUCache, normalize_query
+from .phrase import parse_phrase_query, phrase_doc_mask, proximity_bonus
+from .bm25 import bm25_idf, bm25_length_norm, bm25_term_scores, accumulate_bm25
+from typing import List, Tuple, Optional, Dict
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+import numpy as np
+import scipy.sparse as sp
 import os
 import pickle
 
+logger = logging.getLogger(__name__)
+
+# search_bm25에서 선택할 수 있는 검색 알고리즘
+BM25_ALGORITHMS = ("exhaustive", "wand", "bmw")
+# 근접도 보너스로 다시 정렬할 BM25 상위 후보 수
+PROXIMITY_RERANK_K = 100
+# search_batch에서 선택할 수 있는 검색 방식
+BATCH_METHODS = ("bm25", "splade", "hybrid")
+# 배치 BM25에서 행렬 곱 점수의 float 반올림 오차를 감안한 상대 여유분 (k번째 근처 후보는 다시 계산)
+BATCH_RESCORE_SLACK = 1e-9
+
 # 서치 엔진은 실제로 application 계층에서 사용됨
 # 서치 엔진의 책임 == 시스템의 책임
 # 일종의 controller 역할을 함
 # inverted index를 사용하여 검색어를 찾음
 class SearchEngine:
-    def __init__(self, index_path: str = "data/index.pkl", splade_index_path: str = "data/splade_index", titles_path: str = "data/titles.pkl", k1: float = 1.5, b: float = 0.9):
+    def __init__(self, index_path: str = "data/index", splade_index_path: str = "data/splade_index", titles_path: str = "data/titles.pkl", k1: float = 1.5, b: float = 0.9, hybrid_workers: int = 4,
+                 splade_max_batch_size: int = 16, splade_max_wait_ms: float = 2.0,
+                 query_cache_size: int = 4096, query_cache_ttl: Optional[float] = 3600.0,
+                 result_cache_size: int = 1024, result_cache_max_results: int = 200_000,
+                 result_cache_ttl: Optional[float] = 600.0, max_segments: int = 8,
+                 background_merge: bool = True):
         self.index_path = index_path
         self.splade_index_path = splade_index_path
         self.titles_path = titles_path
@@ -22,75 +51,339 @@ class SearchEngine:
         self.inverted_index = InvertedIndex()
         self.splade_index = SpladeIndex()
         self.splade_model = None # 무거우니까 lazy loading
+        # 동시에 들어온 SPLADE 쿼리를 모아서 인코딩 (splade_max_batch_size=1 이면 사용하지 않음)
+        self.splade_max_batch_size = splade_max_batch_size
+        self.splade_max_wait_ms = splade_max_wait_ms
+        self.query_encoder: Optional[BatchingQueryEncoder] = None
         self.titles: Dict[str, str] = {}
+        # 정규화한 쿼리 -> BM25 토큰 / SPLADE 쿼리 벡터 캐시 (모든 검색 메서드가 공유)
+        self.query_cache = LRUCache(maxsize=query_cache_size, ttl=query_cache_ttl)
+        # (정규화한 쿼리, RRF 파라미터) -> 전체 결합 랭킹 캐시. 페이지 이동 시 다시 검색하지 않기 위함
+        # 저장된 결과 개수의 합으로 메모리를 제한하고, 인덱스를 다시 만들거나 로드하면 비움
+        self.result_cache = LRUCache(
+            maxsize=result_cache_size, ttl=result_cache_ttl,
+            max_weight=result_cache_max_results, weigher=len
+        )
+        self._length_norm: Optional[np.ndarray] = None
+        # _length_norm을 계산할 때 사용한 (k1, b)
+        self._length_norm_params: Optional[Tuple[float, float]] = None
+
+        # 문서 추가/삭제(add_documents, delete_documents)가 한 번이라도 일어나면 세그먼트 모드로 검색
+        # 기존 인덱스가 첫 번째 세그먼트가 되고, 새 문서는 작은 세그먼트로 추가됨
+        self.max_segments = max_segments
+        self.background_merge = background_merge
+        self.bm25_segments: Optional[SegmentedBM25] = None
+        self.splade_segments: Optional[SegmentedSplade] = None
+        self._segments_lock = threading.Lock()
+        # 인덱스가 바뀔 때마다 증가. 결과 캐시 키에 포함해서 이전 인덱스의 결과를 쓰지 않도록 함
+        # load_bm25 / load_splade_index가 동시에 실행될 수 있으므로 증가는 lock 안에서
+        self._index_generation = 0
+        self._generation_lock = threading.Lock()
+
+        # hybrid_search에서 SPLADE 브랜치를 동시에 돌리기 위한 스레드 풀
+        self.hybrid_workers = hybrid_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._model_lock = threading.Lock()
 
     def load_splade_model(self):
-        if self.splade_model is None:
-            from .splade_model import SpladeModel
-            self.splade_model = SpladeModel()
+        # 여러 스레드에서 동시에 불려도 모델은 한 번만 로드
+        with self._model_lock:
+            if self.splade_model is None:
+                from .splade_model import SpladeModel
+                self.splade_model = SpladeModel()
+                if self.splade_max_batch_size > 1:
+                    self.query_encoder = BatchingQueryEncoder(
+                        self.splade_model,
+                        max_batch_size=self.splade_max_batch_size,
+                        max_wait_ms=self.splade_max_wait_ms
+                    )
+
+    def _encode_query(self, query: str) -> Dict[int, float]:
+        # 같은 쿼리가 다시 들어오면 모델 추론 없이 캐시된 벡터를 사용
+        def encode():
+            # micro-batching 인코더가 있으면 그쪽으로 보내서 다른 요청과 함께 인코딩
+            if self.query_encoder is not None:
+                return self.query_encoder.encode(query)
+            return self.splade_model.encode(query)
+
+        # 캐시된 dict를 호출하는 쪽에서 수정하지 않도록 복사본을 반환
+        return dict(self.query_cache.get_or_compute(("splade", normalize_query(query)), encode))
 
-    def build_index_from_data(self, documents: List[Tuple[str, str]]):
+    def _tokenize_query(self, query: str) -> List[str]:
+        # NLTK 토큰화 + stemming 결과 캐시
+        tokens = self.query_cache.get_or_compute(
+            ("bm25", normalize_query(query)),
+            lambda: tuple(self.inverted_index.tokenizer.tokenize(query))
+        )
+        return list(tokens)
+
+    def build_index_from_data(self, documents: List[Tuple[str, str]], workers: int = 1,
+                              store_positions: bool = True):
         # inverted index를 생성하는 함수
-        for doc_id, text in documents:
-            self.inverted_index.add_document(doc_id, text)
-        
-        # 평균 길이를 구해줌
-        self.inverted_index.finalize()
+        # workers > 1 이면 문서 구간별로 여러 프로세스에서 만든 뒤 합침 (결과는 같음)
+        # store_positions=False면 포지션 없이 tf만 저장 (구문/근접 검색은 사용할 수 없음)
+        self.bm25_segments = None
+        self.splade_segments = None
+        if workers > 1:
+            self.inverted_index = build_index_parallel(documents, workers, store_positions)
+        else:
+            self.inverted_index.add_documents(documents)
+
+            # 평균 길이를 구해줌
+            self.inverted_index.finalize(store_positions)
+        self._prepare_bm25()
+        self._index_changed()
+
+    def _prepare_bm25(self):
+        # 문서별 길이 정규화 값 k1 * (1 - b + b * dl / avgdl)을 미리 계산해둠
+        # 쿼리마다 posting 단위로 다시 계산하지 않기 위함
+        self._length_norm = bm25_length_norm(
+            self.inverted_index.doc_len_array, self.k1, self.b, self.inverted_index.avg_doc_len
+        )
+        self._length_norm_params = (self.k1, self.b)
+
+    def _ensure_length_norm(self):
+        # 문서 수나 k1 / b가 바뀌었으면 다시 계산
+        if (self._length_norm is None or len(self._length_norm) != len(self.inverted_index.doc_len_array)
+                or self._length_norm_params != (self.k1, self.b)):
+            self._prepare_bm25()
+
+    def _bm25_scores(self, query_tokens: List[str]) -> np.ndarray:
+        # 내부 문서 id 순서의 dense 점수 배열을 반환 (매칭되지 않은 문서는 0)
+        self._ensure_length_norm()
+
+        scores = np.zeros(len(self._length_norm), dtype=np.float64)
 
-    def search_bm25(self, query: str, top_k: int = 100) -> List[Tuple[str, float]]:
-        # 전처리
-        query_tokens = self.inverted_index.tokenizer.tokenize(query)
-        
-        if not query_tokens:
-            return []
-            
-        # BM25 점수 계산(공식을 그대로 사용)
-        scores = defaultdict(float)
-        N = self.inverted_index.doc_count
-        avgdl = self.inverted_index.avg_doc_len
-        
         for term in query_tokens:
-            if term not in self.inverted_index.index:
+            postings = self.inverted_index.get_postings(term)
+            if postings is None:
                 continue
-                
-            postings = self.inverted_index.index[term]
-            # IDF 계산
-            # n_q: 해당 term을 포함하고 있는 문서의 개수
-            n_q = len(postings)
-            idf = math.log((N - n_q + 0.5) / (n_q + 0.5) + 1)
-            
-            # 각 문서별 점수 계산 -> BM25수식 이용 (TF & Length Normalization)
-            for doc_id, positions in postings.items():
-                tf = len(positions)
-                doc_len = self.inverted_index.doc_lengths[doc_id]
-                
-                # 분자: TF * (k1 + 1)
-                numerator = tf * (self.k1 + 1)
-                
-                # 분모: TF + k1 * (1 - b + b * (doc_len / avgdl))
-                denominator = tf + self.k1 * (1 - self.b + self.b * (doc_len / avgdl))
-                
-                # 최종 점수를 누적시켜줌
-                scores[doc_id] += idf * (numerator / denominator)
+
+            doc_idx, tfs = postings
+            # BM25 수식을 posting 배열 단위로 한 번에 계산
+            accumulate_bm25(scores, doc_idx, tfs, self._idf(len(doc_idx)), self._length_norm, self.k1)
+
+        return scores
+
+    def _idf(self, n_q: int) -> float:
+        # IDF 계산
+        # n_q: 해당 term을 포함하고 있는 문서의 개수
+        return bm25_idf(self.inverted_index.doc_count, n_q)
+
+    def _bm25_pruned(self, query_tokens: List[str], top_k: int, use_block_max: bool):
+        # WAND / Block-Max WAND로 상위 k개만 찾음 (전체 계산과 같은 결과)
+        self._ensure_length_norm()
+
+        avgdl = self.inverted_index.avg_doc_len
+        length_norm = self._length_norm
+        k1_plus_1 = self.k1 + 1
+        cursors = []
+
+        for order, term in enumerate(query_tokens):
+            postings = self.inverted_index.get_postings(term)
+            if postings is None:
+                continue
+
+            doc_idx, tfs = postings
+            block_last_doc, block_max_tf, block_min_len = self.inverted_index.get_blocks(term)
+            idf = self._idf(len(doc_idx))
+
+            # 블록별 점수 상한: (최대 tf, 최소 문서 길이)로 계산한 BM25 점수
+            max_tf = block_max_tf.astype(np.float64)
+            min_norm = bm25_length_norm(block_min_len, self.k1, self.b, avgdl)
+            block_ub = idf * ((max_tf * k1_plus_1) / (max_tf + min_norm)) * (1 + UB_EPSILON)
+
+            cursors.append(PostingCursor(order, doc_idx, tfs, idf, block_last_doc, block_ub, BLOCK_SIZE))
+
+        def score_fn(cursor: PostingCursor) -> float:
+            # accumulate_bm25와 같은 순서로 계산해야 점수가 정확히 일치함
+            tf = float(cursor.tfs[cursor.pos])
+            return cursor.idf * ((tf * k1_plus_1) / (tf + length_norm[cursor.doc]))
+
+        return block_max_wand(cursors, top_k, score_fn, use_block_max=use_block_max)
+
+    def search_bm25(self, query: str, top_k: int = 100, algorithm: str = "exhaustive", return_stats: bool = False,
+                    proximity_weight: float = 0.0):
+        # algorithm: "exhaustive"(전체 계산), "wand", "bmw"(Block-Max WAND)
+        # return_stats=True 이면 (결과, 통계)를 반환
+        # 따옴표로 묶인 구문이 있으면 그 구문이 그대로 나타나는 문서만 검색
+        # proximity_weight > 0 이면 상위 후보를 쿼리 term이 가까이 모여 있는 정도만큼 가산해서 다시 정렬
+        if algorithm not in BM25_ALGORITHMS:
+            raise ValueError(f"지원하지 않는 알고리즘입니다: {algorithm}")
+
+        # 전처리
+        query_tokens = self._tokenize_query(query)
+        stats = {"total_postings": 0, "evaluated_postings": 0, "skipped_postings": 0}
         
-        # 결과 정렬 및 반환
-        sorted_docs = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-        return sorted_docs[:top_k]
+        if not query_tokens:
+            return ([], stats) if return_stats else []
+
+        # 구문/근접 검색은 포지션을 사용하는 별도 경로로 처리 (algorithm과 관계없이 전체 계산)
+        _, phrases = parse_phrase_query(query)
+        if phrases or proximity_weight > 0:
+            results, stats = self._search_positional(query_tokens, phrases, top_k, proximity_weight)
+            return (results, stats) if return_stats else results
+
+        # 세그먼트 모드에서는 전체 통계로 세그먼트별 점수를 계산 (algorithm과 관계없이 전체 계산)
+        if self.bm25_segments is not None:
+            doc_ids, top_scores, stats = self.bm25_segments.search(query_tokens, top_k, self.k1, self.b)
+            results = list(zip(doc_ids, top_scores.tolist()))
+            return (results, stats) if return_stats else results
+
+        doc_ids = self.inverted_index.doc_ids
+
+        if algorithm == "exhaustive":
+            # BM25 점수 계산(공식을 그대로 사용)
+            scores = self._bm25_scores(query_tokens)
+
+            # 상위 k개만 부분 선택 후 반환 (내부 정수 id -> 문서 id)
+            matched = np.flatnonzero(scores)
+            order = matched[top_k_indices(scores[matched], top_k)]
+            top_scores = scores[order]
+
+            total = 0
+            for term in query_tokens:
+                postings = self.inverted_index.get_postings(term)
+                total += 0 if postings is None else len(postings[0])
+            stats = {"total_postings": total, "evaluated_postings": total, "skipped_postings": 0}
+        else:
+            order, top_scores, stats = self._bm25_pruned(query_tokens, top_k, use_block_max=(algorithm == "bmw"))
+
+        results = [(doc_ids[doc], score) for doc, score in zip(order.tolist(), top_scores.tolist())]
+        return (results, stats) if return_stats else results
+
+    def _search_positional(self, query_tokens: List[str], phrases: List[str], top_k: int, proximity_weight: float):
+        # 구문 조건은 BM25 점수 계산 후 문서 필터로, 근접도는 상위 후보의 재정렬로 적용
+        phrase_tokens = [tokens for tokens in (self._tokenize_query(phrase) for phrase in phrases) if tokens]
+        stats = {"candidate_docs": 0, "positions_decoded": 0}
+
+        def doc_filter(index: InvertedIndex) -> np.ndarray:
+            # 모든 구문이 나타나는 문서만 True
+            return phrase_doc_mask(index, phrase_tokens, stats)
+
+        # 근접도 보너스로 순위가 바뀔 수 있도록 후보를 더 가져옴
+        candidates_k = max(top_k, PROXIMITY_RERANK_K) if proximity_weight > 0 else top_k
+        if self.bm25_segments is not None:
+            doc_ids, scores, _ = self.bm25_segments.search(
+                query_tokens, candidates_k, self.k1, self.b, doc_filter if phrase_tokens else None
+            )
+
+            def locate(doc_id):
+                segment, local_idx = self.bm25_segments.locate(doc_id)
+                return segment.index, local_idx
+        else:
+            all_scores = self._bm25_scores(query_tokens)
+            if phrase_tokens:
+                all_scores[~doc_filter(self.inverted_index)] = 0
+            matched = np.flatnonzero(all_scores)
+            order = matched[top_k_indices(all_scores[matched], candidates_k)]
+            scores = all_scores[order]
+            internal_ids = dict(zip((self.inverted_index.doc_ids[doc] for doc in order.tolist()), order.tolist()))
+            doc_ids = list(internal_ids)
 
-    def search_splade(self, query: str, top_k: int = 100) -> List[Tuple[str, float]]:
+            def locate(doc_id):
+                return self.inverted_index, internal_ids[doc_id]
+
+        if proximity_weight > 0 and len(doc_ids):
+            bonuses = []
+            for doc_id in doc_ids:
+                index, doc = locate(doc_id)
+                bonuses.append(proximity_bonus(index, query_tokens, doc, proximity_weight))
+            scores = scores + np.array(bonuses)
+            # 보너스가 같으면 원래 순서(BM25 점수 -> 문서 순서)를 유지
+            rerank = np.argsort(-scores, kind="stable")[:top_k]
+            doc_ids = [doc_ids[i] for i in rerank.tolist()]
+            scores = scores[rerank]
+
+        return list(zip(doc_ids, scores.tolist())), stats
+
+    def search_splade(self, query: str, top_k: int = 100, mode: str = "exact",
+                      max_query_terms: Optional[int] = None, min_query_weight: float = 0.0) -> List[Tuple[str, float]]:
+        # mode="maxscore"는 exact와 같은 결과를 더 적은 posting으로 계산
+        # max_query_terms / min_query_weight는 쿼리 term을 줄이는 근사 옵션
         self.load_splade_model()
         
-        query_vec = self.splade_model.encode(query)
-        results = self.splade_index.search(query_vec)
+        query_vec = self._encode_query(query)
+        if self.splade_segments is not None:
+            doc_ids, scores = self.splade_segments.search(
+                query_vec, top_k, mode=mode,
+                max_query_terms=max_query_terms, min_query_weight=min_query_weight
+            )
+            return list(zip(doc_ids, scores.tolist()))
+
+        doc_idx, scores = self.splade_index.search_topk(
+            query_vec, top_k, mode=mode,
+            max_query_terms=max_query_terms, min_query_weight=min_query_weight
+        )
+
+        # 최종 k개에 대해서만 문서 ID로 변환
+        doc_ids = self.splade_index.doc_ids
+        return [(doc_ids[idx], score) for idx, score in zip(doc_idx.tolist(), scores.tolist())]
+
+    def hybrid_search(self, query: str, top_k: int = 10, offset: int = 0, rrf_k: int = 60, candidates_k: int = 1000,
+                      return_stats: bool = False):
+        # BM25와 SPLADE를 동시에 실행한 뒤 RRF로 결합
+        # 결합한 전체 랭킹을 캐시해두고 offset / top_k 구간만 잘라서 반환 (다음 페이지는 캐시에서 바로 응답)
+        # return_stats=True 이면 (결과, 브랜치별 시간/에러/캐시 적중 여부)를 반환
+        start_time = time.perf_counter()
+        # BM25 파라미터(k1, b)도 결과를 바꾸므로 키에 포함
+        cache_key = (self._index_generation, normalize_query(query), rrf_k, candidates_k, self.k1, self.b)
+        ranking = self.result_cache.get(cache_key)
+        cached = ranking is not None
+
+        if cached:
+            timings, errors = {}, {}
+        else:
+            ranking, timings, errors = self._fused_ranking(query, rrf_k, candidates_k)
+            # 한쪽 브랜치가 실패한 결과는 캐시하지 않음
+            if not errors:
+                self.result_cache.put(cache_key, ranking)
+
+        results = ranking[offset : offset + top_k]
+
+        if not return_stats:
+            return results
+        timings["total_ms"] = (time.perf_counter() - start_time) * 1000
+        return results, {"timings": timings, "errors": errors, "cached": cached}
+
+    def _fused_ranking(self, query: str, rrf_k: int, candidates_k: int):
+        # SPLADE 쪽은 대부분 PyTorch forward 시간이고 이때 GIL이 풀리므로 두 검색이 거의 겹쳐서 실행됨
+        # 한쪽이 실패하면 나머지 한쪽의 결과만으로 결합 (둘 다 실패하면 예외)
+        timings = {}
+        errors = {}
+
+        def run_branch(name, fn):
+            branch_start = time.perf_counter()
+            try:
+                return fn(query, top_k=candidates_k)
+            finally:
+                timings[f"{name}_ms"] = (time.perf_counter() - branch_start) * 1000
+
+        # SPLADE는 executor에서, BM25는 현재 스레드에서 실행
+        splade_future = self._get_executor().submit(run_branch, "splade", self.search_splade)
+        try:
+            bm25_results = run_branch("bm25", self.search_bm25)
+        except Exception as e:
+            logger.warning("BM25 검색 실패, SPLADE 결과만 사용합니다: %r", e)
+            errors["bm25"] = repr(e)
+            bm25_results = []
 
-        sorted_docs = sorted(results.items(), key=lambda item: item[1], reverse=True)
-        return sorted_docs[:top_k]
+        try:
+            splade_results = splade_future.result()
+        except Exception as e:
+            if "bm25" in errors:
+                raise
+            logger.warning("SPLADE 검색 실패, BM25 결과만 사용합니다: %r", e)
+            errors["splade"] = repr(e)
+            splade_results = []
 
-    def hybrid_search(self, query: str, top_k: int = 10, offset: int = 0, rrf_k: int = 60, candidates_k: int = 1000) -> List[Tuple[str, float]]:
+        return self._rrf_fuse(bm25_results, splade_results, rrf_k), timings, errors
+
+    @staticmethod
+    def _rrf_fuse(bm25_results: List[Tuple[str, float]], splade_results: List[Tuple[str, float]],
+                  rrf_k: int) -> List[Tuple[str, float]]:
         # RRF Score = 1 / (k + rank)
-        bm25_results = self.search_bm25(query, top_k=candidates_k)
-        splade_results = self.search_splade(query, top_k=candidates_k)
-        
         rrf_scores = defaultdict(float)
         
         # BM25 랭크 점수 반영
@@ -100,11 +393,228 @@ class SearchEngine:
         for rank, (doc_id, _) in enumerate(splade_results):
             rrf_scores[doc_id] += 1 / (rrf_k + rank + 1)
             
-        # 리랭킹
-        sorted_docs = sorted(rrf_scores.items(), key=lambda item: item[1], reverse=True)
-        return sorted_docs[offset : offset + top_k]
+        # 리랭킹 (캐시해서 여러 페이지에 재사용하므로 전체를 정렬)
+        return top_k_items(rrf_scores.items(), len(rrf_scores))
+
+    def search_batch(self, queries: List[str], top_k: int = 100, method: str = "hybrid", rrf_k: int = 60,
+                     candidates_k: int = 1000, chunk_size: int = BATCH_QUERY_CHUNK) -> List[List[Tuple[str, float]]]:
+        # 평가 / 대량 재정렬처럼 쿼리가 한꺼번에 주어지는 경우를 위한 배치 검색
+        # 쿼리마다 search_bm25 / search_splade / hybrid_search(offset=0)와 같은 결과 목록을 반환
+        # - SPLADE: 쿼리를 encode_batch로 한 번에 인코딩하고, chunk_size개씩 (문서 x 쿼리) 행렬 곱으로 점수 계산
+        # - BM25: chunk 안의 쿼리들이 같은 term의 점수 기여도를 공유하고, 행렬 곱으로 쿼리별 후보를 고름
+        # 행렬 곱은 더하는 순서가 달라서 k번째 근처 후보는 쿼리별 검색과 같은 순서로 다시 계산함
+        # -> 결과(문서, 점수, 순서)가 쿼리별 검색과 정확히 같음
+        if method not in BATCH_METHODS:
+            raise ValueError(f"지원하지 않는 검색 방식입니다: {method}")
+
+        k = top_k if method != "hybrid" else candidates_k
+        bm25_results = self._bm25_batch(queries, k, chunk_size) if method != "splade" else None
+        splade_results = self._splade_batch(queries, k, chunk_size) if method != "bm25" else None
+
+        if method == "bm25":
+            return bm25_results
+        if method == "splade":
+            return splade_results
+        return [
+            self._rrf_fuse(bm25, splade, rrf_k)[:top_k]
+            for bm25, splade in zip(bm25_results, splade_results)
+        ]
+
+    def _bm25_batch(self, queries: List[str], top_k: int, chunk_size: int) -> List[List[Tuple[str, float]]]:
+        results: List[Optional[List[Tuple[str, float]]]] = [None] * len(queries)
+        batch = []
+        for i, query in enumerate(queries):
+            # 구문 검색이나 세그먼트 모드는 쿼리별 검색으로 처리
+            if self.bm25_segments is not None or parse_phrase_query(query)[1]:
+                results[i] = self.search_bm25(query, top_k=top_k)
+            else:
+                batch.append((i, self._tokenize_query(query)))
+
+        self._ensure_length_norm()
+        doc_ids = self.inverted_index.doc_ids
+        num_docs = len(self._length_norm)
+
+        # 후보 점수를 다시 계산할 때 재사용하는 버퍼
+        scratch = np.zeros(num_docs, dtype=np.float64)
+
+        for start in range(0, len(batch), chunk_size):
+            chunk = batch[start:start + chunk_size]
+            terms = sorted({term for _, tokens in chunk for term in tokens if term in self.inverted_index.lexicon})
+            term_col = {term: col for col, term in enumerate(terms)}
+            postings = {term: self.inverted_index.get_postings(term) for term in terms}
+
+            # term별 BM25 점수 기여도를 (문서 x term) 행렬로 만듦
+            indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+            rows, contributions = [], []
+            for col, term in enumerate(terms):
+                doc_idx, tfs = postings[term]
+                rows.append(doc_idx)
+                contributions.append(bm25_term_scores(doc_idx, tfs, self._idf(len(doc_idx)), self._length_norm, self.k1))
+                indptr[col + 1] = indptr[col] + len(doc_idx)
+            term_matrix = sp.csc_matrix((
+                np.concatenate(contributions) if terms else np.zeros(0),
+                np.concatenate(rows) if terms else np.zeros(0, dtype=np.int32),
+                indptr,
+            ), shape=(num_docs, len(terms)))
+
+            # (term x 쿼리) 행렬: 쿼리에 같은 term이 여러 번 나오면 그만큼 더함
+            query_cols, query_rows, counts = [], [], []
+            for q, (_, tokens) in enumerate(chunk):
+                for term, count in Counter(token for token in tokens if token in term_col).items():
+                    query_rows.append(term_col[term])
+                    query_cols.append(q)
+                    counts.append(count)
+            query_matrix = sp.csc_matrix((counts, (query_rows, query_cols)), shape=(len(terms), len(chunk)),
+                                         dtype=np.float64)
+
+            scores = (term_matrix @ query_matrix).tocsc()
+            for q, (i, tokens) in enumerate(chunk):
+                doc_idx = scores.indices[scores.indptr[q]:scores.indptr[q + 1]]
+                query_scores = scores.data[scores.indptr[q]:scores.indptr[q + 1]]
+                non_zero = query_scores != 0
+                doc_idx, query_scores = doc_idx[non_zero], query_scores[non_zero]
+
+                # k번째 점수 근처까지의 후보만 _bm25_scores와 같은 순서로 다시 계산해서 최종 선택
+                # (BM25 점수 기여도는 항상 양수이므로 상대 오차 안쪽의 후보만 보면 됨)
+                if len(doc_idx) > top_k > 0:
+                    kth = float(np.partition(query_scores, len(query_scores) - top_k)[len(query_scores) - top_k])
+                    doc_idx = doc_idx[query_scores >= kth * (1 - BATCH_RESCORE_SLACK)]
+                candidates = np.sort(doc_idx).astype(np.int64)
+                exact = self._bm25_candidate_scores(tokens, candidates, postings, scratch)
+                selected = top_k_indices(exact, top_k)
+                results[i] = [
+                    (doc_ids[doc], score)
+                    for doc, score in zip(candidates[selected].tolist(), exact[selected].tolist())
+                ]
+        return results
+
+    def _bm25_candidate_scores(self, query_tokens: List[str], candidates: np.ndarray,
+                               postings: Dict[str, Tuple[np.ndarray, np.ndarray]], scratch: np.ndarray) -> np.ndarray:
+        # 정렬된 후보 문서들의 점수를 쿼리 term 순서대로 누적 (_bm25_scores와 같은 연산 순서)
+        for term in query_tokens:
+            if term not in postings:
+                continue
+            doc_idx, tfs = postings[term]
+            pos = np.searchsorted(doc_idx, candidates)
+            hit = pos < len(doc_idx)
+            hit[hit] = doc_idx[pos[hit]] == candidates[hit]
+            accumulate_bm25(scratch, candidates[hit], tfs[pos[hit]], self._idf(len(doc_idx)), self._length_norm, self.k1)
+        scores = scratch[candidates]
+        # 다음 쿼리를 위해 사용한 위치만 0으로 되돌림
+        scratch[candidates] = 0
+        return scores
+
+    def _splade_batch(self, queries: List[str], top_k: int, chunk_size: int) -> List[List[Tuple[str, float]]]:
+        self.load_splade_model()
+        if self.splade_segments is not None:
+            return [self.search_splade(query, top_k=top_k) for query in queries]
+
+        # 캐시에 없는 쿼리만 모아서 한 번에 인코딩
+        keys = [("splade", normalize_query(query)) for query in queries]
+        query_vecs = [self.query_cache.get(key) for key in keys]
+        missing = [i for i, query_vec in enumerate(query_vecs) if query_vec is None]
+        if missing:
+            encoded = self.splade_model.encode_batch([queries[i] for i in missing])
+            for i, indices, values in zip(missing, encoded["indices"], encoded["values"]):
+                query_vecs[i] = dict(zip(indices, values))
+                self.query_cache.put(keys[i], query_vecs[i])
+
+        doc_ids = self.splade_index.doc_ids
+        return [
+            [(doc_ids[idx], score) for idx, score in zip(doc_idx.tolist(), scores.tolist())]
+            for doc_idx, scores in self.splade_index.search_batch(query_vecs, top_k, chunk_size=chunk_size)
+        ]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # hybrid_search의 SPLADE 브랜치를 실행할 스레드 풀 (처음 필요할 때 생성)
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.hybrid_workers, thread_name_prefix="hybrid-splade")
+            return self._executor
+
+    def close(self):
+        # 스레드 풀과 쿼리 인코더 정리
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        if self.query_encoder is not None:
+            self.query_encoder.close()
+            self.query_encoder = None
+
+    def add_documents(self, documents: List[Tuple[str, str]]):
+        # 전체를 다시 빌드하지 않고 새 세그먼트로 추가 (같은 문서 id가 있으면 교체)
+        # SPLADE 인덱스가 있으면 새 문서만 인코딩해서 SPLADE 세그먼트도 함께 추가
+        if not documents:
+            return
+        self._ensure_segments()
+
+        # 기존 인덱스와 같은 방식(포지션 저장 여부)으로 세그먼트를 만듦
+        bm25_segment = InvertedIndex(self.inverted_index.store_positions)
+        bm25_segment.add_documents(documents)
+        bm25_segment.finalize()
+
+        splade_segment = None
+        if self.splade_segments is not None:
+            self.load_splade_model()
+            encoded = self.splade_model.encode_batch([text for _, text in documents])
+            splade_segment = SpladeIndex(vocab_size=self.splade_index.matrix.shape[1])
+            splade_segment.add_batch([doc_id for doc_id, _ in documents], encoded["indices"], encoded["values"])
+            splade_segment.build()
+
+        with self._segments_lock:
+            self.bm25_segments.add(bm25_segment)
+            if splade_segment is not None:
+                self.splade_segments.add(splade_segment)
+            self._index_changed()
+
+    def delete_documents(self, doc_ids: List[str]) -> int:
+        # tombstone으로 삭제 표시만 함 (실제 제거는 세그먼트 merge 시). 삭제된 문서 수를 반환
+        self._ensure_segments()
+        deleted = 0
+        with self._segments_lock:
+            for doc_id in doc_ids:
+                found = self.bm25_segments.delete(doc_id)
+                if self.splade_segments is not None:
+                    found = self.splade_segments.delete(doc_id) or found
+                deleted += int(found)
+            self._index_changed()
+        return deleted
+
+    def compact_segments(self):
+        # 모든 세그먼트를 하나의 인덱스로 합치고 일반 검색 모드로 돌아감
+        with self._segments_lock:
+            if self.bm25_segments is None:
+                return
+            self.inverted_index = self.bm25_segments.compact_all()
+            self._prepare_bm25()
+            if self.splade_segments is not None:
+                self.splade_index = self.splade_segments.compact_all()
+            self.bm25_segments = None
+            self.splade_segments = None
+            self._index_changed()
+
+    def _ensure_segments(self):
+        with self._segments_lock:
+            if self.bm25_segments is not None:
+                return
+            self.bm25_segments = SegmentedBM25(
+                self.inverted_index, max_segments=self.max_segments, background_merge=self.background_merge
+            )
+            if self.splade_index.matrix is not None:
+                self.splade_segments = SegmentedSplade(
+                    self.splade_index, max_segments=self.max_segments, background_merge=self.background_merge
+                )
+
+    def _index_changed(self):
+        # 인덱스 내용이 바뀌면 이전 결합 결과는 버림
+        with self._generation_lock:
+            self._index_generation += 1
+        self.result_cache.clear()
 
     def save(self):
+        # 세그먼트가 있으면 하나로 합친 뒤 저장
+        self.compact_segments()
         self.inverted_index.save(self.index_path)
 
         if self.splade_index.matrix is not None:
@@ -114,12 +624,34 @@ class SearchEngine:
             pickle.dump(self.titles, f)
 
     def load(self) -> bool:
-        bm25_loaded = self.inverted_index.load(self.index_path)
-
-        splade_loaded = self.splade_index.load(self.splade_index_path)
-        
-        if os.path.exists(self.titles_path):
-            with open(self.titles_path, 'rb') as f:
-                self.titles = pickle.load(f)
-        
+        bm25_loaded = self.load_bm25()
+        splade_loaded = self.load_splade_index()
+        self.load_titles()
         return bm25_loaded or splade_loaded
+
+    # 아래 load_* 메서드는 서로 다른 상태만 건드리므로 서버 시작 시 동시에 실행할 수 있음
+    def load_bm25(self) -> bool:
+        # 인덱스가 바뀌므로 이전 결합 결과와 세그먼트는 버림
+        # (로드가 끝난 뒤에 세대를 올려서, 로드 중에 계산된 결과도 캐시에 남지 않도록 함)
+        self.bm25_segments = None
+        try:
+            bm25_loaded = self.inverted_index.load(self.index_path)
+            if bm25_loaded:
+                self._prepare_bm25()
+        finally:
+            self._index_changed()
+        return bm25_loaded
+
+    def load_splade_index(self) -> bool:
+        self.splade_segments = None
+        try:
+            return self.splade_index.load(self.splade_index_path)
+        finally:
+            self._index_changed()
+
+    def load_titles(self) -> bool:
+        if not os.path.exists(self.titles_path):
+            return False
+        with open(self.titles_path, 'rb') as f:
+            self.titles = pickle.load(f)
+        return True
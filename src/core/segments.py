@@ -0,0 +1,277 @@
+import logging
+import threading
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from .inverted_index import InvertedIndex
+from .splade_index import SpladeIndex
+from .topk import top_k_indices
+from .bm25 import bm25_idf, bm25_length_norm, accumulate_bm25
+
+logger = logging.getLogger(__name__)
+
+
+# 변경되지 않는(immutable) 인덱스 하나 + 삭제 표시(tombstone)
+# 문서를 지우면 deleted만 True로 바꾸고, 실제로 빠지는 것은 merge 할 때
+class Segment:
+    def __init__(self, index):
+        self.index = index
+        self.num_docs = len(index.doc_ids)
+        self.deleted = np.zeros(self.num_docs, dtype=bool)
+        self.deleted_count = 0
+        # 검색 시 재사용하는 계산 결과 (예: BM25 길이 정규화 값)
+        self.cache: Dict = {}
+
+    @property
+    def live_count(self) -> int:
+        return self.num_docs - self.deleted_count
+
+    def delete(self, local_idx: int) -> bool:
+        if self.deleted[local_idx]:
+            return False
+        self.deleted[local_idx] = True
+        self.deleted_count += 1
+        return True
+
+
+# LSM 방식의 세그먼트 목록
+# - 새 문서는 작은 세그먼트로 뒤에 추가되고, 삭제는 tombstone으로만 표시
+# - 세그먼트 수가 max_segments를 넘으면 (백그라운드에서) 크기가 가장 작은 인접한 두 세그먼트를 합침
+#   인접한 세그먼트만 합치므로 전체 문서 순서(= 처음부터 다시 빌드했을 때의 문서 순서)가 유지됨
+# - 검색은 snapshot()으로 받은 세그먼트 목록 위에서 수행 (merge와 동시에 실행 가능)
+# 인덱스 클래스는 doc_ids, compact(live), merge(parts)를 제공해야 함 (InvertedIndex, SpladeIndex)
+class SegmentList:
+    def __init__(self, base_index, max_segments: int = 8, background_merge: bool = True):
+        self.max_segments = max_segments
+        self.background_merge = background_merge
+        self.segments: List[Segment] = [Segment(base_index)]
+        self._locations: Dict[str, Tuple[Segment, int]] = {}
+        self._index_locations(self.segments[0])
+
+        self._lock = threading.RLock()
+        self._merge_lock = threading.Lock()
+        self._merge_thread: Optional[threading.Thread] = None
+
+    def _index_locations(self, segment: Segment):
+        # 문서 id -> (세그먼트, 세그먼트 안의 위치). 살아 있는 문서만 등록
+        for local_idx, doc_id in enumerate(segment.index.doc_ids):
+            if not segment.deleted[local_idx]:
+                self._locations[doc_id] = (segment, local_idx)
+
+    def snapshot(self) -> List[Segment]:
+        with self._lock:
+            return list(self.segments)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._locations
+
+    def locate(self, doc_id: str) -> Optional[Tuple[Segment, int]]:
+        # 살아 있는 문서의 (세그먼트, 세그먼트 안의 위치)
+        with self._lock:
+            return self._locations.get(doc_id)
+
+    def add(self, index):
+        # 같은 문서 id가 이미 있으면 이전 문서를 지우고 새로 추가 (update)
+        with self._lock:
+            for doc_id in index.doc_ids:
+                self.delete(doc_id)
+            segment = Segment(index)
+            self.segments.append(segment)
+            self._index_locations(segment)
+            self._on_added(segment)
+        self.maybe_merge()
+
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            location = self._locations.pop(doc_id, None)
+            if location is None:
+                return False
+            segment, local_idx = location
+            segment.delete(local_idx)
+            self._on_deleted(segment, local_idx)
+            return True
+
+    def _on_added(self, segment: Segment):
+        pass
+
+    def _on_deleted(self, segment: Segment, local_idx: int):
+        pass
+
+    def maybe_merge(self):
+        # 세그먼트가 너무 많아지면 merge (background_merge=True면 별도 스레드에서)
+        with self._lock:
+            if len(self.segments) <= self.max_segments:
+                return
+            if not self.background_merge:
+                self._merge_until_within_limit()
+                return
+            if self._merge_thread is not None and self._merge_thread.is_alive():
+                return
+            self._merge_thread = threading.Thread(
+                target=self._merge_until_within_limit, name="segment-merge", daemon=True
+            )
+            self._merge_thread.start()
+
+    def wait_for_merges(self):
+        thread = self._merge_thread
+        if thread is not None:
+            thread.join()
+
+    def _merge_until_within_limit(self):
+        try:
+            while True:
+                with self._lock:
+                    if len(self.segments) <= self.max_segments:
+                        return
+                    # 살아 있는 문서 수의 합이 가장 작은 인접 쌍을 고름
+                    sizes = [segment.live_count for segment in self.segments]
+                    i = min(range(len(sizes) - 1), key=lambda j: sizes[j] + sizes[j + 1])
+                    pair = self.segments[i:i + 2]
+                self.merge_segments(pair)
+        except Exception:
+            logger.exception("세그먼트 merge 실패")
+
+    def merge_segments(self, pair: List[Segment]) -> Segment:
+        # 시간이 오래 걸리는 compact/merge는 lock 밖에서 수행 (merge끼리는 한 번에 하나씩)
+        # 그 사이에 지워진 문서는 교체할 때 새 세그먼트에 다시 표시함
+        with self._merge_lock:
+            return self._merge_segments(pair)
+
+    def _merge_segments(self, pair: List[Segment]) -> Segment:
+        with self._lock:
+            snapshots = [segment.deleted.copy() for segment in pair]
+        index_cls = type(pair[0].index)
+        merged = Segment(index_cls.merge([
+            segment.index.compact(~deleted) for segment, deleted in zip(pair, snapshots)
+        ]))
+
+        with self._lock:
+            offset = 0
+            for segment, deleted in zip(pair, snapshots):
+                new_positions = np.cumsum(~deleted) - 1 + offset
+                for local_idx in np.flatnonzero(segment.deleted & ~deleted).tolist():
+                    merged.delete(int(new_positions[local_idx]))
+                offset += int((~deleted).sum())
+
+            start = self.segments.index(pair[0])
+            self.segments[start:start + len(pair)] = [merged]
+            self._index_locations(merged)
+        return merged
+
+    def compact_all(self):
+        # 모든 세그먼트를 하나로 합쳐서 반환 (저장 전에 사용)
+        self.wait_for_merges()
+        with self._lock:
+            segments = list(self.segments)
+        if len(segments) == 1 and segments[0].deleted_count == 0:
+            return segments[0].index
+        return self.merge_segments(segments).index
+
+
+# BM25 세그먼트: 전체(살아 있는 문서 기준) 통계로 점수를 계산
+# 결과는 살아 있는 문서만으로 처음부터 다시 빌드한 인덱스의 검색 결과와 같음
+class SegmentedBM25(SegmentList):
+    def __init__(self, base_index: InvertedIndex, **kwargs):
+        base_index.finalize()
+        self.doc_count = 0
+        self.total_len = 0
+        super().__init__(base_index, **kwargs)
+        self._on_added(self.segments[0])
+
+    def _on_added(self, segment: Segment):
+        self.doc_count += segment.num_docs
+        self.total_len += int(segment.index.doc_len_array.sum(dtype=np.int64))
+
+    def _on_deleted(self, segment: Segment, local_idx: int):
+        self.doc_count -= 1
+        self.total_len -= int(segment.index.doc_len_array[local_idx])
+
+    def _length_norm(self, segment: Segment, k1: float, b: float, avgdl: float) -> np.ndarray:
+        # k1 * (1 - b + b * dl / avgdl). avgdl은 문서가 추가/삭제될 때만 바뀌므로 세그먼트별로 캐시
+        key = (k1, b, avgdl)
+        cached = segment.cache.get("length_norm")
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        length_norm = bm25_length_norm(segment.index.doc_len_array, k1, b, avgdl)
+        segment.cache["length_norm"] = (key, length_norm)
+        return length_norm
+
+    def search(self, query_tokens: List[str], top_k: int, k1: float, b: float,
+               doc_filter: Optional[Callable[[InvertedIndex], np.ndarray]] = None):
+        # (문서 id 목록, 점수 배열, 통계)를 반환
+        # doc_filter: 세그먼트 인덱스 -> 남길 문서의 bool 배열 (구문 검색 등)
+        with self._lock:
+            segments = list(self.segments)
+            N = self.doc_count
+            avgdl = self.total_len / N if N > 0 else 0.0
+
+        # 전체 document frequency (지워진 문서 제외)
+        idfs = []
+        total_postings = 0
+        for term in query_tokens:
+            n_q = 0
+            for segment in segments:
+                postings = segment.index.get_postings(term)
+                if postings is None:
+                    continue
+                total_postings += len(postings[0])
+                n_q += len(postings[0])
+                if segment.deleted_count:
+                    n_q -= int(np.count_nonzero(segment.deleted[postings[0]]))
+            idfs.append(bm25_idf(N, n_q))
+
+        candidate_docs = []
+        candidate_scores = []
+        for segment in segments:
+            index = segment.index
+            length_norm = self._length_norm(segment, k1, b, avgdl)
+
+            scores = np.zeros(segment.num_docs, dtype=np.float64)
+            for term, idf in zip(query_tokens, idfs):
+                postings = index.get_postings(term)
+                if postings is None:
+                    continue
+                doc_idx, tfs = postings
+                accumulate_bm25(scores, doc_idx, tfs, idf, length_norm, k1)
+
+            if segment.deleted_count:
+                scores[segment.deleted] = 0
+            if doc_filter is not None:
+                scores[~doc_filter(index)] = 0
+            matched = np.flatnonzero(scores)
+            top = np.sort(matched[top_k_indices(scores[matched], top_k)])
+            candidate_docs.extend(index.doc_ids[i] for i in top.tolist())
+            candidate_scores.append(scores[top])
+
+        stats = {"total_postings": total_postings, "evaluated_postings": total_postings, "skipped_postings": 0}
+        return _select_top(candidate_docs, candidate_scores, top_k) + (stats,)
+
+
+# SPLADE 세그먼트: 문서 점수는 다른 문서와 무관하므로 세그먼트별 상위 k개를 모아서 다시 고름
+class SegmentedSplade(SegmentList):
+    def search(self, query_vec: Dict[int, float], top_k: int, **options):
+        segments = self.snapshot()
+        candidate_docs = []
+        candidate_scores = []
+        for segment in segments:
+            # 지워진 문서가 상위에 섞여 있어도 k개가 남도록 삭제된 수만큼 더 가져옴
+            doc_idx, scores = segment.index.search_topk(query_vec, top_k + segment.deleted_count, **options)
+            if segment.deleted_count:
+                live = ~segment.deleted[doc_idx]
+                doc_idx, scores = doc_idx[live], scores[live]
+            doc_idx, scores = doc_idx[:top_k], scores[:top_k]
+
+            order = np.argsort(doc_idx, kind="stable")
+            doc_ids = segment.index.doc_ids
+            candidate_docs.extend(doc_ids[i] for i in doc_idx[order].tolist())
+            candidate_scores.append(scores[order])
+
+        return _select_top(candidate_docs, candidate_scores, top_k)
+
+
+def _select_top(candidate_docs: List[str], candidate_scores: List[np.ndarray], top_k: int):
+    # 세그먼트 순서 -> 세그먼트 안의 위치 순으로 이어 붙인 후보에서 상위 k개
+    # (동점이면 앞쪽 문서가 먼저 오므로 하나의 인덱스에서 검색한 결과와 순서가 같음)
+    scores = np.concatenate(candidate_scores) if candidate_scores else np.zeros(0)
+    selected = top_k_indices(scores, top_k)
+    return [candidate_docs[i] for i in selected.tolist()], scores[selected]
@@ -0,0 +1,454 @@
+import logging
+import os
+import queue
+import secrets
+import socket
+import threading
+import numpy as np
+from multiprocessing import AuthenticationError, Pipe, Process
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Dict, List, Optional, Tuple
+from .inverted_index import InvertedIndex
+from .splade_index import SpladeIndex
+from .search_engine import SearchEngine, BM25_ALGORITHMS, PROXIMITY_RERANK_K
+from .phrase import parse_phrase_query, phrase_doc_mask, proximity_bonus
+from .bm25 import bm25_idf, bm25_length_norm, accumulate_bm25
+from .storage import atomic_directory, write_meta, read_meta
+from .topk import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# 문서를 여러 shard로 나눠서 워커 프로세스마다 shard 하나씩 로드하고,
+# coordinator(ShardedSearchEngine)가 쿼리를 모든 워커에 보낸 뒤 shard별 상위 k개를 합치는 scatter-gather 검색
+# - shard는 문서 순서대로 나눈 연속 구간 (build_shards)
+# - BM25 idf / avgdl은 전체 통계로 계산하므로 결과(점수, 순서)가 shard로 나누지 않은 엔진과 같음
+# - 워커와는 multiprocessing.connection(TCP + authkey)으로 통신하므로 워커를 다른 노드에서 실행해도 됨
+#   메시지를 pickle로 주고받기 때문에 인증 키를 아는 쪽은 워커에서 코드를 실행할 수 있음
+#   -> 고정된 기본 키는 두지 않고, spawn()은 실행할 때마다 새 키를 만듦
+
+SHARDS_FORMAT_NAME = "search-shards"
+SHARDS_FORMAT_VERSION = 1
+SHARD_INDEX_DIR = "index"
+SHARD_SPLADE_DIR = "splade_index"
+# 로컬 워커는 빈 포트를 자동으로 잡음
+LOCAL_ADDRESS = ("127.0.0.1", 0)
+# spawn()에서 만드는 인증 키 길이 (bytes)
+AUTHKEY_BYTES = 32
+# coordinator가 shard마다 열어두는 연결 수 (동시에 진행할 수 있는 scatter-gather 수)
+CONNECTIONS_PER_SHARD = 4
+
+
+def shard_ranges(num_docs: int, num_shards: int) -> List[Tuple[int, int]]:
+    # 문서 순서를 유지한 채 최대한 같은 크기의 연속 구간 [start, end)로 나눔 (split_shards와 같은 방식)
+    num_shards = max(1, min(num_shards, num_docs))
+    size, extra = divmod(num_docs, num_shards)
+    ranges = []
+    start = 0
+    for i in range(num_shards):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def build_shards(inverted_index: InvertedIndex, splade_index: Optional[SpladeIndex], path: str,
+                 num_shards: int) -> List[str]:
+    # 인덱스를 연속 구간별로 잘라서 path/shard_{i}/index, path/shard_{i}/splade_index로 저장
+    # SPLADE 인덱스는 BM25 shard에 들어간 문서와 같은 문서만 남김
+    inverted_index.finalize()
+    doc_ids = inverted_index.doc_ids
+    num_docs = len(doc_ids)
+    has_splade = splade_index is not None and splade_index.matrix is not None
+    splade_positions = {doc_id: i for i, doc_id in enumerate(splade_index.doc_ids)} if has_splade else {}
+
+    names = []
+    with atomic_directory(path) as tmp_dir:
+        for i, (start, end) in enumerate(shard_ranges(num_docs, num_shards)):
+            name = f"shard_{i}"
+            live = np.zeros(num_docs, dtype=bool)
+            live[start:end] = True
+            inverted_index.compact(live).save(os.path.join(tmp_dir, name, SHARD_INDEX_DIR))
+
+            if has_splade:
+                splade_live = np.zeros(len(splade_index.doc_ids), dtype=bool)
+                rows = [splade_positions[doc_id] for doc_id in doc_ids[start:end] if doc_id in splade_positions]
+                splade_live[rows] = True
+                splade_index.compact(splade_live).save(os.path.join(tmp_dir, name, SHARD_SPLADE_DIR))
+            names.append(name)
+
+        write_meta(tmp_dir, {
+            "format": SHARDS_FORMAT_NAME,
+            "version": SHARDS_FORMAT_VERSION,
+            "num_docs": num_docs,
+            "shards": names,
+        })
+    return [os.path.join(path, name) for name in names]
+
+
+def _no_delay(conn: Connection) -> Connection:
+    # 큰 메시지는 헤더와 본문을 따로 쓰므로 Nagle 알고리즘 + delayed ACK로 응답마다 수십 ms가 밀림
+    # 같은 소켓을 가리키는 복사본으로 TCP_NODELAY만 켬
+    with socket.fromfd(conn.fileno(), socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def list_shards(path: str) -> List[str]:
+    # build_shards로 만든 디렉토리의 shard 경로 (문서 순서대로)
+    meta = read_meta(path)
+    if meta.get("format") != SHARDS_FORMAT_NAME or meta.get("version", 0) > SHARDS_FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 shard 포맷입니다: {meta.get('format')} v{meta.get('version')}")
+    return [os.path.join(path, name) for name in meta["shards"]]
+
+
+# shard 하나를 로드해서 coordinator의 요청을 처리
+# 요청은 (op, payload), 응답은 ("ok", 결과) 또는 ("error", 메시지)
+class ShardWorker:
+    def __init__(self, shard_path: str):
+        self.inverted_index = InvertedIndex()
+        if not self.inverted_index.load(os.path.join(shard_path, SHARD_INDEX_DIR)):
+            raise FileNotFoundError(f"shard 인덱스를 찾을 수 없습니다: {shard_path}")
+        self.splade_index = SpladeIndex()
+        self.has_splade = self.splade_index.load(os.path.join(shard_path, SHARD_SPLADE_DIR))
+        self._length_norm_cache: Optional[Tuple[Tuple[float, float, float], np.ndarray]] = None
+
+        self.handlers = {
+            "stats": self.stats,
+            "df": self.document_frequencies,
+            "bm25": self.search_bm25,
+            "proximity": self.proximity_bonuses,
+            "splade": self.search_splade,
+        }
+
+    def serve(self, conn: Connection) -> bool:
+        # 연결이 끊길 때까지 요청을 처리. "shutdown" 요청을 받으면 False를 반환
+        while True:
+            try:
+                op, payload = conn.recv()
+            except EOFError:
+                return True
+            if op == "shutdown":
+                conn.send(("ok", None))
+                return False
+            try:
+                conn.send(("ok", self.handlers[op](payload)))
+            except Exception as e:
+                logger.exception("shard 요청 처리 실패: %s", op)
+                conn.send(("error", repr(e)))
+
+    def stats(self, _) -> Dict:
+        # 전체 N / avgdl 계산용 통계
+        return {
+            "doc_count": self.inverted_index.doc_count,
+            "total_len": int(self.inverted_index.doc_len_array.sum(dtype=np.int64)),
+        }
+
+    def document_frequencies(self, query_tokens: List[str]) -> List[int]:
+        dfs = []
+        for term in query_tokens:
+            postings = self.inverted_index.get_postings(term)
+            dfs.append(0 if postings is None else len(postings[0]))
+        return dfs
+
+    def _length_norm(self, k1: float, b: float, avgdl: float) -> np.ndarray:
+        # k1 * (1 - b + b * dl / avgdl). 전체 avgdl 기준이며 값이 바뀔 때만 다시 계산
+        # 연결마다 스레드에서 동시에 호출되므로 캐시는 지역 변수로 읽고 통째로 바꿈
+        key = (k1, b, avgdl)
+        cache = self._length_norm_cache
+        if cache is None or cache[0] != key:
+            cache = (key, bm25_length_norm(self.inverted_index.doc_len_array, k1, b, avgdl))
+            self._length_norm_cache = cache
+        return cache[1]
+
+    def search_bm25(self, payload: Dict):
+        # 전체 통계로 계산한 idf를 받아서 shard 안의 상위 top_k를 (내부 문서 id 순으로) 반환
+        k1, b = payload["k1"], payload["b"]
+        length_norm = self._length_norm(k1, b, payload["avgdl"])
+        stats = {"total_postings": 0, "candidate_docs": 0, "positions_decoded": 0}
+
+        scores = np.zeros(len(length_norm), dtype=np.float64)
+        for term, idf in zip(payload["tokens"], payload["idfs"]):
+            postings = self.inverted_index.get_postings(term)
+            if postings is None:
+                continue
+            doc_idx, tfs = postings
+            stats["total_postings"] += len(doc_idx)
+            accumulate_bm25(scores, doc_idx, tfs, idf, length_norm, k1)
+
+        # 모든 구문이 나타나는 문서만 남김
+        if payload["phrases"]:
+            scores[~phrase_doc_mask(self.inverted_index, payload["phrases"], stats)] = 0
+
+        matched = np.flatnonzero(scores)
+        top = np.sort(matched[top_k_indices(scores[matched], payload["top_k"])])
+        doc_ids = self.inverted_index.doc_ids
+        return top, [doc_ids[i] for i in top.tolist()], scores[top], stats
+
+    def proximity_bonuses(self, payload: Dict) -> List[float]:
+        return [
+            proximity_bonus(self.inverted_index, payload["tokens"], doc, payload["weight"])
+            for doc in payload["docs"].tolist()
+        ]
+
+    def search_splade(self, payload: Dict):
+        if not self.has_splade:
+            raise ValueError("SPLADE 인덱스가 없는 shard입니다.")
+        doc_idx, scores = self.splade_index.search_topk(payload["query_vec"], payload["top_k"], **payload["options"])
+        order = np.argsort(doc_idx, kind="stable")
+        doc_ids = self.splade_index.doc_ids
+        return [doc_ids[i] for i in doc_idx[order].tolist()], scores[order]
+
+
+def serve_shard(shard_path: str, address, authkey: bytes, ready: Optional[Connection] = None):
+    # 워커 프로세스의 진입점. shard를 로드한 뒤 address에서 coordinator의 연결을 기다림
+    # ready가 있으면 로드가 끝난 뒤 실제 주소(자동으로 잡은 포트 포함)를 보냄
+    # 연결마다 스레드 하나가 요청을 처리하므로 coordinator의 여러 연결에서 온 요청을 동시에 계산함
+    # 어느 연결에서든 "shutdown" 요청을 받으면 반환 (남은 연결 스레드는 daemon이라 프로세스와 함께 종료)
+    if not authkey:
+        raise ValueError("shard 워커에는 인증 키가 필요합니다.")
+    worker = ShardWorker(shard_path)
+    stop = threading.Event()
+
+    def serve_connection(conn: Connection):
+        with _no_delay(conn):
+            if not worker.serve(conn):
+                stop.set()
+
+    def accept_loop(listener: Listener):
+        while not stop.is_set():
+            try:
+                conn = listener.accept()
+            except AuthenticationError:
+                # 키가 다른 연결은 요청을 하나도 받지 않고 끊음
+                logger.warning("인증에 실패한 shard 연결을 끊었습니다.")
+                continue
+            except OSError:
+                logger.exception("shard 연결을 받지 못해 워커를 종료합니다.")
+                stop.set()
+                return
+            threading.Thread(target=serve_connection, args=(conn,), daemon=True).start()
+
+    with Listener(address, authkey=authkey) as listener:
+        if ready is not None:
+            ready.send(listener.address)
+            ready.close()
+        threading.Thread(target=accept_loop, args=(listener,), daemon=True).start()
+        stop.wait()
+
+
+# shard 워커들에 쿼리를 보내고 결과를 합치는 coordinator
+# 쿼리 토큰화 / SPLADE 쿼리 인코딩 / 캐시 / hybrid(RRF) 결합은 SearchEngine의 것을 그대로 사용하고,
+# BM25와 SPLADE 검색만 shard 워커에서 실행
+class ShardedSearchEngine(SearchEngine):
+    def __init__(self, addresses: List, authkey: bytes, processes: Optional[List[Process]] = None,
+                 connections_per_shard: int = CONNECTIONS_PER_SHARD, **kwargs):
+        super().__init__(**kwargs)
+        self.addresses = list(addresses)
+        self._authkey = authkey
+        # spawn()으로 직접 띄운 워커 프로세스 (close 할 때 함께 종료)
+        self.processes = processes or []
+        # 연결 묶음(shard마다 연결 하나씩)의 풀. scatter-gather 한 번은 묶음 하나를 빌려서 쓰므로
+        # 연결마다 요청 -> 응답 순서가 지켜지고, 다른 요청(hybrid의 BM25/SPLADE 분기, /search 스레드)은 다른 묶음으로 동시에 진행됨
+        # 통신 중 에러가 난 묶음은 None으로 돌려놓고 다음에 빌릴 때 다시 연결함
+        self._pool_size = max(1, connections_per_shard)
+        self._pool: "queue.Queue[Optional[List[Connection]]]" = queue.Queue()
+        try:
+            for _ in range(self._pool_size):
+                self._pool.put(self._connect())
+        except BaseException:
+            while not self._pool.empty():
+                for conn in self._pool.get():
+                    conn.close()
+            raise
+
+        shard_stats = self._broadcast("stats")
+        self.doc_count = sum(stats["doc_count"] for stats in shard_stats)
+        self.total_len = sum(stats["total_len"] for stats in shard_stats)
+        # InvertedIndex.finalize()와 같은 방식으로 평균 길이 계산
+        self.avg_doc_len = self.total_len / self.doc_count if self.doc_count > 0 else 0.0
+
+    @classmethod
+    def spawn(cls, shards_path: str, **kwargs) -> "ShardedSearchEngine":
+        # shard마다 로컬 워커 프로세스를 띄움 (shard 로드는 워커들이 동시에 수행)
+        # 인증 키는 매번 새로 만들어서 직접 띄운 워커에만 전달
+        authkey = secrets.token_bytes(AUTHKEY_BYTES)
+        shard_paths = list_shards(shards_path)
+        processes, ready_pipes = [], []
+        for shard_path in shard_paths:
+            receiver, sender = Pipe(duplex=False)
+            process = Process(target=serve_shard, args=(shard_path, LOCAL_ADDRESS, authkey, sender), daemon=True)
+            process.start()
+            sender.close()
+            processes.append(process)
+            ready_pipes.append(receiver)
+
+        addresses = []
+        try:
+            for shard_path, receiver in zip(shard_paths, ready_pipes):
+                try:
+                    addresses.append(receiver.recv())
+                except EOFError:
+                    raise RuntimeError(f"shard 워커를 시작하지 못했습니다: {shard_path}")
+            return cls(addresses, authkey=authkey, processes=processes, **kwargs)
+        except BaseException:
+            for process in processes:
+                process.terminate()
+            raise
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.addresses)
+
+    def _connect(self) -> List[Connection]:
+        connections = []
+        try:
+            for address in self.addresses:
+                connections.append(_no_delay(Client(address, authkey=self._authkey)))
+        except BaseException:
+            for conn in connections:
+                conn.close()
+            raise
+        return connections
+
+    def _scatter(self, requests: List[Tuple[str, object]]) -> List:
+        # 모든 shard에 요청을 먼저 보낸 뒤 응답을 모음 (워커들은 동시에 계산함)
+        connections = self._pool.get()
+        try:
+            if connections is None:
+                connections = self._connect()
+            for conn, request in zip(connections, requests):
+                conn.send(request)
+            responses = [conn.recv() for conn in connections]
+        except BaseException:
+            # 일부 연결에 읽지 않은 응답이 남아 있을 수 있으므로 묶음을 통째로 버림
+            # (그대로 쓰면 다음 요청이 이전 요청의 응답을 받게 됨)
+            for conn in connections or []:
+                conn.close()
+            connections = None
+            raise
+        finally:
+            self._pool.put(connections)
+
+        for i, (status, result) in enumerate(responses):
+            if status != "ok":
+                raise RuntimeError(f"shard {i} 요청 실패: {result}")
+        return [result for _, result in responses]
+
+    def _broadcast(self, op: str, payload=None) -> List:
+        return self._scatter([(op, payload)] * self.num_shards)
+
+    def search_bm25(self, query: str, top_k: int = 100, algorithm: str = "exhaustive", return_stats: bool = False,
+                    proximity_weight: float = 0.0):
+        # shard마다 전체 계산 후 상위 k개를 모음 (algorithm과 관계없이 같은 결과)
+        if algorithm not in BM25_ALGORITHMS:
+            raise ValueError(f"지원하지 않는 알고리즘입니다: {algorithm}")
+
+        query_tokens = self._tokenize_query(query)
+        stats = {"total_postings": 0, "evaluated_postings": 0, "skipped_postings": 0}
+        if not query_tokens:
+            return ([], stats) if return_stats else []
+
+        _, phrases = parse_phrase_query(query)
+        phrase_tokens = [tokens for tokens in (self._tokenize_query(phrase) for phrase in phrases) if tokens]
+
+        # 1) shard별 document frequency를 더해서 전체 idf 계산
+        dfs = np.sum(self._broadcast("df", query_tokens), axis=0).tolist()
+        N = self.doc_count
+        idfs = [bm25_idf(N, n_q) for n_q in dfs]
+
+        # 2) 전체 idf / avgdl로 shard별 상위 후보 계산
+        candidates_k = max(top_k, PROXIMITY_RERANK_K) if proximity_weight > 0 else top_k
+        responses = self._broadcast("bm25", {
+            "tokens": query_tokens, "idfs": idfs, "avgdl": self.avg_doc_len, "k1": self.k1, "b": self.b,
+            "top_k": candidates_k, "phrases": phrase_tokens,
+        })
+
+        # shard 순서 -> shard 안의 문서 순서 = 전체 문서 순서이므로 동점 처리도 shard 없이 검색한 결과와 같음
+        doc_ids = [doc_id for _, shard_doc_ids, _, _ in responses for doc_id in shard_doc_ids]
+        local = np.concatenate([top for top, _, _, _ in responses])
+        shard_of = np.repeat(np.arange(self.num_shards), [len(top) for top, _, _, _ in responses])
+        scores = np.concatenate([shard_scores for _, _, shard_scores, _ in responses])
+        selected = top_k_indices(scores, candidates_k)
+        doc_ids = [doc_ids[i] for i in selected.tolist()]
+        scores = scores[selected]
+
+        # 3) 근접도 보너스는 전체 상위 후보에 대해서만 해당 shard에서 계산
+        if proximity_weight > 0 and len(doc_ids):
+            shard_of, local = shard_of[selected], local[selected]
+            bonus_lists = self._scatter([
+                ("proximity", {"tokens": query_tokens, "docs": local[shard_of == i], "weight": proximity_weight})
+                for i in range(self.num_shards)
+            ])
+            bonuses = np.zeros(len(doc_ids), dtype=np.float64)
+            for i, shard_bonuses in enumerate(bonus_lists):
+                bonuses[shard_of == i] = shard_bonuses
+            scores = scores + bonuses
+            # 보너스가 같으면 원래 순서(BM25 점수 -> 문서 순서)를 유지
+            rerank = np.argsort(-scores, kind="stable")[:top_k]
+            doc_ids = [doc_ids[i] for i in rerank.tolist()]
+            scores = scores[rerank]
+
+        results = list(zip(doc_ids, scores.tolist()))
+        if not return_stats:
+            return results
+        for _, _, _, shard_stats in responses:
+            stats["total_postings"] += shard_stats["total_postings"]
+        stats["evaluated_postings"] = stats["total_postings"]
+        if phrase_tokens or proximity_weight > 0:
+            stats = {
+                "candidate_docs": sum(shard_stats["candidate_docs"] for *_, shard_stats in responses),
+                "positions_decoded": sum(shard_stats["positions_decoded"] for *_, shard_stats in responses),
+            }
+        return results, stats
+
+    def search_splade(self, query: str, top_k: int = 100, mode: str = "exact",
+                      max_query_terms: Optional[int] = None, min_query_weight: float = 0.0) -> List[Tuple[str, float]]:
+        # 쿼리 인코딩은 coordinator에서 한 번만 하고, 쿼리 벡터를 shard로 보냄
+        self.load_splade_model()
+        query_vec = self._encode_query(query)
+        responses = self._broadcast("splade", {
+            "query_vec": query_vec, "top_k": top_k,
+            "options": {"mode": mode, "max_query_terms": max_query_terms, "min_query_weight": min_query_weight},
+        })
+
+        doc_ids = [doc_id for shard_doc_ids, _ in responses for doc_id in shard_doc_ids]
+        scores = np.concatenate([shard_scores for _, shard_scores in responses])
+        selected = top_k_indices(scores, top_k)
+        return [(doc_ids[i], score) for i, score in zip(selected.tolist(), scores[selected].tolist())]
+
+    # search_batch는 shard로 쿼리를 하나씩 보냄 (행렬 곱 배치 검색은 로컬 인덱스가 있는 SearchEngine에서만 사용)
+    def _bm25_batch(self, queries: List[str], top_k: int, chunk_size: int) -> List[List[Tuple[str, float]]]:
+        return [self.search_bm25(query, top_k=top_k) for query in queries]
+
+    def _splade_batch(self, queries: List[str], top_k: int, chunk_size: int) -> List[List[Tuple[str, float]]]:
+        return [self.search_splade(query, top_k=top_k) for query in queries]
+
+    def _read_only(self, *args, **kwargs):
+        raise RuntimeError("shard 모드에서는 인덱스를 바꿀 수 없습니다. 인덱스를 다시 만든 뒤 build_shards로 나눠주세요.")
+
+    build_index_from_data = add_documents = delete_documents = save = load = _read_only
+
+    def close(self):
+        super().close()
+        # 직접 띄운 워커는 종료시키고, 외부 워커(다른 노드)는 연결만 끊음
+        # 빌려간 연결 묶음이 모두 돌아올 때까지 기다린 뒤 닫고, 풀에는 빈 자리(None)만 남김
+        bundles = [self._pool.get() for _ in range(self._pool_size)]
+        live = [connections for connections in bundles if connections is not None]
+        if self.processes and live:
+            # 워커는 어느 연결에서든 shutdown을 받으면 종료하므로 묶음 하나로만 보냄
+            for conn in live[0]:
+                try:
+                    conn.send(("shutdown", None))
+                    conn.recv()
+                except (EOFError, OSError):
+                    pass
+        for connections in live:
+            for conn in connections:
+                conn.close()
+        for _ in bundles:
+            self._pool.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
@@ -0,0 +1,278 @@
+import heapq
+import os
+import shutil
+import numpy as np
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from .inverted_index import (
+    INDEX_FORMAT_NAME, INDEX_FORMAT_VERSION, BLOCK_SIZE, compute_block_metadata
+)
+from .storage import (
+    atomic_directory, write_meta, save_array, load_array, save_string_table,
+    StringTable, StringTableWriter
+)
+from .tokenizers import BM25Tokenizer
+
+# 메모리 사용량 추정치 (바이트)
+# posting은 array('i') 두 개(문서 id, tf), 포지션은 array('i') 하나에 저장되므로 정확히 4바이트씩
+# term마다 dict 항목 + 문자열 + array 객체 3개의 오버헤드가 추가로 듦
+POSTING_BYTES = 8
+POSITION_BYTES = 4
+TERM_OVERHEAD_BYTES = 320
+
+# 최종 배열을 만들 때 한 번에 처리할 posting 수 (블록 정보 / position offset 계산)
+MERGE_CHUNK_POSTINGS = 1 << 20
+
+
+# SPIMI(Single-Pass In-Memory Indexing) 방식의 스트리밍 BM25 인덱서
+# 1. 문서를 하나씩 읽어서 메모리 블록(term -> posting 배열)에 추가
+# 2. 추정 메모리가 memory_budget_mb를 넘으면 term 순으로 정렬해서 run 디렉토리로 flush
+# 3. 마지막에 run들을 k-way merge 해서 InvertedIndex.save()와 같은 디렉토리 포맷으로 바로 씀
+#    (출력 배열은 np.lib.format.open_memmap으로 만들어서 전체를 메모리에 올리지 않음)
+# 문서 id는 읽은 순서대로 부여되므로 run을 순서대로 이어 붙이면 posting이 정렬된 상태가 유지됨
+# 문서 수에 비례해서 메모리에 남는 것은 문서 길이(4바이트)와 문서 id offset(8바이트)뿐
+class SpimiIndexer:
+    def __init__(self, path: str, memory_budget_mb: float = 512, store_positions: bool = True,
+                 tokenizer: Optional[BM25Tokenizer] = None):
+        self.path = path
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.store_positions = store_positions
+        self.tokenizer = tokenizer or BM25Tokenizer()
+
+        self.doc_count = 0
+        self.doc_lengths = array('i')
+        self.num_runs = 0
+
+        self._block: Dict[str, Tuple[array, array, array]] = {}
+        self._block_bytes = 0
+
+    def build(self, documents: Iterable[Tuple[str, str]]) -> Dict:
+        # documents: (doc_id, text)를 순서대로 내주는 iterable (generator 가능)
+        # 저장한 인덱스의 meta 정보를 반환
+        with atomic_directory(self.path) as tmp_dir:
+            run_dir = os.path.join(tmp_dir, "runs")
+            os.makedirs(run_dir)
+            doc_ids = StringTableWriter(tmp_dir, "doc_ids")
+
+            for doc_id, text in documents:
+                doc_ids.append(doc_id)
+                self._add_document(text)
+                if self._block_bytes >= self.memory_budget:
+                    self._flush(run_dir)
+            self._flush(run_dir)
+            doc_ids.close()
+
+            meta = self._merge_runs(run_dir, tmp_dir)
+            shutil.rmtree(run_dir)
+        return meta
+
+    def _add_document(self, text: str):
+        tokens = self.tokenizer.tokenize(text)
+        doc = self.doc_count
+        self.doc_lengths.append(len(tokens))
+        self.doc_count += 1
+
+        term_positions: Dict[str, List[int]] = {}
+        for pos, term in enumerate(tokens):
+            positions = term_positions.get(term)
+            if positions is None:
+                term_positions[term] = [pos]
+            else:
+                positions.append(pos)
+
+        block = self._block
+        added = 0
+        for term, positions in term_positions.items():
+            postings = block.get(term)
+            if postings is None:
+                postings = block[term] = (array('i'), array('i'), array('i'))
+                added += TERM_OVERHEAD_BYTES
+            docs, tfs, term_pos = postings
+            docs.append(doc)
+            tfs.append(len(positions))
+            added += POSTING_BYTES
+            if self.store_positions:
+                term_pos.extend(positions)
+                added += POSITION_BYTES * len(positions)
+        self._block_bytes += added
+
+    def _flush(self, run_dir: str):
+        # 메모리 블록을 term 순으로 정렬해서 run 하나로 저장
+        if not self._block:
+            return
+
+        terms = sorted(self._block)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(self._block[term][0]) for term in terms], out=offsets[1:])
+
+        docs = array('i')
+        tfs = array('i')
+        positions = array('i')
+        for term in terms:
+            term_docs, term_tfs, term_pos = self._block[term]
+            docs.extend(term_docs)
+            tfs.extend(term_tfs)
+            positions.extend(term_pos)
+
+        path = os.path.join(run_dir, f"run_{self.num_runs:05d}")
+        os.makedirs(path)
+        save_string_table(path, "lexicon", terms)
+        save_array(path, "offsets", offsets)
+        save_array(path, "postings_doc_ids", np.frombuffer(docs, dtype=np.int32))
+        save_array(path, "postings_tfs", np.frombuffer(tfs, dtype=np.int32))
+        save_array(path, "positions", np.frombuffer(positions, dtype=np.int32))
+
+        self.num_runs += 1
+        self._block = {}
+        self._block_bytes = 0
+
+    def _merge_runs(self, run_dir: str, out_dir: str) -> Dict:
+        runs = []
+        for i in range(self.num_runs):
+            path = os.path.join(run_dir, f"run_{i:05d}")
+            # memmap 서브클래스의 인덱싱 오버헤드를 피하기 위해 ndarray view로 사용 (여전히 파일 기반)
+            runs.append({
+                "lexicon": StringTable.load(path, "lexicon"),
+                "offsets": load_array(path, "offsets").view(np.ndarray),
+                "docs": load_array(path, "postings_doc_ids").view(np.ndarray),
+                "tfs": load_array(path, "postings_tfs").view(np.ndarray),
+                "positions": load_array(path, "positions").view(np.ndarray),
+            })
+        # run 안의 term은 순서대로 소비되므로 run별 포지션 위치는 앞에서부터 차례로 읽으면 됨
+        run_pos_cursors = [0] * len(runs)
+
+        total_postings = sum(len(run["docs"]) for run in runs)
+        total_positions = sum(len(run["positions"]) for run in runs)
+        postings_doc_ids = _create_array(out_dir, "postings_doc_ids", np.int32, total_postings)
+        postings_tfs = _create_array(out_dir, "postings_tfs", np.int32, total_postings)
+        positions = None
+        if self.store_positions:
+            positions = _create_array(out_dir, "positions", np.int32, total_positions)
+
+        # term 순 k-way merge. 같은 term은 run 순서(= 문서 순서)대로 이어 붙임
+        lexicon = StringTableWriter(out_dir, "lexicon")
+        offsets = array('q', [0])
+        cursor = 0
+        pos_cursor = 0
+        streams = [_term_stream(run["lexicon"], r) for r, run in enumerate(runs)]
+        current = None
+        for term, r, term_id in heapq.merge(*streams):
+            if term != current:
+                if current is not None:
+                    offsets.append(cursor)
+                lexicon.append(term)
+                current = term
+
+            run = runs[r]
+            start, end = run["offsets"][term_id], run["offsets"][term_id + 1]
+            n = end - start
+            postings_doc_ids[cursor:cursor + n] = run["docs"][start:end]
+            postings_tfs[cursor:cursor + n] = run["tfs"][start:end]
+            cursor += n
+            if positions is not None:
+                pos_start = run_pos_cursors[r]
+                pos_len = int(run["tfs"][start:end].sum())
+                positions[pos_cursor:pos_cursor + pos_len] = run["positions"][pos_start:pos_start + pos_len]
+                run_pos_cursors[r] += pos_len
+                pos_cursor += pos_len
+        if current is not None:
+            offsets.append(cursor)
+        lexicon.close()
+        runs.clear()
+
+        offsets = np.frombuffer(offsets, dtype=np.int64)
+        doc_len_array = np.frombuffer(self.doc_lengths, dtype=np.int32)
+        save_array(out_dir, "offsets", offsets)
+        save_array(out_dir, "doc_len_array", doc_len_array)
+
+        if positions is not None:
+            position_offsets = _create_array(out_dir, "position_offsets", np.int64, total_postings + 1)
+            position_offsets[0] = 0
+            carry = 0
+            for start in range(0, total_postings, MERGE_CHUNK_POSTINGS):
+                chunk = np.cumsum(postings_tfs[start:start + MERGE_CHUNK_POSTINGS], dtype=np.int64)
+                position_offsets[start + 1:start + 1 + len(chunk)] = chunk + carry
+                carry += int(chunk[-1])
+            _flush_array(position_offsets)
+            _flush_array(positions)
+
+        self._write_block_metadata(out_dir, offsets, postings_doc_ids, postings_tfs, doc_len_array)
+        _flush_array(postings_doc_ids)
+        _flush_array(postings_tfs)
+
+        # InvertedIndex.finalize()와 같은 방식으로 평균 길이 계산
+        total_len = int(doc_len_array.sum(dtype=np.int64))
+        meta = {
+            "format": INDEX_FORMAT_NAME,
+            "version": INDEX_FORMAT_VERSION,
+            "doc_count": self.doc_count,
+            "avg_doc_len": total_len / self.doc_count if self.doc_count > 0 else 0.0,
+            "num_docs": self.doc_count,
+            "num_terms": len(offsets) - 1,
+            "num_postings": total_postings,
+            "has_positions": self.store_positions,
+            "block_size": BLOCK_SIZE,
+            "codec": "raw"
+        }
+        write_meta(out_dir, meta)
+        return meta
+
+    def _write_block_metadata(self, out_dir: str, offsets: np.ndarray, postings_doc_ids: np.ndarray,
+                              postings_tfs: np.ndarray, doc_len_array: np.ndarray):
+        # compute_block_metadata를 term 구간 단위로 나눠서 호출 (posting 전체 크기의 임시 배열을 만들지 않음)
+        lengths = np.diff(offsets)
+        num_blocks = (lengths + BLOCK_SIZE - 1) // BLOCK_SIZE
+        block_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(num_blocks, out=block_offsets[1:])
+        total_blocks = int(block_offsets[-1])
+        save_array(out_dir, "block_offsets", block_offsets)
+
+        block_last_doc = _create_array(out_dir, "block_last_doc", np.int32, total_blocks)
+        block_max_tf = _create_array(out_dir, "block_max_tf", np.int32, total_blocks)
+        block_min_len = _create_array(out_dir, "block_min_len", np.int32, total_blocks)
+
+        term_start = 0
+        num_terms = len(lengths)
+        while term_start < num_terms:
+            # MERGE_CHUNK_POSTINGS를 넘지 않는 범위에서 term을 묶음 (최소 한 개)
+            limit = offsets[term_start] + MERGE_CHUNK_POSTINGS
+            term_end = max(int(np.searchsorted(offsets, limit, side="right")) - 1, term_start + 1)
+            term_end = min(term_end, num_terms)
+
+            start, end = offsets[term_start], offsets[term_end]
+            _, last_doc, max_tf, min_len = compute_block_metadata(
+                offsets[term_start:term_end + 1] - start,
+                postings_doc_ids[start:end], postings_tfs[start:end], doc_len_array
+            )
+            block_start, block_end = block_offsets[term_start], block_offsets[term_end]
+            block_last_doc[block_start:block_end] = last_doc
+            block_max_tf[block_start:block_end] = max_tf
+            block_min_len[block_start:block_end] = min_len
+            term_start = term_end
+
+        for array_ in (block_last_doc, block_max_tf, block_min_len):
+            _flush_array(array_)
+
+
+def _term_stream(lexicon: StringTable, run_idx: int):
+    for term_id, term in enumerate(lexicon):
+        yield term, run_idx, term_id
+
+
+def _create_array(directory: str, name: str, dtype, size: int) -> np.ndarray:
+    # 디스크에 .npy 파일을 만들고 memmap으로 열어서 조금씩 채움
+    path = os.path.join(directory, f"{name}.npy")
+    if size == 0:
+        save_array(directory, name, np.zeros(0, dtype=dtype))
+        return np.zeros(0, dtype=dtype)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(size,))
+
+
+def _flush_array(array_: np.ndarray):
+    if isinstance(array_, np.memmap):
+        array_.flush()
+
+
+def build_index_spimi(documents: Iterable[Tuple[str, str]], path: str, memory_budget_mb: float = 512,
+                      store_positions: bool = True) -> Dict:
+    return SpimiIndexer(path, memory_budget_mb=memory_budget_mb, store_positions=store_positions).build(documents)
@@ -2,92 +2,507 @@ import numpy as np
 import scipy.sparse as sp
 import pickle
 import os
-from typing import List, Dict, Tuple
+import threading
+from typing import List, Dict, Tuple, Optional
+from .topk import top_k_indices
+from .storage import atomic_directory, write_meta, read_meta, save_array, load_array, save_string_table, StringTable
+
+# mmap 디렉토리 포맷 이름과 버전
+SPLADE_FORMAT_NAME = "splade-csc-index"
+SPLADE_FORMAT_VERSION = 1
+
+# 가중치 양자화 배율 (float -> int16)
+QUANTIZATION_SCALE = 100
+
+# search_topk에서 선택할 수 있는 검색 모드
+SPLADE_MODES = ("exact", "maxscore")
+
+# MaxScore 가지치기 시 float32 누적 오차를 감안한 상대 여유분
+PRUNING_SLACK = 1e-4
+
+# build()에서 한 번에 정렬할 nonzero 개수 (임시 배열 크기 제한)
+BUILD_CHUNK_SIZE = 1 << 22
+
+# search_batch에서 한 번의 행렬 곱으로 계산할 쿼리 수 (문서 x 쿼리 점수 행렬의 크기 제한)
+BATCH_QUERY_CHUNK = 32
+
+
+def compute_column_max(matrix: sp.csc_matrix) -> np.ndarray:
+    # column(단어)별 최대 가중치. 비어 있는 column은 0
+    col_max = np.zeros(matrix.shape[1], dtype=matrix.data.dtype)
+    lengths = np.diff(matrix.indptr)
+    non_empty = np.flatnonzero(lengths)
+    if len(non_empty) > 0:
+        col_max[non_empty] = np.maximum.reduceat(matrix.data, matrix.indptr[non_empty])
+    return col_max
+
+
+def prune_query(query_vec: Dict[int, float], max_terms: Optional[int] = None, min_weight: float = 0.0) -> Dict[int, float]:
+    # 쿼리 쪽 가지치기: 가중치가 min_weight 미만인 term을 버리고, 가중치가 큰 순으로 최대 max_terms개만 남김
+    # (근사 검색이 되므로 정확한 결과가 필요하면 사용하지 않음)
+    items = [(term, weight) for term, weight in query_vec.items() if weight >= min_weight]
+    if max_terms is not None and len(items) > max_terms:
+        items = sorted(items, key=lambda item: -item[1])[:max_terms]
+        # 점수 누적 순서가 바뀌지 않도록 원래 쿼리 순서를 유지
+        kept = {term for term, _ in items}
+        items = [(term, weight) for term, weight in query_vec.items() if term in kept]
+    return dict(items)
+
+# 배열 chunk를 이어 붙이는 버퍼 (용량이 부족하면 1.5배씩 늘림)
+# 원소마다 Python 객체를 만드는 list.extend 대신 typed 배열에 바로 복사하기 위함
+class GrowableArray:
+    def __init__(self, dtype, capacity: int = 1024):
+        self._array = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def extend(self, values: np.ndarray):
+        end = self._size + len(values)
+        if end > len(self._array):
+            grown = np.empty(max(end, int(len(self._array) * 1.5) + 1), dtype=self._array.dtype)
+            grown[:self._size] = self._array[:self._size]
+            self._array = grown
+        self._array[self._size:end] = values
+        self._size = end
+
+    def view(self) -> np.ndarray:
+        return self._array[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
 
 # CSC 형태로 저장
-# 또한 데이터는 npz로, 문서 ID는 pkl로 저장
-# 이를 통해 저장 공간을 절약할 수 있음
+# 기본 저장 포맷은 mmap 디렉토리 (indptr/indices/data .npy + 문서 ID 문자열 테이블)
+# 예전 포맷인 npz(데이터) + pkl(문서 ID)도 읽고 쓸 수 있음
 class SpladeIndex:
     def __init__(self, vocab_size: int = 30522):
         self.vocab_size = vocab_size
         self.doc_ids: List[str] = []
         
-        # 행렬 구성을 위한 임시 버퍼
-        self.rows = [] # 문서 ID 인덱스
-        self.cols = [] # 단어 ID 인덱스
-        self.data = []
+        # 행렬 구성을 위한 임시 버퍼 (문서 순서대로 쌓는 CSR 형태)
+        self._reset_buffers()
         self.matrix = None
+        self.col_max: Optional[np.ndarray] = None # column별 최대 가중치 (MaxScore 상한)
+        self._local = threading.local()
+
+    def _reset_buffers(self):
+        # 문서별 nonzero 개수, 단어 ID, 양자화된 점수
+        # 단어 ID는 vocab 크기에 맞는 가장 작은 정수 타입으로 저장 (BERT vocab이면 uint16)
+        self._doc_nnz = GrowableArray(np.int64)
+        self._cols = GrowableArray(np.uint16 if self.vocab_size <= np.iinfo(np.uint16).max + 1 else np.int32)
+        self._data = GrowableArray(np.int16)
 
     def add_batch(self, doc_ids: List[str], indices_list: List[np.ndarray], values_list: List[np.ndarray]):
-        start_doc_idx = len(self.doc_ids)
-        self.doc_ids.extend(doc_ids)
-        
-        for i, (indices, values) in enumerate(zip(indices_list, values_list)):
-            current_doc_idx = start_doc_idx + i
+        if len(indices_list) == 0:
+            self.doc_ids.extend(doc_ids)
+            return
+
+        indices = np.concatenate(indices_list)
+        if len(indices) > 0 and (indices.min() < 0 or indices.max() >= self.vocab_size):
+            raise ValueError(f"단어 ID가 vocab 범위(0 ~ {self.vocab_size - 1})를 벗어났습니다.")
 
-            # quantization 적용: float16 -> int16
-            # 속도를 향상시킬 수 있음
-            quantized_values = (values * 100).astype(np.int16)
+        # quantization 적용: float -> int16
+        # 속도를 향상시킬 수 있음
+        # 문서별로 dtype이 다르면 문서 단위로 양자화 (곱셈 정밀도가 문서별 계산과 같도록)
+        if len({np.asarray(values).dtype for values in values_list}) == 1:
+            quantized = (np.concatenate(values_list) * QUANTIZATION_SCALE).astype(np.int16)
+        else:
+            quantized = np.concatenate([(values * QUANTIZATION_SCALE).astype(np.int16) for values in values_list])
 
-            self.rows.extend([current_doc_idx] * len(indices)) # [문서1, 문서2 ...]
-            self.cols.extend(indices) # [단어1, 단어2 ...]
-            self.data.extend(quantized_values) # [점수, 점수 ...]
+        self.doc_ids.extend(doc_ids)
+        self._doc_nnz.extend(np.array([len(ix) for ix in indices_list], dtype=np.int64))
+        self._cols.extend(indices)
+        self._data.extend(quantized)
 
     def build(self):
         # Compressed Sparse Column(CSC): 데이터 마이닝때 배운 방법 
         # 이렇게 하면 크기를 줄일 수 있음
+        # COO -> CSC 변환 대신 counting sort로 CSC 배열을 바로 채움
+        # 1. column별 개수(bincount)로 indptr 계산
+        # 2. chunk 단위로 column 기준 안정 정렬(radix) 후 각 column의 다음 빈 칸에 기록
+        #    (문서 순서대로 들어왔으므로 column 안의 row가 오름차순으로 유지됨)
         num_docs = len(self.doc_ids)
+        doc_nnz = self._doc_nnz.view()
+        cols = self._cols.view()
+        data = self._data.view()
+        nnz = len(cols)
+
+        counts = np.bincount(cols, minlength=self.vocab_size)
+        indptr = np.zeros(self.vocab_size + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        index_dtype = np.int32 if max(num_docs, nnz) <= np.iinfo(np.int32).max else np.int64
+        indices = np.empty(nnz, dtype=index_dtype)
+        sorted_data = np.empty(nnz, dtype=np.int16)
+        next_pos = indptr[:-1].copy()
+
+        doc_starts = np.zeros(len(doc_nnz) + 1, dtype=np.int64)
+        np.cumsum(doc_nnz, out=doc_starts[1:])
+        doc_start = 0
+        while doc_start < len(doc_nnz):
+            # BUILD_CHUNK_SIZE개 정도의 nonzero를 가진 문서 구간을 한 번에 처리 (최소 한 문서)
+            doc_end = int(np.searchsorted(doc_starts, doc_starts[doc_start] + BUILD_CHUNK_SIZE, side="right")) - 1
+            doc_end = min(max(doc_end, doc_start + 1), len(doc_nnz))
+            start, end = doc_starts[doc_start], doc_starts[doc_end]
+
+            chunk_cols = cols[start:end]
+            chunk_rows = np.repeat(np.arange(doc_start, doc_end, dtype=index_dtype), doc_nnz[doc_start:doc_end])
+            order = np.argsort(chunk_cols, kind="stable")
+            sorted_cols = chunk_cols[order]
+
+            # 같은 column 안에서 몇 번째인지 = 정렬된 위치 - 해당 column이 시작하는 위치
+            chunk_counts = np.bincount(chunk_cols, minlength=self.vocab_size)
+            chunk_starts = np.cumsum(chunk_counts) - chunk_counts
+            dest = next_pos[sorted_cols] + (np.arange(len(order)) - chunk_starts[sorted_cols])
+
+            indices[dest] = chunk_rows[order]
+            sorted_data[dest] = data[start:end][order]
+            next_pos += chunk_counts
+            doc_start = doc_end
+
+        if indptr[-1] <= np.iinfo(index_dtype).max:
+            indptr = indptr.astype(index_dtype)
+        self.matrix = sp.csc_matrix((sorted_data, indices, indptr), shape=(num_docs, self.vocab_size), copy=False)
+        self.matrix.has_sorted_indices = True
         
-        self.matrix = sp.csc_matrix(
-            (self.data, (self.rows, self.cols)), 
-            shape=(num_docs, self.vocab_size),
-            dtype=np.int16
-        )
-        
-        self.rows = []
-        self.cols = []
-        self.data = []
+        self.col_max = compute_column_max(self.matrix)
+        self._reset_buffers()
 
+    def compact(self, live: np.ndarray) -> "SpladeIndex":
+        # live가 False인 문서(삭제된 문서)의 row를 뺀 새 인덱스
+        live = np.asarray(live, dtype=bool)
+        compacted = SpladeIndex(vocab_size=self.vocab_size)
+        compacted.doc_ids = [doc_id for doc_id, kept in zip(self.doc_ids, live.tolist()) if kept]
+        compacted._set_matrix(self.matrix[np.flatnonzero(live)])
+        return compacted
 
-    def search(self, query_vec: Dict[int, float]) -> Dict[str, float]:
-        # 쿼리 벡터와의 내적을 통해 문서 점수를 계산
+    @classmethod
+    def merge(cls, parts: List["SpladeIndex"]) -> "SpladeIndex":
+        # 문서 순서대로 row를 이어 붙인 인덱스
+        merged = cls(vocab_size=parts[0].vocab_size)
+        for part in parts:
+            merged.doc_ids.extend(part.doc_ids)
+        merged._set_matrix(sp.vstack([part.matrix for part in parts], format="csc"))
+        return merged
+
+    def _set_matrix(self, matrix):
+        matrix = sp.csc_matrix(matrix, dtype=np.int16)
+        matrix.sort_indices()
+        self.matrix = matrix
+        self.col_max = compute_column_max(matrix)
+
+    def _accumulate(self, query_vec: Dict[int, float]) -> Tuple[np.ndarray, np.ndarray]:
+        # term-at-a-time 누적: 쿼리 term별로 CSC의 column 구간을 직접 읽어서
+        # 미리 할당된 float32 점수 버퍼에 더함 (부분 행렬을 만들지 않음)
+        # 반환값은 (점수가 있는 문서 index, 양자화된 점수)이며 작업량은 읽은 posting 수에 비례함
         if self.matrix is None:
             raise ValueError("인덱스가 빌드되지 않았습니다.")
-            
-        # 쿼리의 인덱스와 값 추출
-        q_indices = list(query_vec.keys())
-        q_values = np.array(list(query_vec.values()))
-        
-        sub_matrix = self.matrix[:, q_indices]
 
-        # 각 문서에 대해서 점수를 계산 (내적으로)
-        scores = sub_matrix.dot(q_values)
-        
-        relevant_docs = {}
-        non_zero_indices = scores.nonzero()[0]
+        indptr, indices, data = self.matrix.indptr, self.matrix.indices, self.matrix.data
+        buffer = self._score_buffer()
+        touched = []
+
+        for term, weight in query_vec.items():
+            start, end = indptr[term], indptr[term + 1]
+            if start == end:
+                continue
+            rows = indices[start:end]
+            # int16 * float32 -> float32 (float64로 올라가지 않도록 weight를 float32로 맞춤)
+            buffer[rows] += data[start:end] * np.float32(weight)
+            touched.append(rows)
+
+        if not touched:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        doc_idx = np.unique(np.concatenate(touched))
+        scores = buffer[doc_idx]
+        # 다음 쿼리를 위해 사용한 위치만 0으로 되돌림
+        buffer[doc_idx] = 0
+
+        non_zero = scores != 0
+        return doc_idx[non_zero], scores[non_zero]
+
+    def _score_buffer(self) -> np.ndarray:
+        # 스레드마다 하나씩 재사용하는 점수 버퍼 (동시 검색 시 서로 덮어쓰지 않도록)
+        buffer = getattr(self._local, "buffer", None)
+        num_docs = self.matrix.shape[0]
+        if buffer is None or len(buffer) != num_docs:
+            buffer = np.zeros(num_docs, dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+
+    def _column_max(self) -> np.ndarray:
+        # 예전 포맷으로 로드한 경우에는 처음 필요할 때 계산
+        if self.col_max is None:
+            self.col_max = compute_column_max(self.matrix)
+        return self.col_max
+
+    def search_topk(self, query_vec: Dict[int, float], top_k: int, mode: str = "exact",
+                    max_query_terms: Optional[int] = None, min_query_weight: float = 0.0,
+                    return_stats: bool = False):
+        # 상위 k개의 (문서 index 배열, 점수 배열)을 반환
+        # 문서 ID 변환은 호출하는 쪽에서 최종 k개에 대해서만 하면 됨
+        # - mode="exact": 모든 posting을 누적
+        # - mode="maxscore": column 최대값을 상한으로 써서 일찍 멈추는 MaxScore (결과는 exact와 동일)
+        # - max_query_terms / min_query_weight: 쿼리 term 가지치기 (근사)
+        # return_stats=True 이면 (문서 index, 점수, 통계)를 반환
+        if mode not in SPLADE_MODES:
+            raise ValueError(f"지원하지 않는 검색 모드입니다: {mode}")
+
+        num_terms = len(query_vec)
+        if max_query_terms is not None or min_query_weight > 0:
+            query_vec = prune_query(query_vec, max_query_terms, min_query_weight)
+
+        if mode == "exact":
+            doc_idx, scores = self._accumulate(query_vec)
+            selected = top_k_indices(scores, top_k)
+            doc_idx, scores = doc_idx[selected], scores[selected]
+            postings = sum(int(self.matrix.indptr[t + 1] - self.matrix.indptr[t]) for t in query_vec)
+            stats = {"query_terms": num_terms, "used_terms": len(query_vec), "essential_terms": len(query_vec),
+                     "total_postings": postings, "scanned_postings": postings, "skipped_postings": 0,
+                     "candidate_lookups": 0}
+        else:
+            doc_idx, scores, stats = self._maxscore(query_vec, top_k)
+            stats["query_terms"] = num_terms
+
+        # 양자화된 점수 복원
+        scores = scores / QUANTIZATION_SCALE
+        return (doc_idx, scores, stats) if return_stats else (doc_idx, scores)
+
+    def _maxscore(self, query_vec: Dict[int, float], top_k: int):
+        # MaxScore (term-at-a-time)
+        # 1. term을 상한(weight * column 최대값)이 큰 순서로 처리하면서 모든 posting을 누적 (essential)
+        # 2. 남은 term들의 상한 합이 현재 k번째 점수보다 작아지면 새 문서는 top-k에 들어올 수 없음
+        #    -> 남은 term은 이미 본 후보 문서만 column에서 이진 탐색으로 찾아서 더함 (non-essential)
+        # 3. 최종 후보는 원래 쿼리 순서대로 다시 계산해서 exact 모드와 점수가 완전히 같도록 함
+        if self.matrix is None:
+            raise ValueError("인덱스가 빌드되지 않았습니다.")
+
+        indptr, indices, data = self.matrix.indptr, self.matrix.indices, self.matrix.data
+        col_max = self._column_max()
+        empty = np.zeros(0, dtype=np.int64)
+
+        terms = [(term, np.float32(weight)) for term, weight in query_vec.items() if indptr[term + 1] > indptr[term]]
+        total = sum(int(indptr[term + 1] - indptr[term]) for term, _ in terms)
+        stats = {"used_terms": len(query_vec), "essential_terms": 0, "total_postings": total,
+                 "scanned_postings": 0, "skipped_postings": total, "candidate_lookups": 0}
+        if not terms or top_k <= 0:
+            return empty, np.zeros(0, dtype=np.float32), stats
+
+        upper = np.array([float(weight) * float(col_max[term]) for term, weight in terms])
+        order = np.argsort(-upper, kind="stable")
+        # rest[i]: i번째 이후 term들의 상한 합
+        rest = np.zeros(len(terms) + 1)
+        rest[:-1] = np.cumsum(upper[order][::-1])[::-1]
+
+        buffer = self._score_buffer()
+        seen = self._seen_buffer()
+        candidates = []
+        num_candidates = 0
+        threshold = -np.inf
+        scanned = 0
+        lookups = 0
+        i = 0
+
+        # essential 단계
+        while i < len(terms):
+            term, weight = terms[order[i]]
+            start, end = indptr[term], indptr[term + 1]
+            rows = indices[start:end]
+            buffer[rows] += data[start:end] * weight
+            new_rows = rows[~seen[rows]]
+            seen[new_rows] = True
+            candidates.append(new_rows)
+            num_candidates += len(new_rows)
+            scanned += int(end - start)
+            i += 1
+
+            if i < len(terms) and num_candidates >= top_k:
+                cand = np.concatenate(candidates)
+                candidates = [cand]
+                cand_scores = buffer[cand]
+                threshold = float(np.partition(cand_scores, len(cand_scores) - top_k)[len(cand_scores) - top_k])
+                if rest[i] * (1 + PRUNING_SLACK) < threshold * (1 - PRUNING_SLACK):
+                    break
+
+        cand = np.concatenate(candidates)
+        cand_scores = buffer[cand]
+        buffer[cand] = 0
+        seen[cand] = False
+        stats["essential_terms"] = i
+
+        # non-essential 단계: 후보 문서만 갱신
+        perm = np.argsort(cand)
+        cand, cand_scores = cand[perm], cand_scores[perm]
+        while i < len(terms):
+            # 남은 상한을 다 더해도 k번째 점수에 못 미치는 후보는 제외
+            keep = (cand_scores + rest[i]) * (1 + PRUNING_SLACK) >= threshold * (1 - PRUNING_SLACK)
+            cand, cand_scores = cand[keep], cand_scores[keep]
+            term, weight = terms[order[i]]
+            cand_scores += self._lookup(cand, term, weight)
+            lookups += len(cand)
+            i += 1
+
+        stats["scanned_postings"] = scanned
+        stats["skipped_postings"] = total - scanned
+        stats["candidate_lookups"] = lookups
+        if len(cand) == 0:
+            return empty, np.zeros(0, dtype=np.float32), stats
+
+        # k번째 근처 후보만 원래 순서대로 다시 계산해서 최종 선택
+        if len(cand) > top_k:
+            kth = float(np.partition(cand_scores, len(cand_scores) - top_k)[len(cand_scores) - top_k])
+            cand = cand[cand_scores >= kth * (1 - PRUNING_SLACK) - PRUNING_SLACK]
+        final_scores = self._gather_scores(cand, terms)
+        non_zero = final_scores != 0
+        cand, final_scores = cand[non_zero], final_scores[non_zero]
+        selected = top_k_indices(final_scores, top_k)
+        return cand[selected], final_scores[selected], stats
+
+    def _lookup(self, doc_idx: np.ndarray, term: int, weight: np.float32) -> np.ndarray:
+        # 정렬된 column 안에서 doc_idx 문서들의 가중치를 이진 탐색으로 찾아 weight를 곱해서 반환
+        indptr, indices, data = self.matrix.indptr, self.matrix.indices, self.matrix.data
+        start, end = indptr[term], indptr[term + 1]
+        rows = indices[start:end]
+        pos = np.searchsorted(rows, doc_idx)
+        hit = pos < len(rows)
+        hit[hit] = rows[pos[hit]] == doc_idx[hit]
+        contrib = np.zeros(len(doc_idx), dtype=np.float32)
+        contrib[hit] = data[start + pos[hit]] * weight
+        return contrib
+
+    def _gather_scores(self, doc_idx: np.ndarray, terms: List[Tuple[int, np.float32]]) -> np.ndarray:
+        # 주어진 term 순서대로 후보 문서들의 점수를 누적 (exact 모드의 누적 순서와 동일)
+        scores = np.zeros(len(doc_idx), dtype=np.float32)
+        for term, weight in terms:
+            scores += self._lookup(doc_idx, term, weight)
+        return scores
+
+    def _seen_buffer(self) -> np.ndarray:
+        seen = getattr(self._local, "seen", None)
+        num_docs = self.matrix.shape[0]
+        if seen is None or len(seen) != num_docs:
+            seen = np.zeros(num_docs, dtype=bool)
+            self._local.seen = seen
+        return seen
+
+    def search_batch(self, query_vecs: List[Dict[int, float]], top_k: int, max_query_terms: Optional[int] = None,
+                     min_query_weight: float = 0.0,
+                     chunk_size: int = BATCH_QUERY_CHUNK) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # 여러 쿼리를 (문서 x term) @ (term x 쿼리) sparse 행렬 곱으로 한 번에 계산해서
+        # 쿼리마다 search_topk(mode="exact")와 같은 (문서 index, 점수) 상위 k개를 반환
+        # 쿼리를 chunk_size개씩 나눠서 곱하므로 점수 행렬은 chunk 안의 쿼리에 매칭된 문서만큼만 커짐
+        # 행렬 곱은 더하는 순서가 exact 모드와 달라서, k번째 근처 후보는 _maxscore처럼 원래 순서대로 다시 계산함
+        if self.matrix is None:
+            raise ValueError("인덱스가 빌드되지 않았습니다.")
+        if max_query_terms is not None or min_query_weight > 0:
+            query_vecs = [prune_query(query_vec, max_query_terms, min_query_weight) for query_vec in query_vecs]
+
+        results = []
+        for start in range(0, len(query_vecs), chunk_size):
+            chunk = query_vecs[start:start + chunk_size]
+            lengths = [len(query_vec) for query_vec in chunk]
+            cols = np.fromiter((term for query_vec in chunk for term in query_vec), dtype=np.int64, count=sum(lengths))
+            weights = np.fromiter((weight for query_vec in chunk for weight in query_vec.values()),
+                                  dtype=np.float32, count=sum(lengths))
+            query_of = np.repeat(np.arange(len(chunk)), lengths)
+
+            # chunk의 쿼리에서 쓰는 column(term)만 잘라서 곱함 (CSC라 column 선택은 복사만 일어남)
+            terms, term_col = np.unique(cols, return_inverse=True)
+            queries = sp.csc_matrix((weights, (term_col, query_of)), shape=(len(terms), len(chunk)))
+            docs = self.matrix[:, terms].astype(np.float32)
+            # 곱한 결과의 column 안에서 문서 index는 정렬되어 있지 않으므로 동점은 문서 index로 비교
+            scores = (docs @ queries).tocsc()
+
+            indptr = self.matrix.indptr
+            for q, query_vec in enumerate(chunk):
+                doc_idx = scores.indices[scores.indptr[q]:scores.indptr[q + 1]].astype(np.int64)
+                query_scores = scores.data[scores.indptr[q]:scores.indptr[q + 1]]
+                non_zero = query_scores != 0
+                doc_idx, query_scores = doc_idx[non_zero], query_scores[non_zero]
+
+                # k번째 근처 후보만 원래 순서대로 다시 계산해서 최종 선택
+                if len(doc_idx) > top_k > 0:
+                    kth = float(np.partition(query_scores, len(query_scores) - top_k)[len(query_scores) - top_k])
+                    doc_idx = doc_idx[query_scores >= kth * (1 - PRUNING_SLACK) - PRUNING_SLACK]
+                cand = np.sort(doc_idx)
+                query_terms = [(term, np.float32(weight)) for term, weight in query_vec.items()
+                               if indptr[term + 1] > indptr[term]]
+                final_scores = self._gather_scores(cand, query_terms)
+                non_zero = final_scores != 0
+                cand, final_scores = cand[non_zero], final_scores[non_zero]
+                selected = top_k_indices(final_scores, top_k)
+                # 양자화된 점수 복원
+                results.append((cand[selected], final_scores[selected] / QUANTIZATION_SCALE))
+        return results
+
+    def search(self, query_vec: Dict[int, float]) -> Dict[str, float]:
+        # 쿼리 벡터와의 내적을 통해 점수가 있는 모든 문서의 점수를 계산
+        doc_idx, scores = self._accumulate(query_vec)
         
         # 양자화된 점수 복원
-        for idx in non_zero_indices:
-            doc_id = self.doc_ids[idx]
-            original_score = scores[idx] / 100.0
-            relevant_docs[doc_id] = float(original_score)
-            
-        return relevant_docs
+        return {
+            self.doc_ids[idx]: score / QUANTIZATION_SCALE
+            for idx, score in zip(doc_idx.tolist(), scores.tolist())
+        }
 
-    def save(self, path_prefix: str):
-        # 인덱스는 npz로 저장하고, 문서 ID는 pkl로 저장
-        os.makedirs(os.path.dirname(path_prefix), exist_ok=True)
-        sp.save_npz(f"{path_prefix}.npz", self.matrix)
-        with open(f"{path_prefix}_ids.pkl", 'wb') as f:
-            pickle.dump(self.doc_ids, f)
+    def save(self, path_prefix: str, mmap_format: bool = True):
+        # 기본은 mmap 디렉토리 포맷: indptr/indices/data를 압축하지 않은 .npy로,
+        # 문서 ID는 offset 기반 문자열 테이블로 저장
+        # mmap_format=False 이면 예전처럼 npz + pkl로 저장
+        if not mmap_format:
+            os.makedirs(os.path.dirname(path_prefix), exist_ok=True)
+            sp.save_npz(f"{path_prefix}.npz", self.matrix)
+            with open(f"{path_prefix}_ids.pkl", 'wb') as f:
+                pickle.dump(list(self.doc_ids), f)
+            return
+
+        matrix = self.matrix.tocsc()
+        with atomic_directory(path_prefix) as tmp_dir:
+            write_meta(tmp_dir, {
+                "format": SPLADE_FORMAT_NAME,
+                "version": SPLADE_FORMAT_VERSION,
+                "shape": list(matrix.shape),
+                "nnz": int(matrix.nnz),
+                "dtype": str(matrix.dtype)
+            })
+            # scipy가 다시 변환(복사)하지 않도록 indptr와 indices의 dtype을 맞춰서 저장
+            index_dtype = np.int32 if matrix.nnz < np.iinfo(np.int32).max else np.int64
+            save_array(tmp_dir, "indptr", matrix.indptr.astype(index_dtype, copy=False))
+            save_array(tmp_dir, "indices", matrix.indices.astype(index_dtype, copy=False))
+            save_array(tmp_dir, "data", matrix.data)
+            save_array(tmp_dir, "col_max", self._column_max())
+            save_string_table(tmp_dir, "doc_ids", self.doc_ids)
 
     def load(self, path_prefix: str) -> bool:
+        if os.path.isdir(path_prefix):
+            self._load_mmap(path_prefix)
+            return True
+
         if not os.path.exists(f"{path_prefix}.npz"):
             return False
 
         self.matrix = sp.load_npz(f"{path_prefix}.npz")
+        self.col_max = None
         
         with open(f"{path_prefix}_ids.pkl", 'rb') as f:
             self.doc_ids = pickle.load(f)
             
         return True
+
+    def _load_mmap(self, directory: str):
+        meta = read_meta(directory)
+        if meta.get("format") != SPLADE_FORMAT_NAME or meta.get("version", 0) > SPLADE_FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 SPLADE 인덱스 포맷입니다: {meta.get('format')} v{meta.get('version')}")
+
+        # mmap으로 연 배열을 복사 없이 그대로 CSC 행렬로 감쌈
+        indptr = load_array(directory, "indptr")
+        indices = load_array(directory, "indices")
+        data = load_array(directory, "data")
+        self.matrix = sp.csc_matrix((data, indices, indptr), shape=tuple(meta["shape"]), copy=False)
+        self.vocab_size = meta["shape"][1]
+        self.doc_ids = StringTable.load(directory, "doc_ids")
+        if os.path.exists(os.path.join(directory, "col_max.npy")):
+            self.col_max = load_array(directory, "col_max")
+        else:
+            self.col_max = None
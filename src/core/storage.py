@@ -0,0 +1,140 @@
+import contextlib
+import json
+import os
+import shutil
+import numpy as np
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, List
+
+# 인덱스 디렉토리 포맷에서 공통으로 사용하는 저장 유틸리티
+# - 배열은 .npy로 저장하고, 읽을 때는 np.memmap(mmap_mode="r")으로 열어서 복사 없이 사용
+# - 여러 프로세스가 같은 파일을 열면 OS page cache를 공유하게 됨
+# - 문자열 목록(term, 문서 id)은 UTF-8 바이트 + offset 배열로 저장
+
+META_FILE = "meta.json"
+
+
+@contextlib.contextmanager
+def atomic_directory(path: str):
+    # 임시 디렉토리에 모두 쓴 뒤 한 번에 교체
+    # 기존 파일을 mmap으로 읽고 있는 프로세스가 있어도 파일 내용이 바뀌지 않도록 하기 위함
+    path = path.rstrip(os.sep)
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    try:
+        yield tmp_path
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    old_path = f"{path}.old"
+    if os.path.exists(path):
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def write_meta(directory: str, meta: Dict):
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+
+def read_meta(directory: str) -> Dict:
+    with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_array(directory: str, name: str, array: np.ndarray):
+    np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+
+def load_array(directory: str, name: str, mmap: bool = True) -> np.ndarray:
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+
+
+def save_string_table(directory: str, name: str, strings: Iterable[str]):
+    # 문자열을 UTF-8로 이어 붙인 {name}.bin과, 각 문자열의 시작 위치 {name}_offsets.npy로 저장
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    with open(os.path.join(directory, f"{name}.bin"), 'wb') as f:
+        f.write(b"".join(encoded))
+    save_array(directory, f"{name}_offsets", offsets)
+
+
+class StringTableWriter:
+    # save_string_table과 같은 포맷을 문자열 하나씩 이어서 씀 (전체 목록을 메모리에 들고 있지 않기 위함)
+    def __init__(self, directory: str, name: str):
+        self._directory = directory
+        self._name = name
+        self._file = open(os.path.join(directory, f"{name}.bin"), 'wb')
+        self._offsets = array('q', [0])
+
+    def append(self, string: str):
+        encoded = string.encode('utf-8')
+        self._file.write(encoded)
+        self._offsets.append(self._offsets[-1] + len(encoded))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def close(self):
+        self._file.close()
+        save_array(self._directory, f"{self._name}_offsets", np.frombuffer(self._offsets, dtype=np.int64))
+
+    def abort(self):
+        # 저장을 취소할 때 파일 핸들만 닫음 (offsets는 쓰지 않음, 이미 닫혀 있으면 아무 일도 없음)
+        self._file.close()
+
+
+class StringTable(Sequence):
+    # offset 기반 문자열 테이블. 필요한 문자열만 그때그때 디코딩함
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    @classmethod
+    def load(cls, directory: str, name: str) -> "StringTable":
+        path = os.path.join(directory, f"{name}.bin")
+        if os.path.getsize(path) > 0:
+            data = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            data = np.zeros(0, dtype=np.uint8)
+        return cls(data, load_array(directory, f"{name}_offsets"))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._data[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        # 전체를 순회할 때는 한 번에 디코딩하는 편이 빠름
+        return iter(self.tolist())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (StringTable, list, tuple)):
+            return len(self) == len(other) and self.tolist() == list(other)
+        return NotImplemented
+
+    def tolist(self) -> List[str]:
+        data = self._data.tobytes()
+        offsets = self._offsets.tolist()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(self))]
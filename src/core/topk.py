@@ -0,0 +1,39 @@
+import heapq
+import numpy as np
+from typing import Iterable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K")
+
+# 전체 정렬(O(n log n)) 대신 부분 선택으로 상위 k개만 뽑는 유틸리티
+# 모든 검색 경로(BM25, SPLADE, Hybrid)에서 공통으로 사용
+# 동점일 때는 doc id(배열의 경우 index)가 작은 쪽이 앞에 오도록 해서 결과를 결정적으로 만듦
+
+
+def top_k_indices(scores: np.ndarray, k: int, ids: Optional[np.ndarray] = None) -> np.ndarray:
+    # 점수 내림차순(동점이면 index 오름차순)으로 상위 k개의 index를 반환
+    # ids를 주면 동점일 때 index 대신 ids 오름차순 (정렬되지 않은 sparse 행렬의 문서 index 등)
+    # argpartition으로 O(n) 선택 후, 선택된 k개만 정렬하므로 O(n + k log k)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if k < n:
+        # k번째 점수를 기준값으로 잡고, 기준값과 동점인 원소까지 모두 후보로 포함
+        # (argpartition은 동점 중 어떤 원소를 고를지 보장하지 않기 때문)
+        kth = np.argpartition(-scores, k - 1)[:k]
+        threshold = scores[kth].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+
+    # lexsort는 마지막 key가 1순위: 점수 내림차순 -> index(ids) 오름차순
+    order = np.lexsort((candidates if ids is None else ids[candidates], -scores[candidates]))
+    return candidates[order[:k]]
+
+
+def top_k_items(items: Iterable[Tuple[K, float]], k: int) -> List[Tuple[K, float]]:
+    # (doc_id, score) 쌍에서 상위 k개를 bounded heap으로 선택
+    # dict 기반 점수(RRF 등)에 사용. 동점이면 doc id 오름차순
+    if k <= 0:
+        return []
+    return heapq.nsmallest(k, items, key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,74 @@
+import random
+import numpy as np
+from src.core.inverted_index import InvertedIndex
+from src.core.search_engine import SearchEngine
+
+# 여러 테스트 파일에서 같이 쓰는 테스트용 코퍼스 / 인덱스 / SPLADE 모델 / 엔진
+# 테스트 파일에서는 from conftest import ...로 가져옴
+
+FAKE_SPLADE_VOCAB = 50
+
+
+def random_documents(num_docs: int, words, max_len: int, seed: int = 0):
+    # words에서 무작위로 뽑은 단어 0 ~ max_len개로 이루어진 문서 목록
+    rng = random.Random(seed)
+    return [
+        (f"doc{i}", " ".join(rng.choice(words) for _ in range(rng.randint(0, max_len))))
+        for i in range(num_docs)
+    ]
+
+
+def build_index(documents, store_positions: bool = True) -> InvertedIndex:
+    index = InvertedIndex()
+    index.add_documents(documents)
+    index.finalize(store_positions)
+    return index
+
+
+class FakeSpladeModel:
+    # 테스트용 SPLADE 모델: 단어 해시로 고정된 sparse vector를 만듦 (같은 단어가 나올 때마다 0.25씩 더함)
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+        self.batch_calls = 0
+
+    @staticmethod
+    def vector(text: str):
+        vec = {}
+        for word in text.lower().split():
+            term = sum(map(ord, word)) % FAKE_SPLADE_VOCAB
+            vec[term] = vec.get(term, 0.0) + 0.25
+        return vec
+
+    def encode(self, text: str):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("model error")
+        return self.vector(text)
+
+    def encode_batch(self, texts, batch_size=64):
+        self.batch_calls += 1
+        if self.fail:
+            raise RuntimeError("model error")
+        vecs = [self.vector(text) for text in texts]
+        return {
+            "indices": [np.array(list(vec.keys())) for vec in vecs],
+            "values": [np.array(list(vec.values()), dtype=np.float32) for vec in vecs],
+        }
+
+
+def make_hybrid_engine(documents, **kwargs):
+    # BM25 인덱스 + FakeSpladeModel로 인코딩한 SPLADE 인덱스를 가진 엔진
+    # (인덱스를 만들 때는 모델의 호출 횟수를 세지 않음)
+    engine = SearchEngine(**kwargs)
+    engine.build_index_from_data(documents)
+    vecs = [FakeSpladeModel.vector(text) for _, text in documents]
+    engine.splade_index.vocab_size = FAKE_SPLADE_VOCAB
+    engine.splade_index.add_batch(
+        [doc_id for doc_id, _ in documents],
+        [np.array(list(vec.keys())) for vec in vecs],
+        [np.array(list(vec.values()), dtype=np.float32) for vec in vecs],
+    )
+    engine.splade_index.build()
+    engine.splade_model = FakeSpladeModel()
+    return engine
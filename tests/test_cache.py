@@ -0,0 +1,74 @@
+import time
+from src.core.cache import LRUCache, normalize_query
+
+
+class TestLRUCache:
+    # 크기를 넘으면 가장 오래 사용하지 않은 항목이 제거되는지 테스트
+    def test_lru_eviction(self):
+        # Given
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        # When
+        cache.get("a")
+        cache.put("c", 3)
+
+        # Then
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    # TTL이 지난 항목은 조회되지 않는지 테스트
+    def test_ttl_expiration(self):
+        # Given
+        cache = LRUCache(maxsize=10, ttl=0.01)
+        cache.put("a", 1)
+
+        # When
+        time.sleep(0.02)
+
+        # Then
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    # 적중/미스 횟수와 get_or_compute 동작 테스트
+    def test_hit_miss_counters(self):
+        # Given
+        cache = LRUCache(maxsize=10)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        # When
+        first = cache.get_or_compute("key", compute)
+        second = cache.get_or_compute("key", compute)
+
+        # Then
+        assert first == second == "value"
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_normalize_query(self):
+        assert normalize_query("  Apple   CHERRY\t") == "apple cherry"
+
+    # 항목 무게의 합이 max_weight를 넘으면 오래된 항목부터 제거되는지 테스트
+    def test_weight_bounded_eviction(self):
+        # Given
+        cache = LRUCache(maxsize=100, max_weight=5, weigher=len)
+        cache.put("a", [1, 2, 3])
+
+        # When
+        cache.put("b", [1, 2])
+        cache.put("c", [1])
+        cache.put("big", list(range(10)))
+
+        # Then
+        assert cache.get("a") is None
+        assert cache.get("b") == [1, 2]
+        assert cache.get("c") == [1]
+        assert cache.get("big") is None
+        assert cache.weight == 3
@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+from src.core.codecs import (
+    CODECS, EncodedStream, vbyte_encode, vbyte_decode, bitpack_encode, bitpack_decode,
+    delta_encode, delta_decode, _byte_windows
+)
+from src.core.inverted_index import InvertedIndex
+from src.core.phrase import phrase_matches
+from src.core.search_engine import SearchEngine
+from src.core.storage import read_meta
+from conftest import random_documents, build_index
+
+# "common"은 거의 모든 문서에 나와서 posting이 여러 블록에 걸침
+WORDS = [f"word{i}" for i in range(40)] + ["common"] * 20
+
+
+class TestCodecs:
+    VALUES = np.array([0, 1, 127, 128, 300, 16383, 16384, 2 ** 21, 2 ** 28 - 1, 2 ** 28, 2 ** 31 - 1, 5], dtype=np.int64)
+
+    def test_vbyte_roundtrip(self):
+        # When
+        data = vbyte_encode(self.VALUES)
+
+        # Then
+        assert np.array_equal(vbyte_decode(data), self.VALUES)
+        assert len(vbyte_encode(np.array([127]))) == 1 and len(vbyte_encode(np.array([128]))) == 2
+
+    def test_bitpack_roundtrip(self):
+        # Given
+        rng = np.random.default_rng(0)
+        # 블록마다 값의 범위가 달라서 비트 수가 다름 (0비트 블록 포함)
+        values = np.concatenate([np.zeros(10, dtype=np.int64), rng.integers(0, 2 ** 31, 33), rng.integers(0, 5, 64)])
+        value_offsets = np.array([0, 10, 43, 107])
+
+        # When
+        data, byte_offsets, widths = bitpack_encode(values, value_offsets)
+        decoded = bitpack_decode(_byte_windows(data), byte_offsets, widths, value_offsets, np.array([0, 1, 2]))
+        middle = bitpack_decode(_byte_windows(data), byte_offsets, widths, value_offsets, np.array([2, 0]))
+
+        # Then
+        assert widths[0] == 0
+        assert np.array_equal(decoded, values)
+        assert np.array_equal(middle, np.concatenate([values[43:], values[:10]]))
+
+    def test_delta_roundtrip(self):
+        # Given
+        values = np.array([3, 5, 9, 1, 2, 7, 4])
+        lengths = np.array([3, 0, 3, 1])
+
+        # When
+        gaps = delta_encode(values, lengths)
+
+        # Then
+        assert gaps.tolist() == [3, 2, 4, 1, 1, 5, 4]
+        assert np.array_equal(delta_decode(gaps, lengths), values)
+
+    # 모든 codec에서 필요한 블록만 풀어도 원래 값과 같은지 테스트
+    @pytest.mark.parametrize("codec", CODECS)
+    def test_encoded_stream_blocks(self, codec):
+        # Given
+        rng = np.random.default_rng(1)
+        values = rng.integers(0, 1000, 500)
+        value_offsets = np.array([0, 64, 128, 130, 300, 500])
+        stream = EncodedStream.encode(values, value_offsets, codec)
+
+        # When / Then
+        assert np.array_equal(stream.decode_range(0, 5), values)
+        assert np.array_equal(stream.decode_range(2, 4), values[128:300])
+        assert np.array_equal(stream.decode_blocks(np.array([1, 4])), np.concatenate([values[64:128], values[300:]]))
+
+
+class TestCompressedIndex:
+    # 압축한 인덱스의 posting / 포지션 / 구문 검색 결과가 압축하지 않은 인덱스와 같은지 테스트
+    @pytest.mark.parametrize("codec", ["vbyte", "bitpack"])
+    def test_matches_raw_index(self, codec):
+        # Given
+        documents = random_documents(400, WORDS, 80)
+        raw = build_index(documents)
+        compressed = build_index(documents)
+
+        # When
+        compressed.compress(codec)
+
+        # Then
+        assert compressed.postings_doc_ids is None and compressed.has_positions
+        for term in raw.lexicon:
+            expected_docs, expected_tfs = raw.get_postings(term)
+            actual_docs, actual_tfs = compressed.get_postings(term)
+            assert np.array_equal(actual_docs, expected_docs) and np.array_equal(actual_tfs, expected_tfs)
+
+        all_postings = np.arange(raw.num_postings)
+        assert all(np.array_equal(a, b) for a, b in zip(
+            compressed.get_positions_batch(all_postings[::7]), raw.get_positions_batch(all_postings[::7])
+        ))
+        docs = np.arange(len(documents))
+        for term in ["common", "word3", "missing"]:
+            assert np.array_equal(compressed.find_postings(term, docs), raw.find_postings(term, docs))
+        for terms in (["common", "common"], ["word1", "common", "word2"]):
+            assert all(np.array_equal(a, b) for a, b in zip(
+                phrase_matches(compressed, terms), phrase_matches(raw, terms)
+            ))
+
+    @pytest.mark.parametrize("codec", ["vbyte", "bitpack"])
+    def test_save_and_load(self, tmp_path, codec):
+        # Given
+        documents = random_documents(300, WORDS, 80)
+        raw = build_index(documents)
+        raw.save(str(tmp_path / "raw"))
+        raw.save(str(tmp_path / "compressed"), codec=codec)
+
+        # When
+        loaded = InvertedIndex()
+        loaded.load(str(tmp_path / "compressed"))
+
+        # Then
+        assert read_meta(str(tmp_path / "compressed"))["codec"] == codec
+        assert loaded.compressed is not None and loaded.codec == codec
+        assert sum(f.stat().st_size for f in (tmp_path / "compressed").iterdir()) < \
+            sum(f.stat().st_size for f in (tmp_path / "raw").iterdir())
+        for term in raw.lexicon:
+            assert np.array_equal(loaded.get_postings(term)[0], raw.get_postings(term)[0])
+        assert loaded.index["common"] == raw.index["common"]
+
+        # 압축을 풀어서 raw로 다시 저장하면 원래 인덱스와 같음
+        loaded.compact(np.ones(len(documents), dtype=bool)).save(str(tmp_path / "roundtrip"), codec="raw")
+        roundtrip = InvertedIndex()
+        roundtrip.load(str(tmp_path / "roundtrip"))
+        assert np.array_equal(roundtrip.positions, raw.positions)
+        assert np.array_equal(roundtrip.postings_doc_ids, raw.postings_doc_ids)
+
+    # 압축한 인덱스로 BM25 / Block-Max WAND 검색 결과가 같은지 테스트
+    @pytest.mark.parametrize("algorithm", ["exhaustive", "bmw"])
+    def test_search_on_compressed_index(self, algorithm):
+        # Given
+        documents = random_documents(300, WORDS, 80)
+        engine = SearchEngine()
+        engine.build_index_from_data(documents)
+        expected = engine.search_bm25("common word3 word17", top_k=20, algorithm=algorithm)
+        phrase = engine.search_bm25('"common word3"', top_k=20)
+
+        # When
+        engine.inverted_index.compress("bitpack")
+
+        # Then
+        assert engine.search_bm25("common word3 word17", top_k=20, algorithm=algorithm) == expected
+        assert engine.search_bm25('"common word3"', top_k=20) == phrase
+        engine.close()
+
+    def test_unknown_codec(self):
+        # Given
+        index = build_index(random_documents(10, WORDS, 80))
+
+        # When / Then
+        with pytest.raises(ValueError):
+            index.compress("zstd")
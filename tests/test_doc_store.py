@@ -0,0 +1,106 @@
+import os
+import pytest
+from src.core import doc_store
+from src.core.doc_store import DocStore, DocStoreWriter, build_doc_store
+
+DOCUMENTS = [
+    ("doc3", "third document", "Third"),
+    ("doc1", "first document with 한글", "First"),
+    ("doc10", "", ""),
+    ("doc2", "second document", "Second"),
+    ("doc5", "fifth document " * 100, "Fifth"),
+]
+
+
+class TestDocStore:
+    # 여러 블록에 나눠 저장한 문서를 id로 다시 읽을 수 있는지 테스트
+    def test_get(self, tmp_path):
+        # Given
+        path = str(tmp_path / "docstore")
+        build_doc_store(DOCUMENTS, path, docs_per_block=2)
+        store = DocStore()
+
+        # When
+        loaded = store.load(path)
+
+        # Then
+        assert loaded
+        assert len(store) == len(DOCUMENTS)
+        for idx, (doc_id, text, title) in enumerate(DOCUMENTS):
+            assert store.get(doc_id) == {"doc_id": doc_id, "text": text, "title": title}
+            assert store.get_by_index(idx)["doc_id"] == doc_id
+        assert store.get("doc4") is None
+        assert "doc10" in store and "doc" not in store
+
+    # get_many는 요청한 순서대로 결과를 돌려주고, 없는 문서는 None
+    def test_get_many(self, tmp_path):
+        # Given
+        path = str(tmp_path / "docstore")
+        build_doc_store(DOCUMENTS, path, docs_per_block=2)
+        store = DocStore()
+        store.load(path)
+
+        # When
+        docs = store.get_many(["doc5", "missing", "doc1", "doc3"])
+
+        # Then
+        assert [doc and doc["doc_id"] for doc in docs] == ["doc5", None, "doc1", "doc3"]
+        assert docs[2]["text"] == "first document with 한글"
+
+    def test_missing_and_empty(self, tmp_path):
+        # Given
+        store = DocStore()
+        with DocStoreWriter(str(tmp_path / "empty")):
+            pass
+
+        # When / Then
+        assert not store.load(str(tmp_path / "missing"))
+        assert store.load(str(tmp_path / "empty"))
+        assert len(store) == 0
+        assert store.get_many(["doc1"]) == [None]
+
+    # 쓰는 도중 예외가 나면 기존 저장소를 건드리지 않음
+    def test_failed_write_keeps_previous_store(self, tmp_path):
+        # Given
+        path = str(tmp_path / "docstore")
+        build_doc_store(DOCUMENTS, path)
+
+        # When
+        with pytest.raises(RuntimeError):
+            with DocStoreWriter(path) as writer:
+                writer.add("new", "new document")
+                raise RuntimeError("중단")
+        store = DocStore()
+        store.load(path)
+
+        # Then
+        assert len(store) == len(DOCUMENTS)
+        assert store.get("new") is None
+
+        # 쓰던 파일 핸들은 모두 닫히고 임시 디렉토리는 지워짐
+        assert writer._file.closed and writer._doc_ids._file.closed
+        assert not os.path.exists(path + ".tmp")
+
+    # 마무리(메타 저장) 중에 실패해도 반쯤 쓴 저장소로 교체하지 않음
+    def test_failed_finish_keeps_previous_store(self, tmp_path, monkeypatch):
+        # Given
+        path = str(tmp_path / "docstore")
+        build_doc_store(DOCUMENTS, path)
+
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+        monkeypatch.setattr(doc_store, "write_meta", fail)
+
+        # When
+        with pytest.raises(OSError):
+            with DocStoreWriter(path) as writer:
+                writer.add("new", "new document")
+        monkeypatch.undo()
+        store = DocStore()
+        store.load(path)
+
+        # Then
+        assert writer._file.closed and writer._doc_ids._file.closed
+        assert not os.path.exists(path + ".tmp")
+        assert len(store) == len(DOCUMENTS)
+        assert store.get("new") is None
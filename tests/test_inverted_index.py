@@ -61,3 +61,284 @@ class TestInvertedIndex:
         
         term = index_engine.tokenizer.tokenize("engine")[0]
         assert term in new_index.index
+
+    def test_finalize_builds_compiled_arrays(self, index_engine):
+        # finalize() 후 CSR 형태의 배열이 만들어지는지 검증
+        # Given
+        index_engine.add_document("doc1", "apple banana apple")
+        index_engine.add_document("doc2", "banana cherry")
+
+        # When
+        index_engine.finalize()
+
+        # Then
+        assert index_engine.compiled is True
+        assert index_engine.doc_ids == ["doc1", "doc2"]
+        assert index_engine.doc_len_array.tolist() == [3, 2]
+
+        banana = index_engine.tokenizer.tokenize("banana")[0]
+        doc_idx, tfs = index_engine.get_postings(banana)
+        assert doc_idx.tolist() == [0, 1]
+        assert tfs.tolist() == [1, 1]
+
+        # 기존 형태의 접근도 그대로 동작해야 함
+        apple = index_engine.tokenizer.tokenize("apple")[0]
+        assert index_engine.index[apple] == {"doc1": [0, 2]}
+        assert index_engine.get_postings("없는단어") is None
+
+    def test_add_document_after_finalize(self, index_engine):
+        # finalize 이후에도 문서 추가가 가능해야 함
+        # Given
+        index_engine.add_document("doc1", "python java")
+        index_engine.finalize()
+
+        # When
+        index_engine.add_document("doc2", "python")
+        index_engine.finalize()
+
+        # Then
+        python = index_engine.tokenizer.tokenize("python")[0]
+        doc_idx, tfs = index_engine.get_postings(python)
+        assert doc_idx.tolist() == [0, 1]
+        assert index_engine.doc_count == 2
+        assert index_engine.avg_doc_len == 1.5
+
+    def test_load_legacy_pickle(self, index_engine, tmp_path):
+        # 예전 포맷(중첩 dict pickle)도 읽을 수 있어야 함
+        # Given
+        import pickle
+        legacy_file = tmp_path / "legacy_index.pkl"
+        with open(legacy_file, 'wb') as f:
+            pickle.dump({
+                "index": {"appl": {"doc1": [0, 2]}, "banana": {"doc1": [1]}},
+                "doc_lengths": {"doc1": 3},
+                "doc_count": 1,
+                "avg_doc_len": 3.0
+            }, f)
+
+        # When
+        success = index_engine.load(str(legacy_file))
+
+        # Then
+        assert success is True
+        assert index_engine.compiled is True
+        assert index_engine.index["appl"] == {"doc1": [0, 2]}
+        assert index_engine.doc_lengths == {"doc1": 3}
+
+    def test_block_metadata(self, index_engine):
+        # 블록별 마지막 문서 id / 최대 tf / 최소 길이가 올바르게 계산되는지 검증
+        # Given
+        from src.core.inverted_index import compute_block_metadata
+        import numpy as np
+        offsets = np.array([0, 3, 4])
+        doc_ids = np.array([0, 1, 2, 1])
+        tfs = np.array([2, 5, 1, 3])
+        doc_lens = np.array([10, 4, 7])
+
+        # When
+        block_offsets, last_doc, max_tf, min_len = compute_block_metadata(offsets, doc_ids, tfs, doc_lens, block_size=2)
+
+        # Then
+        assert block_offsets.tolist() == [0, 2, 3]
+        assert last_doc.tolist() == [1, 2, 1]
+        assert max_tf.tolist() == [5, 1, 3]
+        assert min_len.tolist() == [4, 7, 4]
+
+    def test_load_is_memory_mapped(self, index_engine, tmp_path):
+        # 디렉토리 포맷으로 저장 후 np.memmap으로 로드되는지 검증
+        # Given
+        import numpy as np
+        index_engine.add_document("doc1", "apple banana apple")
+        index_engine.add_document("doc2", "banana cherry")
+        index_engine.finalize()
+        save_dir = tmp_path / "index"
+
+        # When
+        index_engine.save(str(save_dir))
+        new_index = InvertedIndex()
+        new_index.load(str(save_dir))
+
+        # Then
+        assert isinstance(new_index.postings_doc_ids, np.memmap)
+        assert isinstance(new_index.positions, np.memmap)
+        assert list(new_index.doc_ids) == ["doc1", "doc2"]
+        assert new_index.doc_lengths["doc2"] == 2
+        apple = index_engine.tokenizer.tokenize("apple")[0]
+        assert new_index.index[apple] == {"doc1": [0, 2]}
+        assert new_index.block_max_tf.tolist() == index_engine.block_max_tf.tolist()
+
+        # mmap으로 로드한 인덱스에도 문서를 추가할 수 있어야 함
+        new_index.add_document("doc3", "apple")
+        new_index.finalize()
+        doc_idx, _ = new_index.get_postings(apple)
+        assert doc_idx.tolist() == [0, 2]
+
+    def test_convert_legacy_pickle_to_directory(self, index_engine, tmp_path):
+        # 예전 pickle 인덱스를 읽어서 디렉토리 포맷으로 다시 저장
+        # Given
+        import pickle
+        legacy_file = tmp_path / "index.pkl"
+        with open(legacy_file, 'wb') as f:
+            pickle.dump({
+                "index": {"appl": {"doc1": [0]}},
+                "doc_lengths": {"doc1": 1},
+                "doc_count": 1,
+                "avg_doc_len": 1.0
+            }, f)
+        index_engine.load(str(legacy_file))
+
+        # When
+        index_engine.save(str(tmp_path / "index"))
+        converted = InvertedIndex()
+        converted.load(str(tmp_path / "index"))
+
+        # Then
+        assert converted.doc_count == 1
+        assert converted.index["appl"] == {"doc1": [0]}
+
+
+PARALLEL_DOCUMENTS = [
+    ("doc1", "apple banana apple"),
+    ("doc2", "banana cherry"),
+    ("doc3", "I cannot eat cherry pie"),
+    ("doc4", ""),
+    ("doc5", "apple pie with banana and cherry"),
+    ("doc6", "running foxes and running dogs"),
+    ("doc7", "zebra"),
+]
+
+
+class TestParallelIndexing:
+    def _assert_same_index(self, expected, actual):
+        import numpy as np
+        from src.core.inverted_index import ARRAY_FILES
+        assert actual.lexicon == expected.lexicon
+        assert list(actual.doc_ids) == list(expected.doc_ids)
+        assert actual.doc_lengths == expected.doc_lengths
+        assert actual.doc_count == expected.doc_count
+        assert actual.avg_doc_len == expected.avg_doc_len
+        for name in ARRAY_FILES:
+            assert np.array_equal(getattr(actual, name), getattr(expected, name)), name
+
+    # shard별 인덱스를 합친 결과가 직렬 빌드와 같은지 테스트
+    def test_merge_matches_serial_build(self):
+        # Given
+        serial = InvertedIndex()
+        serial.add_documents(PARALLEL_DOCUMENTS)
+        serial.finalize()
+
+        parts = []
+        for shard in (PARALLEL_DOCUMENTS[:2], PARALLEL_DOCUMENTS[2:5], PARALLEL_DOCUMENTS[5:]):
+            part = InvertedIndex()
+            part.add_documents(shard)
+            part.finalize()
+            parts.append(part)
+
+        # When
+        merged = InvertedIndex.merge(parts)
+
+        # Then
+        self._assert_same_index(serial, merged)
+
+    # 여러 프로세스로 빌드한 결과가 직렬 빌드와 같은지 테스트
+    def test_build_index_parallel(self):
+        # Given
+        from src.core.parallel_indexing import build_index_parallel
+        serial = InvertedIndex()
+        serial.add_documents(PARALLEL_DOCUMENTS)
+        serial.finalize()
+
+        # When
+        parallel = build_index_parallel(PARALLEL_DOCUMENTS, workers=3)
+
+        # Then
+        self._assert_same_index(serial, parallel)
+
+
+class TestFrequencyOnlyIndex:
+    # 포지션 없이 만든 인덱스의 posting / tf / 블록 정보가 포지션 인덱스와 같은지 테스트
+    def test_matches_positional_index(self):
+        import numpy as np
+        from src.core.inverted_index import ARRAY_FILES
+        # Given
+        positional = InvertedIndex()
+        positional.add_documents(PARALLEL_DOCUMENTS)
+        positional.finalize()
+
+        # When
+        frequency_only = InvertedIndex(store_positions=False)
+        frequency_only.add_documents(PARALLEL_DOCUMENTS)
+        frequency_only.finalize()
+
+        # Then
+        assert not frequency_only.has_positions
+        assert frequency_only.positions is None and frequency_only.position_offsets is None
+        assert frequency_only.lexicon == positional.lexicon
+        for name in ARRAY_FILES:
+            if name not in ("position_offsets", "positions"):
+                assert np.array_equal(getattr(frequency_only, name), getattr(positional, name)), name
+
+    def test_save_and_load_detects_variant(self, tmp_path):
+        # Given
+        index = InvertedIndex(store_positions=False)
+        index.add_documents(PARALLEL_DOCUMENTS)
+        index.save(str(tmp_path / "index"))
+
+        # When
+        loaded = InvertedIndex()
+        loaded.load(str(tmp_path / "index"))
+
+        # Then
+        assert not loaded.has_positions and not loaded.store_positions
+        assert not (tmp_path / "index" / "positions.npy").exists()
+        fox = loaded.tokenizer.tokenize("fox")[0]
+        assert loaded.get_postings(fox)[1].tolist() == index.get_postings(fox)[1].tolist()
+
+    # 포지션이 필요한 기능은 명확한 에러를 내야 함
+    def test_position_features_raise(self):
+        from src.core.phrase import phrase_matches, minimal_span
+        # Given
+        index = InvertedIndex(store_positions=False)
+        index.add_documents(PARALLEL_DOCUMENTS)
+        index.finalize()
+        terms = index.tokenizer.tokenize("apple banana")
+
+        # When / Then
+        with pytest.raises(ValueError):
+            index.get_positions(0)
+        with pytest.raises(ValueError):
+            phrase_matches(index, terms)
+        with pytest.raises(ValueError):
+            minimal_span(index, terms, 0)
+
+    # finalize 이후 문서를 추가해도 포지션 없는 인덱스로 유지되는지 테스트
+    def test_add_document_after_finalize(self):
+        # Given
+        index = InvertedIndex(store_positions=False)
+        index.add_document("doc1", "python java python")
+        index.finalize()
+
+        # When
+        index.add_document("doc2", "python")
+        index.finalize()
+
+        # Then
+        python = index.tokenizer.tokenize("python")[0]
+        assert index.get_postings(python)[1].tolist() == [2, 1]
+        assert not index.has_positions
+
+    def test_build_index_parallel(self):
+        import numpy as np
+        from src.core.parallel_indexing import build_index_parallel
+        # Given
+        serial = InvertedIndex(store_positions=False)
+        serial.add_documents(PARALLEL_DOCUMENTS)
+        serial.finalize()
+
+        # When
+        parallel = build_index_parallel(PARALLEL_DOCUMENTS, workers=3, store_positions=False)
+
+        # Then
+        assert not parallel.has_positions
+        assert np.array_equal(parallel.postings_tfs, serial.postings_tfs)
+        assert np.array_equal(parallel.postings_doc_ids, serial.postings_doc_ids)
@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+from src.core.search_engine import SearchEngine
+from conftest import random_documents, build_index
+from src.core.phrase import parse_phrase_query, intersect_postings, phrase_matches, phrase_doc_mask, minimal_span
+
+DOCUMENTS = [
+    ("doc1", "new york pizza is the best pizza in new york"),
+    ("doc2", "york new pizza"),
+    ("doc3", "pizza places in new jersey and york"),
+    ("doc4", "the new york times"),
+    ("doc5", "pizza"),
+]
+WORDS = ["apple", "banana", "cherry", "delta", "echo", "foxtrot"]
+
+
+def _brute_force_phrase(index, documents, terms):
+    # 토큰 목록에서 직접 구문 등장 횟수를 셈
+    expected = {}
+    for doc_idx, (_, text) in enumerate(documents):
+        tokens = index.tokenizer.tokenize(text)
+        count = sum(tokens[i:i + len(terms)] == terms for i in range(len(tokens) - len(terms) + 1))
+        if count:
+            expected[doc_idx] = count
+    return expected
+
+
+class TestPhraseMatching:
+    def test_parse_phrase_query(self):
+        # When
+        text, phrases = parse_phrase_query('"new york"  pizza "" "times')
+
+        # Then
+        assert text == "new york pizza times"
+        assert phrases == ["new york"]
+
+    def test_intersect_postings(self):
+        # Given
+        index = build_index(DOCUMENTS)
+
+        # When
+        docs, posting_idx = intersect_postings(index, ["new", "york", "pizza"])
+        missing, _ = intersect_postings(index, ["new", "unknown"])
+
+        # Then
+        assert docs.tolist() == [0, 1, 2]
+        for term, idx in zip(["new", "york", "pizza"], posting_idx):
+            start, end = index.offsets[index.lexicon[term]], index.offsets[index.lexicon[term] + 1]
+            assert np.all((idx >= start) & (idx < end))
+            assert index.postings_doc_ids[idx].tolist() == docs.tolist()
+        assert len(missing) == 0
+
+    # 벡터화한 포지션 교집합 결과가 토큰 목록에서 직접 센 결과와 같은지 테스트
+    @pytest.mark.parametrize("terms", [
+        ["appl", "banana"], ["banana", "banana"], ["cherri", "delta", "echo"], ["foxtrot"], ["appl", "zulu"],
+    ])
+    def test_matches_brute_force(self, terms):
+        # Given
+        documents = random_documents(300, WORDS, 30)
+        index = build_index(documents)
+        stats = {}
+
+        # When
+        docs, counts = phrase_matches(index, terms, stats)
+
+        # Then
+        assert dict(zip(docs.tolist(), counts.tolist())) == _brute_force_phrase(index, documents, terms)
+        assert stats["candidate_docs"] >= len(docs)
+
+    def test_phrase_doc_mask(self):
+        # Given
+        index = build_index(DOCUMENTS)
+
+        # When / Then
+        # 모든 구문이 나타나는 문서만 True
+        assert phrase_doc_mask(index, [["new", "york"]]).tolist() == [True, False, False, True, False]
+        assert phrase_doc_mask(index, [["new", "york"], ["pizza"]]).tolist() == [True, False, False, False, False]
+        assert phrase_doc_mask(index, []).all()
+
+    def test_minimal_span(self):
+        # Given
+        index = build_index(DOCUMENTS)
+
+        # When / Then
+        # doc1: [new, york, pizza, best, pizza, new, york] -> "york pizza" 구간
+        assert minimal_span(index, ["york", "pizza"], 0) == 2
+        assert minimal_span(index, ["new", "pizza"], 2) == 3
+        assert minimal_span(index, ["pizza", "jersey", "york"], 2) == 5
+        assert minimal_span(index, ["new", "time"], 3) == 3
+        assert minimal_span(index, ["new", "pizza"], 3) == 0
+
+    def test_requires_positions(self):
+        # Given
+        index = build_index(DOCUMENTS, store_positions=False)
+
+        # When / Then
+        with pytest.raises(ValueError):
+            phrase_matches(index, ["new", "york"])
+
+
+class TestPhraseSearch:
+    @pytest.fixture
+    def engine(self):
+        engine = SearchEngine()
+        engine.build_index_from_data(DOCUMENTS)
+        yield engine
+        engine.close()
+
+    # 구문 검색 결과는 구문이 있는 문서만 남기고 점수는 일반 BM25와 같음
+    def test_quoted_phrase_filters_bm25(self, engine):
+        # When
+        plain = dict(engine.search_bm25("new york pizza", top_k=10))
+        results, stats = engine.search_bm25('"new york" pizza', top_k=10, return_stats=True)
+
+        # Then
+        assert [doc_id for doc_id, _ in results] == [
+            doc_id for doc_id, _ in engine.search_bm25("new york pizza", top_k=10) if doc_id in ("doc1", "doc4")
+        ]
+        assert all(score == plain[doc_id] for doc_id, score in results)
+        assert stats["positions_decoded"] > 0
+
+    # 가까이 모여 있는 문서가 근접도 보너스로 앞으로 오는지 테스트
+    def test_proximity_boost(self, engine):
+        # When
+        plain = engine.search_bm25("york pizza", top_k=10)
+        boosted = engine.search_bm25("york pizza", top_k=10, proximity_weight=10.0)
+
+        # Then
+        # 보너스 = weight * term 수 / 최소 구간 길이, 한 term이라도 없는 문서는 보너스 없음
+        plain_scores, boosted_scores = dict(plain), dict(boosted)
+        assert set(plain_scores) == set(boosted_scores)
+        assert {doc_id for doc_id, _ in boosted[:2]} == {"doc1", "doc2"}
+        assert boosted_scores["doc1"] == pytest.approx(plain_scores["doc1"] + 10.0)
+        assert boosted_scores["doc3"] == pytest.approx(plain_scores["doc3"] + 10.0 * 2 / 5)
+        assert boosted_scores["doc4"] == plain_scores["doc4"]
+        assert boosted_scores["doc5"] == plain_scores["doc5"]
+        assert [score for _, score in boosted] == sorted(boosted_scores.values(), reverse=True)
+
+    # 문서를 추가/삭제한 세그먼트 모드에서도 한 번에 빌드한 인덱스와 결과가 같은지 테스트
+    def test_segmented_matches_rebuild(self, engine):
+        # Given
+        engine.add_documents([("doc6", "best new york pizza"), ("doc2", "new york style")])
+        engine.delete_documents(["doc5"])
+        rebuilt = SearchEngine()
+        rebuilt.build_index_from_data([
+            ("doc1", DOCUMENTS[0][1]), ("doc3", DOCUMENTS[2][1]), ("doc4", DOCUMENTS[3][1]),
+            ("doc6", "best new york pizza"), ("doc2", "new york style"),
+        ])
+
+        # When / Then
+        for query in ['"new york"', '"york pizza" best', 'pizza "new york"']:
+            for weight in (0.0, 2.0):
+                actual = engine.search_bm25(query, top_k=10, proximity_weight=weight)
+                expected = rebuilt.search_bm25(query, top_k=10, proximity_weight=weight)
+                assert [doc_id for doc_id, _ in actual] == [doc_id for doc_id, _ in expected]
+                assert np.allclose([s for _, s in actual], [s for _, s in expected])
+        rebuilt.close()
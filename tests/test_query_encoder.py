@@ -0,0 +1,82 @@
+import threading
+import time
+import numpy as np
+import pytest
+from src.core.query_encoder import BatchingQueryEncoder
+
+
+class FakeBatchModel:
+    # encode_batch 호출마다 배치 크기를 기록하는 테스트용 모델
+    def __init__(self, delay: float = 0.01, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.batch_sizes = []
+
+    def encode_batch(self, texts, batch_size=64):
+        if self.fail:
+            raise RuntimeError("model error")
+        time.sleep(self.delay)
+        self.batch_sizes.append(len(texts))
+        return {
+            "indices": [np.array([len(text)]) for text in texts],
+            "values": [np.array([1.0], dtype=np.float32) for _ in texts],
+        }
+
+
+class TestBatchingQueryEncoder:
+    # 동시에 들어온 쿼리가 하나의 배치로 묶이고, 각자 자기 결과를 받는지 테스트
+    def test_concurrent_requests_are_batched(self):
+        # Given
+        model = FakeBatchModel()
+        encoder = BatchingQueryEncoder(model, max_batch_size=8, max_wait_ms=50)
+        texts = ["a" * i for i in range(1, 9)]
+        results = {}
+
+        def worker(text):
+            results[text] = encoder.encode(text)
+
+        # When
+        threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        encoder.close()
+
+        # Then
+        for text in texts:
+            assert results[text] == {len(text): 1.0}
+        assert sum(model.batch_sizes) == len(texts)
+        assert len(model.batch_sizes) < len(texts)
+        assert max(model.batch_sizes) <= 8
+        assert encoder.stats()["queries"] == len(texts)
+
+    def test_model_error_is_propagated(self):
+        # Given
+        encoder = BatchingQueryEncoder(FakeBatchModel(fail=True), max_batch_size=4, max_wait_ms=1)
+
+        # When / Then
+        with pytest.raises(RuntimeError):
+            encoder.encode("query")
+        encoder.close()
+
+    # close() 이후의 encode는 멈추지 않고 배치 없이 바로 인코딩되는지 테스트
+    def test_encode_after_close(self):
+        # Given
+        model = FakeBatchModel(delay=0)
+        encoder = BatchingQueryEncoder(model, max_batch_size=4, max_wait_ms=1)
+        encoder.close()
+        results = []
+
+        # When
+        thread = threading.Thread(target=lambda: results.append(encoder.encode("abc")), daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+
+        # Then
+        assert not thread.is_alive()
+        assert results == [{3: 1.0}]
+        assert model.batch_sizes == [1]
+        assert encoder.stats()["queries"] == 0
+        # 두 번 닫아도 문제없음
+        encoder.close()
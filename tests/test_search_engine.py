@@ -0,0 +1,313 @@
+import random
+import threading
+import pytest
+import math
+from src.core.search_engine import SearchEngine
+from conftest import FakeSpladeModel, make_hybrid_engine
+
+DOCUMENTS = [
+    ("doc1", "apple banana apple cherry"),
+    ("doc2", "banana cherry"),
+    ("doc3", "apple apple apple"),
+    ("doc4", "delta echo banana"),
+    ("doc5", "cherry cherry delta apple banana echo"),
+]
+
+
+class TestSearchEngineBM25:
+    @pytest.fixture
+    def engine(self):
+        engine = SearchEngine()
+        engine.build_index_from_data(DOCUMENTS)
+        return engine
+
+    def _reference_scores(self, engine, query):
+        # 기존 dict 기반 구현과 같은 방식으로 BM25 점수를 계산
+        tokenizer = engine.inverted_index.tokenizer
+        doc_tokens = {doc_id: tokenizer.tokenize(text) for doc_id, text in DOCUMENTS}
+        N = len(doc_tokens)
+        avgdl = sum(len(tokens) for tokens in doc_tokens.values()) / N
+
+        scores = {}
+        for term in tokenizer.tokenize(query):
+            matched = {doc_id: tokens.count(term) for doc_id, tokens in doc_tokens.items() if term in tokens}
+            n_q = len(matched)
+            if n_q == 0:
+                continue
+            idf = math.log((N - n_q + 0.5) / (n_q + 0.5) + 1)
+            for doc_id, tf in matched.items():
+                numerator = tf * (engine.k1 + 1)
+                denominator = tf + engine.k1 * (1 - engine.b + engine.b * (len(doc_tokens[doc_id]) / avgdl))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (numerator / denominator)
+        return scores
+
+    # 벡터화된 점수가 기존 공식과 정확히 일치하는지 테스트
+    def test_bm25_scores_match_formula(self, engine):
+        # Given
+        query = "apple cherry delta"
+
+        # When
+        results = engine.search_bm25(query, top_k=10)
+
+        # Then
+        expected = self._reference_scores(engine, query)
+        assert dict(results) == expected
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_bm25_top_k_and_unknown_terms(self, engine):
+        # When
+        results = engine.search_bm25("apple", top_k=2)
+
+        # Then
+        assert len(results) == 2
+        assert results[0][0] == "doc3"
+        assert engine.search_bm25("없는단어") == []
+        assert engine.search_bm25("") == []
+
+    # WAND / Block-Max WAND가 전체 계산과 같은 top-k를 반환하는지 테스트
+    @pytest.mark.parametrize("algorithm", ["wand", "bmw"])
+    def test_pruned_search_matches_exhaustive(self, algorithm):
+        # Given: 블록이 여러 개 생기도록 문서를 충분히 만듦
+        random.seed(0)
+        vocab = ["apple", "banana", "cherry", "delta", "echo", "golf", "hotel", "india"]
+        documents = [
+            (f"doc{i}", " ".join(random.choice(vocab[:random.randint(1, len(vocab))]) for _ in range(random.randint(1, 30))))
+            for i in range(500)
+        ]
+        engine = SearchEngine()
+        engine.build_index_from_data(documents)
+
+        for query in ["apple", "golf hotel india", "apple apple cherry", "echo india"]:
+            for top_k in [1, 10, 100]:
+                # When
+                expected = engine.search_bm25(query, top_k=top_k)
+                results, stats = engine.search_bm25(query, top_k=top_k, algorithm=algorithm, return_stats=True)
+
+                # Then
+                assert results == expected
+                assert stats["evaluated_postings"] + stats["skipped_postings"] == stats["total_postings"]
+
+    def test_unknown_algorithm(self, engine):
+        with pytest.raises(ValueError):
+            engine.search_bm25("apple", algorithm="unknown")
+
+
+class TestHybridSearch:
+    @pytest.fixture
+    def engine(self):
+        engine = make_hybrid_engine(DOCUMENTS)
+        yield engine
+        engine.close()
+
+    # 동시 실행 결과가 두 검색 결과의 RRF 결합과 같은지 테스트
+    def test_hybrid_matches_rrf_of_branches(self, engine):
+        # Given
+        query = "apple cherry"
+        bm25 = engine.search_bm25(query, top_k=1000)
+        splade = engine.search_splade(query, top_k=1000)
+        expected = {}
+        for results in (bm25, splade):
+            for rank, (doc_id, _) in enumerate(results):
+                expected[doc_id] = expected.get(doc_id, 0.0) + 1 / (60 + rank + 1)
+
+        # When
+        results, stats = engine.hybrid_search(query, top_k=10, return_stats=True)
+
+        # Then
+        assert dict(results) == pytest.approx(expected)
+        assert stats["errors"] == {}
+        assert {"bm25_ms", "splade_ms", "total_ms"} <= set(stats["timings"])
+
+    # SPLADE 브랜치가 실패하면 BM25 결과만으로 응답하는지 테스트
+    def test_hybrid_degrades_when_branch_fails(self, engine):
+        # Given
+        engine.splade_model = FakeSpladeModel(fail=True)
+
+        # When
+        results, stats = engine.hybrid_search("apple", top_k=10, return_stats=True)
+
+        # Then
+        bm25 = engine.search_bm25("apple", top_k=1000)
+        assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in bm25]
+        assert "splade" in stats["errors"]
+
+    # 같은 쿼리(대소문자/공백만 다른 경우 포함)는 모델을 다시 호출하지 않는지 테스트
+    def test_repeated_query_uses_cache(self, engine):
+        # Given
+        first = engine.search_splade("apple cherry", top_k=10)
+        calls = engine.splade_model.calls
+
+        # When
+        second = engine.search_splade("  Apple   CHERRY ", top_k=10)
+
+        # Then
+        assert second == first
+        assert engine.splade_model.calls == calls
+        assert engine.query_cache.stats()["hits"] >= 1
+
+    # 결합 결과를 캐시해두고 페이지별 구간을 잘라서 반환하는지 테스트
+    def test_hybrid_pages_served_from_result_cache(self, engine):
+        # Given
+        full = engine.hybrid_search("apple cherry", top_k=100)
+        calls = engine.splade_model.calls
+
+        # When
+        page1, stats1 = engine.hybrid_search("apple cherry", top_k=2, offset=0, return_stats=True)
+        page2, stats2 = engine.hybrid_search("Apple  cherry", top_k=2, offset=2, return_stats=True)
+
+        # Then
+        assert page1 + page2 == full[:4]
+        assert stats1["cached"] and stats2["cached"]
+        assert engine.splade_model.calls == calls
+
+    # BM25 파라미터(k1, b)를 바꾸면 캐시된 결합 결과를 다시 쓰지 않는지 테스트
+    def test_result_cache_keyed_by_bm25_params(self, engine):
+        # Given
+        engine.hybrid_search("apple banana", top_k=10)
+
+        # When
+        engine.k1, engine.b = 0.5, 0.2
+        results = engine.hybrid_search("apple banana", top_k=10)
+
+        # Then
+        fresh = make_hybrid_engine(DOCUMENTS)
+        fresh.k1, fresh.b = 0.5, 0.2
+        assert results == fresh.hybrid_search("apple banana", top_k=10)
+        assert engine.search_bm25("apple banana") == fresh.search_bm25("apple banana")
+        assert len(engine.result_cache) == 2
+        fresh.close()
+
+    # 인덱스를 다시 만들면 결합 결과 캐시가 비워지는지 테스트
+    def test_result_cache_invalidated_on_rebuild(self, engine):
+        # Given
+        engine.hybrid_search("apple", top_k=10)
+        assert len(engine.result_cache) == 1
+
+        # When
+        engine.build_index_from_data([("doc9", "apple apple apple")])
+
+        # Then
+        assert len(engine.result_cache) == 0
+
+    # 인덱스를 동시에 다시 로드해도 세대가 로드 횟수만큼 올라가서 이전 캐시 키를 다시 쓰지 않는지 테스트
+    def test_concurrent_reloads_advance_generation(self, engine, tmp_path):
+        # Given
+        engine.index_path = str(tmp_path / "index")
+        engine.splade_index_path = str(tmp_path / "splade_index")
+        engine.titles_path = str(tmp_path / "titles.pkl")
+        engine.save()
+        generation = engine._index_generation
+        loaders = [engine.load_bm25, engine.load_splade_index] * 8
+
+        # When
+        threads = [threading.Thread(target=loader) for loader in loaders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Then
+        assert engine._index_generation == generation + len(loaders)
+
+    # 서버 시작 시처럼 BM25/SPLADE 인덱스와 제목을 동시에 로드해도 결과가 같은지 테스트
+    def test_concurrent_staged_load(self, engine, tmp_path):
+        # Given
+        from src.application.startup import StagedStartup
+        engine.titles = {"doc1": "Apple"}
+        engine.index_path = str(tmp_path / "index")
+        engine.splade_index_path = str(tmp_path / "splade_index")
+        engine.titles_path = str(tmp_path / "titles.pkl")
+        engine.save()
+        expected = engine.hybrid_search("apple cherry", top_k=5)
+
+        loaded = SearchEngine(
+            index_path=engine.index_path, splade_index_path=engine.splade_index_path,
+            titles_path=engine.titles_path
+        )
+        startup = StagedStartup()
+        startup.add("bm25_index", loaded.load_bm25)
+        startup.add("splade_index", loaded.load_splade_index)
+        startup.add("titles", loaded.load_titles)
+
+        # When
+        startup.start()
+        ready = startup.wait()
+        startup.shutdown()
+        loaded.splade_model = engine.splade_model
+
+        # Then
+        assert ready
+        assert loaded.titles == {"doc1": "Apple"}
+        assert loaded.hybrid_search("apple cherry", top_k=5) == expected
+        loaded.close()
+
+
+BATCH_DOCUMENTS = DOCUMENTS + [
+    ("doc6", "apple delta fig"),
+    ("doc7", "fig fig cherry echo banana"),
+    ("doc8", "new york apple pizza"),
+]
+BATCH_QUERIES = ["apple", "banana cherry", "apple apple fig", "zebra", "", '"apple banana" cherry', "delta echo apple"]
+
+
+class TestSearchBatch:
+    @pytest.fixture
+    def engine(self):
+        engine = make_hybrid_engine(BATCH_DOCUMENTS)
+        yield engine
+        engine.close()
+
+    # 배치 검색 결과(문서, 점수, 순서)가 쿼리별 검색 결과와 정확히 같은지 테스트 (chunk 경계 포함)
+    @pytest.mark.parametrize("chunk_size", [1, 3, 32])
+    def test_matches_per_query_search(self, engine, chunk_size):
+        # When
+        bm25 = engine.search_batch(BATCH_QUERIES, top_k=3, method="bm25", chunk_size=chunk_size)
+        splade = engine.search_batch(BATCH_QUERIES, top_k=3, method="splade", chunk_size=chunk_size)
+        hybrid = engine.search_batch(BATCH_QUERIES, top_k=4, method="hybrid", candidates_k=5, chunk_size=chunk_size)
+
+        # Then
+        assert len(bm25) == len(splade) == len(hybrid) == len(BATCH_QUERIES)
+        for i, query in enumerate(BATCH_QUERIES):
+            assert bm25[i] == engine.search_bm25(query, top_k=3)
+            assert splade[i] == engine.search_splade(query, top_k=3)
+            assert hybrid[i] == engine.hybrid_search(query, top_k=4, candidates_k=5)
+
+    # 점수가 거의 같은 문서가 많아도(행렬 곱의 반올림 오차로 순서가 바뀔 수 있는 경우) 쿼리별 BM25 결과와 정확히 같은지 테스트
+    def test_bm25_matches_per_query_exactly(self):
+        # Given
+        rng = random.Random(3)
+        words = [f"w{i}" for i in range(30)]
+        documents = [
+            (f"doc{i}", " ".join(rng.choice(words) for _ in range(rng.randint(1, 40))))
+            for i in range(2000)
+        ]
+        queries = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 12))) for _ in range(40)]
+        engine = SearchEngine()
+        engine.build_index_from_data(documents)
+
+        # When
+        results = engine.search_batch(queries, top_k=50, method="bm25", chunk_size=7)
+
+        # Then
+        for query, actual in zip(queries, results):
+            assert actual == engine.search_bm25(query, top_k=50)
+        engine.close()
+
+    # SPLADE 쿼리는 encode_batch로 한 번에 인코딩하고, 캐시에 있는 쿼리는 다시 인코딩하지 않음
+    def test_encodes_queries_in_one_batch(self, engine):
+        # Given
+        single_calls = engine.splade_model.calls
+
+        # When
+        engine.search_batch(["apple", "cherry"], method="splade")
+        engine.search_batch(["apple", "cherry"], method="splade")
+
+        # Then
+        assert engine.splade_model.batch_calls == 1
+        assert engine.splade_model.calls == single_calls
+
+    def test_unknown_method(self, engine):
+        # When / Then
+        with pytest.raises(ValueError):
+            engine.search_batch(["apple"], method="dense")
@@ -0,0 +1,103 @@
+import pytest
+from src.core.inverted_index import InvertedIndex
+from src.core.search_engine import SearchEngine
+from src.core.segments import SegmentedBM25
+from conftest import make_hybrid_engine
+
+BASE_DOCUMENTS = [
+    ("doc1", "apple banana apple cherry"),
+    ("doc2", "banana cherry"),
+    ("doc3", "apple apple apple"),
+    ("doc4", "delta echo banana"),
+    ("doc5", "cherry cherry delta apple banana echo"),
+]
+NEW_DOCUMENTS = [
+    ("doc6", "apple delta"),
+    ("doc2", "banana banana fig"),
+    ("doc7", "fig fig cherry echo"),
+]
+QUERIES = ["apple", "banana cherry", "fig", "delta echo apple", "zebra"]
+
+
+def live_documents():
+    # BASE에서 삭제/교체된 문서를 빼고, 추가된 문서를 순서대로 붙인 목록
+    return [doc for doc in BASE_DOCUMENTS if doc[0] not in ("doc2", "doc4")] + NEW_DOCUMENTS
+
+
+class TestSegments:
+    # 문서 추가/삭제 후 검색 결과가 남은 문서로 처음부터 빌드한 결과와 같은지 테스트
+    @pytest.mark.parametrize("max_segments", [8, 1])
+    def test_matches_full_rebuild(self, max_segments):
+        # Given
+        engine = make_hybrid_engine(BASE_DOCUMENTS, max_segments=max_segments, background_merge=False)
+        expected = make_hybrid_engine(live_documents())
+
+        # When
+        engine.add_documents(NEW_DOCUMENTS[:1])
+        engine.add_documents(NEW_DOCUMENTS[1:])
+        deleted = engine.delete_documents(["doc4", "missing"])
+
+        # Then
+        assert deleted == 1
+        assert len(engine.bm25_segments.segments) <= max(max_segments, 1)
+        for query in QUERIES:
+            assert engine.search_bm25(query, top_k=10) == expected.search_bm25(query, top_k=10)
+            assert engine.search_splade(query, top_k=10) == expected.search_splade(query, top_k=10)
+            assert engine.hybrid_search(query, top_k=10) == expected.hybrid_search(query, top_k=10)
+        engine.close()
+        expected.close()
+
+    # 세그먼트를 합쳐서 저장한 인덱스가 처음부터 빌드한 인덱스와 같은지 테스트
+    def test_compact_and_save(self, tmp_path):
+        # Given
+        engine = make_hybrid_engine(BASE_DOCUMENTS, index_path=str(tmp_path / "index"),
+                             splade_index_path=str(tmp_path / "splade"), titles_path=str(tmp_path / "titles.pkl"))
+        engine.add_documents(NEW_DOCUMENTS)
+        engine.delete_documents(["doc4"])
+
+        # When
+        engine.save()
+        loaded = SearchEngine(index_path=str(tmp_path / "index"), splade_index_path=str(tmp_path / "splade"),
+                              titles_path=str(tmp_path / "titles.pkl"))
+        loaded.load()
+
+        # Then
+        expected = make_hybrid_engine(live_documents())
+        assert engine.bm25_segments is None
+        assert list(loaded.inverted_index.doc_ids) == [doc_id for doc_id, _ in live_documents()]
+        assert list(loaded.splade_index.doc_ids) == [doc_id for doc_id, _ in live_documents()]
+        for query in QUERIES:
+            assert loaded.search_bm25(query, top_k=10) == expected.search_bm25(query, top_k=10)
+        engine.close()
+        expected.close()
+
+    # merge 도중에 삭제된 문서가 합쳐진 세그먼트에도 삭제로 남는지 테스트
+    def test_delete_during_merge(self, monkeypatch):
+        # Given
+        base = InvertedIndex()
+        base.add_documents(BASE_DOCUMENTS)
+        base.finalize()
+        segments = SegmentedBM25(base, max_segments=8, background_merge=False)
+        added = InvertedIndex()
+        added.add_documents(NEW_DOCUMENTS[:1])
+        added.finalize()
+        segments.add(added)
+
+        original_merge = InvertedIndex.merge
+
+        def merge_with_concurrent_delete(parts):
+            segments.delete("doc3")
+            return original_merge(parts)
+
+        monkeypatch.setattr(InvertedIndex, "merge", merge_with_concurrent_delete)
+
+        # When
+        merged = segments.merge_segments(segments.snapshot())
+
+        # Then
+        assert segments.segments == [merged]
+        assert merged.deleted_count == 1
+        assert "doc3" not in segments
+        doc_ids, _, _ = segments.search(["appl"], top_k=10, k1=1.5, b=0.9)
+        assert "doc3" not in doc_ids
+        assert segments.doc_count == 5
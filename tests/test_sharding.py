@@ -0,0 +1,168 @@
+import pytest
+import secrets
+import threading
+from multiprocessing import AuthenticationError, Pipe, Process
+from src.core.sharding import ShardedSearchEngine, build_shards, list_shards, serve_shard, shard_ranges
+from src.core.storage import write_meta
+from conftest import FakeSpladeModel, make_hybrid_engine
+
+DOCUMENTS = [
+    ("doc1", "new york pizza is the best pizza in new york"),
+    ("doc2", "york new pizza delivery"),
+    ("doc3", "apple banana apple cherry"),
+    ("doc4", "banana cherry pizza"),
+    ("doc5", "the new apple store opened in new york city"),
+    ("doc6", "cherry cherry delta apple banana echo"),
+    ("doc7", "pizza pizza pizza"),
+    ("doc8", "delta echo banana new"),
+]
+QUERIES = ["pizza", "new york", "apple banana cherry", '"new york" pizza', "delta echo apple", "zebra"]
+
+
+class TestSharding:
+    def test_shard_ranges(self):
+        # When / Then
+        assert shard_ranges(8, 3) == [(0, 3), (3, 6), (6, 8)]
+        assert shard_ranges(2, 5) == [(0, 1), (1, 2)]
+
+    # 연속 구간으로 나눈 shard에서 검색한 결과(점수, 순서)가 shard 없이 검색한 결과와 같은지 테스트
+    @pytest.mark.parametrize("num_shards", [1, 3])
+    def test_matches_unsharded_engine(self, tmp_path, num_shards):
+        # Given
+        engine = make_hybrid_engine(DOCUMENTS)
+        build_shards(engine.inverted_index, engine.splade_index, str(tmp_path / "shards"), num_shards)
+
+        # When
+        sharded = ShardedSearchEngine.spawn(str(tmp_path / "shards"))
+        sharded.splade_model = FakeSpladeModel()
+
+        # Then
+        try:
+            assert sharded.num_shards == num_shards
+            assert sharded.avg_doc_len == engine.inverted_index.avg_doc_len
+            for query in QUERIES:
+                for top_k in (1, 3, 100):
+                    assert sharded.search_bm25(query, top_k=top_k) == engine.search_bm25(query, top_k=top_k)
+                    assert sharded.search_splade(query, top_k=top_k) == engine.search_splade(query, top_k=top_k)
+                assert sharded.search_bm25(query, proximity_weight=1.0) == \
+                    engine.search_bm25(query, proximity_weight=1.0)
+                assert sharded.hybrid_search(query, top_k=5) == engine.hybrid_search(query, top_k=5)
+            assert sharded.search_batch(QUERIES, top_k=3, method="bm25") == \
+                [engine.search_bm25(query, top_k=3) for query in QUERIES]
+        finally:
+            sharded.close()
+            engine.close()
+
+        assert all(not process.is_alive() for process in sharded.processes) and not sharded.processes
+
+    def test_read_only(self, tmp_path):
+        # Given
+        engine = make_hybrid_engine(DOCUMENTS)
+        build_shards(engine.inverted_index, None, str(tmp_path / "shards"), 2)
+        sharded = ShardedSearchEngine.spawn(str(tmp_path / "shards"))
+
+        # When / Then
+        try:
+            with pytest.raises(RuntimeError):
+                sharded.add_documents([("doc9", "new pizza")])
+            # SPLADE 인덱스가 없는 shard면 워커의 에러가 coordinator에서 RuntimeError로 전달됨
+            sharded.splade_model = FakeSpladeModel()
+            with pytest.raises(RuntimeError):
+                sharded.search_splade("pizza")
+            # 에러 후에도 같은 연결로 계속 검색 가능
+            assert sharded.search_bm25("pizza") == engine.search_bm25("pizza")
+        finally:
+            sharded.close()
+            engine.close()
+
+    # 여러 스레드가 동시에 검색해도 (연결 묶음 수보다 많아도) 각자 자기 쿼리의 결과를 받는지 테스트
+    def test_concurrent_searches(self, tmp_path):
+        # Given
+        engine = make_hybrid_engine(DOCUMENTS)
+        build_shards(engine.inverted_index, engine.splade_index, str(tmp_path / "shards"), 3)
+        sharded = ShardedSearchEngine.spawn(str(tmp_path / "shards"), connections_per_shard=2)
+        sharded.splade_model = FakeSpladeModel()
+        expected = {query: engine.hybrid_search(query, top_k=5) for query in QUERIES}
+        results, errors = [], []
+
+        def worker(query):
+            try:
+                for _ in range(5):
+                    results.append((query, sharded.hybrid_search(query, top_k=5)))
+            except Exception as e:
+                errors.append(e)
+
+        # When
+        try:
+            threads = [threading.Thread(target=worker, args=(query,)) for query in QUERIES]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sharded.close()
+            engine.close()
+
+        # Then
+        assert not errors
+        assert len(results) == 5 * len(QUERIES)
+        assert all(result == expected[query] for query, result in results)
+
+    # 응답을 받는 도중 에러가 나도 다음 요청이 이전 요청의 응답을 받지 않는지 테스트
+    def test_failed_round_trip_does_not_mix_responses(self, tmp_path):
+        # Given: 연결 묶음이 하나뿐이고, 두 번째 shard 연결의 recv가 한 번 실패함
+        engine = make_hybrid_engine(DOCUMENTS)
+        build_shards(engine.inverted_index, None, str(tmp_path / "shards"), 2)
+        sharded = ShardedSearchEngine.spawn(str(tmp_path / "shards"), connections_per_shard=1)
+        conn = sharded._pool.queue[0][1]
+        recv = conn.recv
+
+        def broken_recv():
+            conn.recv = recv
+            raise OSError("connection reset")
+
+        conn.recv = broken_recv
+
+        # When / Then
+        try:
+            with pytest.raises(OSError):
+                sharded.search_bm25("pizza")
+            for query in QUERIES:
+                assert sharded.search_bm25(query) == engine.search_bm25(query)
+        finally:
+            sharded.close()
+            engine.close()
+
+    # 인증 키가 다른 연결은 거부하고, 워커는 계속 올바른 키의 연결을 받는지 테스트
+    def test_authkey_required(self, tmp_path):
+        # Given
+        engine = make_hybrid_engine(DOCUMENTS)
+        build_shards(engine.inverted_index, None, str(tmp_path / "shards"), 1)
+        shard_path = list_shards(str(tmp_path / "shards"))[0]
+        authkey = secrets.token_bytes(32)
+        receiver, sender = Pipe(duplex=False)
+        process = Process(target=serve_shard, args=(shard_path, ("127.0.0.1", 0), authkey, sender), daemon=True)
+        process.start()
+        address = receiver.recv()
+
+        # When / Then
+        with pytest.raises(AuthenticationError):
+            ShardedSearchEngine([address], authkey=b"bm25-splade-shards")
+        sharded = ShardedSearchEngine([address], authkey=authkey, processes=[process])
+        try:
+            assert sharded.search_bm25("pizza") == engine.search_bm25("pizza")
+        finally:
+            sharded.close()
+            engine.close()
+
+        # 빈 키로는 워커를 시작하지 않음
+        with pytest.raises(ValueError):
+            serve_shard(shard_path, ("127.0.0.1", 0), b"")
+
+    def test_unknown_format(self, tmp_path):
+        # Given
+        write_meta(str(tmp_path), {"format": "something-else", "version": 1})
+
+        # When / Then
+        with pytest.raises(ValueError):
+            list_shards(str(tmp_path))
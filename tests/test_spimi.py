@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from src.core.inverted_index import InvertedIndex, ARRAY_FILES
+from src.core.spimi import SpimiIndexer
+from src.core.storage import read_meta
+
+DOCUMENTS = [
+    ("doc1", "apple banana apple"),
+    ("doc2", "banana cherry"),
+    ("doc3", "I cannot eat cherry pie"),
+    ("doc4", ""),
+    ("doc5", "apple pie with banana and cherry"),
+    ("doc6", "running foxes and running dogs"),
+    ("doc7", "zebra apple"),
+]
+
+
+class TestSpimiIndexer:
+    # 여러 run으로 나눠서 flush 한 뒤 merge 한 결과가 메모리 빌드 결과와 같은지 테스트
+    @pytest.mark.parametrize("store_positions", [True, False])
+    def test_matches_in_memory_build(self, tmp_path, store_positions):
+        # Given
+        expected = InvertedIndex()
+        expected.add_documents(DOCUMENTS)
+        expected.finalize(store_positions)
+        expected.save(str(tmp_path / "expected"))
+
+        # 메모리 예산을 아주 작게 줘서 문서마다 run이 생기도록 함
+        indexer = SpimiIndexer(str(tmp_path / "spimi"), memory_budget_mb=1e-6, store_positions=store_positions)
+
+        # When
+        indexer.build(iter(DOCUMENTS))
+        actual = InvertedIndex()
+        actual.load(str(tmp_path / "spimi"))
+
+        # Then
+        assert indexer.num_runs > 1
+        assert read_meta(str(tmp_path / "spimi")) == read_meta(str(tmp_path / "expected"))
+        assert actual.lexicon == expected.lexicon
+        assert list(actual.doc_ids) == list(expected.doc_ids)
+        for name in ARRAY_FILES:
+            if getattr(expected, name) is None:
+                assert getattr(actual, name) is None
+            else:
+                assert np.array_equal(getattr(actual, name), getattr(expected, name)), name
+        assert not (tmp_path / "spimi" / "runs").exists()
+
+    def test_empty_corpus(self, tmp_path):
+        # When
+        meta = SpimiIndexer(str(tmp_path / "spimi")).build(iter([]))
+        index = InvertedIndex()
+        index.load(str(tmp_path / "spimi"))
+
+        # Then
+        assert meta["doc_count"] == 0
+        assert len(index.lexicon) == 0
@@ -70,3 +70,190 @@ class TestSpladeIndex:
         assert new_idx.doc_ids == ["doc_test"]
         assert new_idx.matrix[0, 1] == 10
         assert new_idx.matrix[0, 2] == 20
+
+    # mmap 포맷으로 로드한 행렬이 파일을 복사 없이 참조하는지 테스트
+    def test_mmap_load_is_zero_copy(self, splade_idx, tmp_path):
+        # Given
+        splade_idx.add_batch(["doc1", "doc2"], [np.array([3, 7]), np.array([7])], [np.array([0.3, 0.7]), np.array([0.5])])
+        splade_idx.build()
+        save_path = tmp_path / "splade_index"
+        splade_idx.save(str(save_path))
+
+        # When
+        new_idx = SpladeIndex(vocab_size=100)
+        new_idx.load(str(save_path))
+
+        # Then
+        assert os.path.isdir(save_path)
+        # 읽기 전용 mmap을 그대로 쓰고 있다면 복사본이 아니므로 writeable이 False
+        assert not new_idx.matrix.data.flags.writeable
+        assert not new_idx.matrix.indices.flags.writeable
+        assert new_idx.doc_ids[1] == "doc2"
+        assert (new_idx.matrix != splade_idx.matrix).nnz == 0
+        assert new_idx.search({7: 1.0}) == pytest.approx({"doc1": 0.7, "doc2": 0.5})
+
+    # 예전 포맷(npz + pkl)도 저장/로드가 되는지 테스트
+    def test_legacy_npz_format(self, splade_idx, tmp_path):
+        # Given
+        splade_idx.add_batch(["doc1"], [np.array([4])], [np.array([0.4])])
+        splade_idx.build()
+        save_path = tmp_path / "legacy_splade"
+
+        # When
+        splade_idx.save(str(save_path), mmap_format=False)
+        new_idx = SpladeIndex(vocab_size=100)
+        loaded = new_idx.load(str(save_path))
+
+        # Then
+        assert loaded is True
+        assert os.path.exists(f"{save_path}.npz")
+        assert new_idx.doc_ids == ["doc1"]
+        assert new_idx.matrix[0, 4] == 40
+
+    # 상위 k개 검색이 전체 내적 결과와 일치하는지 테스트
+    def test_search_topk_matches_dot_product(self):
+        # Given
+        rng = np.random.default_rng(0)
+        splade_idx = SpladeIndex(vocab_size=50)
+        doc_ids = [f"doc{i}" for i in range(200)]
+        indices_list = [rng.choice(50, size=rng.integers(1, 10), replace=False) for _ in doc_ids]
+        values_list = [rng.random(len(indices)) * 3 for indices in indices_list]
+        splade_idx.add_batch(doc_ids, indices_list, values_list)
+        splade_idx.build()
+        query_vec = {3: 0.5, 10: 1.2, 42: 0.1}
+
+        # When
+        doc_idx, scores = splade_idx.search_topk(query_vec, top_k=20)
+
+        # Then
+        q = np.zeros(50)
+        for term, weight in query_vec.items():
+            q[term] = weight
+        expected = splade_idx.matrix.dot(q) / 100.0
+        assert len(doc_idx) == 20
+        assert scores == pytest.approx(expected[doc_idx], rel=1e-5)
+        assert scores[-1] >= np.sort(expected)[-20] - 1e-5
+        assert list(scores) == sorted(scores, reverse=True)
+
+        # 버퍼가 다음 쿼리를 위해 초기화되었는지 확인
+        again_idx, again_scores = splade_idx.search_topk(query_vec, top_k=20)
+        assert again_idx.tolist() == doc_idx.tolist()
+        assert again_scores.tolist() == scores.tolist()
+
+    def test_search_topk_no_match(self, splade_idx):
+        # Given
+        splade_idx.add_batch(["doc1"], [np.array([1])], [np.array([0.5])])
+        splade_idx.build()
+
+        # When
+        doc_idx, scores = splade_idx.search_topk({2: 1.0}, top_k=10)
+
+        # Then
+        assert len(doc_idx) == 0
+        assert len(scores) == 0
+
+    # MaxScore 모드가 exact 모드와 같은 top-k를 반환하는지 테스트
+    def test_maxscore_matches_exact(self):
+        # Given
+        rng = np.random.default_rng(1)
+        splade_idx = SpladeIndex(vocab_size=200)
+        doc_ids = [f"doc{i}" for i in range(1000)]
+        indices_list = [rng.choice(200, size=rng.integers(5, 30), replace=False) for _ in doc_ids]
+        values_list = [rng.random(len(indices)) ** 3 * 3 for indices in indices_list]
+        splade_idx.add_batch(doc_ids, indices_list, values_list)
+        splade_idx.build()
+
+        for _ in range(10):
+            query_vec = {int(t): float(w) for t, w in zip(rng.choice(200, size=25, replace=False), rng.random(25) ** 2)}
+            for top_k in [1, 10, 100]:
+                # When
+                exact_idx, exact_scores = splade_idx.search_topk(query_vec, top_k)
+                pruned_idx, pruned_scores, stats = splade_idx.search_topk(query_vec, top_k, mode="maxscore", return_stats=True)
+
+                # Then
+                assert pruned_idx.tolist() == exact_idx.tolist()
+                assert pruned_scores.tolist() == exact_scores.tolist()
+                assert stats["scanned_postings"] + stats["skipped_postings"] == stats["total_postings"]
+
+    # 행렬 곱으로 계산한 배치 검색 결과가 쿼리별 exact 검색과 같은지 테스트
+    def test_search_batch_matches_exact(self):
+        # Given
+        rng = np.random.default_rng(2)
+        splade_idx = SpladeIndex(vocab_size=200)
+        doc_ids = [f"doc{i}" for i in range(1000)]
+        indices_list = [rng.choice(200, size=rng.integers(5, 30), replace=False) for _ in doc_ids]
+        values_list = [rng.random(len(indices)) ** 3 * 3 for indices in indices_list]
+        splade_idx.add_batch(doc_ids, indices_list, values_list)
+        splade_idx.build()
+        query_vecs = [
+            {int(t): float(w) for t, w in zip(rng.choice(200, size=25, replace=False), rng.random(25) ** 2)}
+            for _ in range(9)
+        ] + [{}]
+
+        # When
+        results = splade_idx.search_batch(query_vecs, 50, chunk_size=4)
+
+        # Then
+        assert len(results) == len(query_vecs)
+        for query_vec, (doc_idx, scores) in zip(query_vecs, results):
+            exact_idx, exact_scores = splade_idx.search_topk(query_vec, 50)
+            assert doc_idx.tolist() == exact_idx.tolist()
+            assert scores.tolist() == exact_scores.tolist()
+
+    # 쿼리 term 가지치기 테스트
+    def test_query_term_pruning(self):
+        # Given
+        from src.core.splade_index import prune_query
+        query_vec = {1: 0.9, 2: 0.05, 3: 0.5, 4: 0.7}
+
+        # When / Then
+        assert prune_query(query_vec, max_terms=2) == {1: 0.9, 4: 0.7}
+        assert list(prune_query(query_vec, max_terms=3)) == [1, 3, 4]
+        assert prune_query(query_vec, min_weight=0.1) == {1: 0.9, 3: 0.5, 4: 0.7}
+
+    def test_column_max_saved(self, splade_idx, tmp_path):
+        # Given
+        splade_idx.add_batch(["doc1", "doc2"], [np.array([3, 7]), np.array([7])], [np.array([0.3, 0.2]), np.array([0.5])])
+        splade_idx.build()
+
+        # When
+        splade_idx.save(str(tmp_path / "splade"))
+        new_idx = SpladeIndex(vocab_size=100)
+        new_idx.load(str(tmp_path / "splade"))
+
+        # Then
+        assert new_idx.col_max[3] == 30
+        assert new_idx.col_max[7] == 50
+        assert new_idx.col_max[0] == 0
+
+    # chunk 단위 counting sort로 만든 CSC가 scipy의 COO -> CSC 변환 결과와 같은지 테스트
+    def test_build_matches_scipy_conversion(self, monkeypatch):
+        # Given
+        import scipy.sparse as sp
+        from src.core import splade_index as splade_module
+        monkeypatch.setattr(splade_module, "BUILD_CHUNK_SIZE", 7)
+        rng = np.random.default_rng(0)
+        indices_list = [np.sort(rng.choice(100, rng.integers(0, 10), replace=False)) for _ in range(50)]
+        values_list = [rng.random(len(indices)).astype(np.float32) * 3 for indices in indices_list]
+        doc_ids = [f"doc{i}" for i in range(50)]
+
+        rows = np.repeat(np.arange(50), [len(indices) for indices in indices_list])
+        expected = sp.csc_matrix(
+            (np.concatenate([(v * 100).astype(np.int16) for v in values_list]), (rows, np.concatenate(indices_list))),
+            shape=(50, 100), dtype=np.int16
+        )
+
+        # When
+        splade_idx = SpladeIndex(vocab_size=100)
+        for start in range(0, 50, 8):
+            splade_idx.add_batch(doc_ids[start:start + 8], indices_list[start:start + 8], values_list[start:start + 8])
+        splade_idx.build()
+
+        # Then
+        assert np.array_equal(splade_idx.matrix.indptr, expected.indptr)
+        assert np.array_equal(splade_idx.matrix.indices, expected.indices)
+        assert np.array_equal(splade_idx.matrix.data, expected.data)
+
+    def test_add_batch_rejects_out_of_vocab(self, splade_idx):
+        with pytest.raises(ValueError):
+            splade_idx.add_batch(["doc1"], [np.array([100])], [np.array([0.5])])
@@ -0,0 +1,76 @@
+import threading
+import time
+import pytest
+from src.application.startup import StagedStartup
+
+
+class TestStagedStartup:
+    # 독립적인 단계는 동시에 실행되어 전체 시간이 가장 느린 단계 하나의 시간에 가까운지 테스트
+    def test_independent_stages_run_concurrently(self):
+        # Given
+        startup = StagedStartup()
+        for name in ("bm25_index", "splade_index", "splade_model"):
+            startup.add(name, lambda: time.sleep(0.2))
+
+        # When
+        start = time.perf_counter()
+        startup.start()
+        ready = startup.wait()
+        elapsed = time.perf_counter() - start
+
+        # Then
+        assert ready
+        assert elapsed < 0.5
+        assert all(stage["status"] == "done" for stage in startup.status().values())
+        startup.shutdown()
+
+    # 의존하는 단계는 선행 단계가 끝난 뒤에 시작하는지 테스트
+    def test_dependent_stage_waits(self):
+        # Given
+        order = []
+        release = threading.Event()
+        startup = StagedStartup()
+        startup.add("model", lambda: (release.wait(), order.append("model")))
+        startup.add("index", lambda: order.append("index"))
+        startup.add("warm_up", lambda: order.append("warm_up"), requires=("model", "index"))
+
+        # When
+        startup.start()
+        startup.wait("index")
+        partial = startup.is_done("index") and not startup.is_done()
+        release.set()
+        startup.wait()
+
+        # Then
+        assert partial
+        assert order == ["index", "model", "warm_up"]
+        startup.shutdown()
+
+    # 실패한 단계에 의존하는 단계는 실행하지 않음
+    def test_failure_skips_dependents(self):
+        # Given
+        ran = []
+        startup = StagedStartup()
+        startup.add("model", lambda: 1 / 0)
+        startup.add("warm_up", lambda: ran.append("warm_up"), requires=("model",))
+        startup.add("titles", lambda: None)
+
+        # When
+        startup.start()
+        ready = startup.wait()
+
+        # Then
+        assert not ready
+        assert startup.is_done("titles")
+        assert ran == []
+        assert set(startup.failed()) == {"model", "warm_up"}
+        assert "ZeroDivisionError" in startup.status()["model"]["error"]
+        startup.shutdown()
+
+    def test_unknown_dependency(self):
+        # Given
+        startup = StagedStartup()
+
+        # When / Then
+        with pytest.raises(ValueError):
+            startup.add("warm_up", lambda: None, requires=("model",))
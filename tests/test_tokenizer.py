@@ -38,6 +38,36 @@ class TestBM25Tokenizer:
         assert tokenizer.tokenize("") == []
         assert tokenizer.tokenize(None) == []
 
+    # fast 모드가 nltk.word_tokenize 모드와 같은 토큰을 만드는지 테스트
+    def test_fast_mode_matches_nltk_mode(self, tokenizer):
+        # Given
+        nltk_tokenizer = BM25Tokenizer(mode="nltk")
+        texts = [
+            "The quick brown foxes are running",
+            "I cannot believe you're gonna wanna do that, gotta go. Lemme see, gimme 5!",
+            "U.S.A. e-mail 3.14 $1,000 naïve café (paren) \"quote\" a--b\ttab\nnewline",
+            "Mr. Smith's 'tis d'ye more'n ... wanna",
+        ]
+
+        # When / Then
+        for text in texts:
+            assert tokenizer.tokenize(text) == nltk_tokenizer.tokenize(text)
+
+    def test_tokenize_batch_and_stem_cache(self, tokenizer):
+        # Given
+        texts = ["running foxes", "foxes running fast"]
+
+        # When
+        batch = tokenizer.tokenize_batch(texts)
+
+        # Then
+        assert batch == [tokenizer.tokenize(text) for text in texts]
+        assert tokenizer._stem_cache["running"] == "run"
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            BM25Tokenizer(mode="spacy")
+
 
 class TestSpladeTokenizer:
     @pytest.fixture
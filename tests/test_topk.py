@@ -0,0 +1,56 @@
+import numpy as np
+from src.core.topk import top_k_indices, top_k_items
+
+
+class TestTopK:
+    # 전체 정렬 결과와 동일한지 테스트
+    def test_top_k_indices_matches_full_sort(self):
+        # Given
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 20, size=1000).astype(np.float64)
+
+        for k in [1, 10, 100, 1000, 2000]:
+            # When
+            result = top_k_indices(scores, k)
+
+            # Then
+            expected = sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
+            assert result.tolist() == expected
+
+    # 동점일 때 index가 작은 쪽이 먼저 오는지 테스트
+    def test_top_k_indices_tie_breaking(self):
+        # Given
+        scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0])
+
+        # When
+        result = top_k_indices(scores, 2)
+
+        # Then
+        assert result.tolist() == [1, 2]
+
+    # ids를 주면 동점일 때 ids가 작은 쪽이 먼저 오는지 테스트
+    def test_top_k_indices_tie_breaking_by_ids(self):
+        # Given
+        scores = np.array([1.0, 3.0, 3.0, 2.0, 3.0])
+        ids = np.array([10, 42, 17, 5, 3])
+
+        # When
+        result = top_k_indices(scores, 2, ids)
+
+        # Then
+        assert result.tolist() == [4, 2]
+
+    def test_top_k_indices_edge_cases(self):
+        assert top_k_indices(np.array([]), 10).tolist() == []
+        assert top_k_indices(np.array([1.0, 2.0]), 0).tolist() == []
+
+    def test_top_k_items(self):
+        # Given
+        items = {"doc3": 0.5, "doc1": 0.5, "doc2": 0.9, "doc4": 0.1}
+
+        # When
+        result = top_k_items(items.items(), 3)
+
+        # Then
+        assert result == [("doc2", 0.9), ("doc1", 0.5), ("doc3", 0.5)]
+        assert top_k_items(items.items(), 0) == []
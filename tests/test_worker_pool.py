@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import pytest
+from src.application.worker_pool import SearchWorkerPool, PoolFullError
+
+
+class TestSearchWorkerPool:
+    def test_run_returns_result(self):
+        # Given
+        pool = SearchWorkerPool(max_workers=2, max_queue=2)
+
+        # When
+        result = asyncio.run(pool.run(lambda x, y=0: x + y, 1, y=2))
+
+        # Then
+        assert result == 3
+        assert pool.stats()["completed"] == 1
+        pool.shutdown()
+
+    # 대기열이 가득 차면 바로 거절하는지 테스트
+    def test_rejects_when_full(self):
+        # Given
+        pool = SearchWorkerPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(release.wait))
+            second = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0.05)
+
+            # When
+            with pytest.raises(PoolFullError):
+                await pool.run(release.wait)
+            stats = pool.stats()
+
+            release.set()
+            await asyncio.gather(first, second)
+            return stats
+
+        stats = asyncio.run(scenario())
+
+        # Then
+        assert stats["in_flight"] == 1
+        assert stats["queue_depth"] == 1
+        assert stats["rejected"] == 1
+        assert pool.stats()["in_flight"] == 0
+        pool.shutdown()